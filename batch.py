@@ -0,0 +1,278 @@
+# Run many INTERPOL programs without prompting, on a pool of processes.
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from interpreter import Constants, Error, Exporter, File, Formatter, IOException, NativeMachine, Program, Variables, VectorMachine, VirtualMachine, numpy
+
+class Status:
+    # The program ran up to its end.
+    OK = 'OK'
+    # The program stopped on an INTERPOL error.
+    ERROR = 'ERROR'
+    # The program could not be run e.g., missing or empty file.
+    FAILED = 'FAILED'
+
+# Files used by a single program run.
+class Job:
+    INPUT_EXTENSION = '.in'
+    OUTPUT_EXTENSION = '.out'
+    ERROR_EXTENSION = '.err'
+    RESULT_EXTENSION = '.csv'
+    # Exported tables are <name>.tokens.<format> and <name>.symbols.<format>, see Exporter.
+    TOKENS_EXTENSION = '.tokens'
+    SYMBOLS_EXTENSION = '.symbols'
+    
+    # With a root e.g., the directory of a glob, the outputs keep the directories of the program below the root
+    # within the output directory, so programs of the same name in different directories have their own outputs.
+    def __init__(self, file, inputFile = None, outputDir = None, inputDir = None, root = None):
+        self.file = file
+        name = os.path.splitext(os.path.basename(file))[0]
+        
+        # By default the input file is next to the program, with the same name.
+        if inputFile is None:
+            inputFile = os.path.join(inputDir if inputDir is not None else os.path.dirname(file), \
+                                     name + Job.INPUT_EXTENSION)
+            if not os.path.exists(inputFile):
+                inputFile = None
+        self.inputFile = inputFile
+        
+        # By default the outputs are next to the program, with the same name.
+        if outputDir is None:
+            outputDir = os.path.dirname(file)
+        elif root is not None:
+            outputDir = os.path.normpath(os.path.join(outputDir, os.path.relpath(os.path.dirname(file) or '.', root)))
+        base = os.path.join(outputDir, name)
+        self.outputFile = base + Job.OUTPUT_EXTENSION
+        self.errorFile = base + Job.ERROR_EXTENSION
+        self.resultFile = base + Job.RESULT_EXTENSION
+        self.base = base
+    
+    # Export the token/lexeme and symbols tables in the format.
+    def export(self, _format, program, variables, formatter):
+        extension = Exporter.EXTENSIONS[_format]
+        exporter = Exporter(self.base + Job.TOKENS_EXTENSION + extension, _format, formatter)
+        try:
+            exporter.writeTokens(program.tokens)
+        finally:
+            exporter.close()
+        exporter = Exporter(self.base + Job.SYMBOLS_EXTENSION + extension, _format, formatter)
+        try:
+            exporter.writeVariables(variables)
+        finally:
+            exporter.close()
+
+# Holder for the outcome of a job.
+class Result:
+    def __init__(self, file, status, seconds):
+        self.file = file
+        self.status = status
+        self.seconds = seconds
+
+class Batch:
+    @staticmethod
+    # Directory of the files matched by a glob i.e., its longest leading path without any wildcard.
+    def getRoot(pattern):
+        root = os.path.dirname(pattern)
+        while glob.has_magic(root):
+            root = os.path.dirname(root)
+        return root or '.'
+    
+    @staticmethod
+    # Expand the files, globs and manifests into the list of jobs, in the given order.
+    # Each line of a manifest is a program file optionally followed by its input file.
+    # Blank lines and lines starting with # are ignored.
+    # Raise ValueError if two jobs would write the same output files.
+    def getJobs(patterns, manifests = (), outputDir = None, inputDir = None):
+        jobs = []
+        for pattern in patterns:
+            if glob.has_magic(pattern):
+                root = Batch.getRoot(pattern)
+                for file in sorted(glob.glob(pattern, recursive = True)):
+                    jobs.append(Job(file, None, outputDir, inputDir, root))
+            else:
+                jobs.append(Job(pattern, None, outputDir, inputDir))
+        for manifest in manifests:
+            with open(manifest, 'r') as manifestFile:
+                for line in manifestFile:
+                    fields = line.split()
+                    if not fields or fields[0].startswith('#'):
+                        continue
+                    jobs.append(Job(fields[0], fields[1] if len(fields) > 1 else None, outputDir, inputDir))
+        
+        files = {}
+        for job in jobs:
+            base = os.path.normcase(os.path.abspath(job.base))
+            if base in files and files[base] != job.file:
+                raise ValueError('%s and %s would both write %s%s' % (files[base], job.file, job.base, Job.OUTPUT_EXTENSION))
+            files[base] = job.file
+        return jobs
+    
+    @staticmethod
+    # Run a single program, reading its input file and writing its output and error files.
+    # With tables, the token/lexeme and symbols tables follow the output like an interactive run.
+    # With native, the program is translated to Python code and executed natively.
+    # Printed integers have at most maxDigits digits, the limit of Python by default and 0 for no limit.
+    # With export, the tables are also written in this format next to the output, see Job.export.
+    def run(job, tables = False, native = False, maxDigits = None, export = None):
+        start = time.perf_counter()
+        status = Status.OK
+        message = ''
+        stdin = sys.stdin
+        try:
+            os.makedirs(os.path.dirname(job.outputFile) or '.', exist_ok = True)
+            with open(job.outputFile, 'w') as outputFile, contextlib.redirect_stdout(outputFile):
+                sys.stdin = open(job.inputFile, 'r') if job.inputFile is not None else io.StringIO()
+                try:
+                    File.check(job.file)
+                    program = Program.fromFile(job.file, native)
+                    variables = Variables()
+                    formatter = Formatter(maxDigits)
+                    machine = NativeMachine if native else VirtualMachine
+                    machine(program, variables, None, formatter).run()
+                    if tables:
+                        program.tokens.display()
+                        variables.display(formatter)
+                    if export is not None:
+                        job.export(export, program, variables, formatter)
+                except IOException as ioe:
+                    status = Status.FAILED
+                    message = str(ioe)
+                except Error as err:
+                    status = Status.ERROR
+                    message = str(err)
+                except Exception:
+                    status = Status.ERROR
+                    message = Error.getMessage('GENERAL_ERROR')
+                finally:
+                    sys.stdin.close()
+                    sys.stdin = stdin
+        except OSError as err:
+            status = Status.FAILED
+            message = str(err)
+        
+        try:
+            with open(job.errorFile, 'w') as errorFile:
+                if message:
+                    errorFile.write(message + '\n')
+        except OSError:
+            status = Status.FAILED
+        return Result(job.file, status, time.perf_counter() - start)
+    
+    @staticmethod
+    # Run the jobs on a pool of processes and return their results in the same order.
+    def runAll(jobs, processes = None, tables = False, native = False, maxDigits = None, export = None):
+        if processes == 1:
+            return [Batch.run(job, tables, native, maxDigits, export) for job in jobs]
+        
+        processes = processes or os.cpu_count() or 1
+        # Hand out several jobs at a time, as most programs only take a few milliseconds.
+        chunkSize = max(1, min(64, len(jobs) // (processes * 8)))
+        with multiprocessing.Pool(processes) as pool:
+            return pool.starmap(Batch.run, [(job, tables, native, maxDigits, export) for job in jobs], chunkSize)
+    
+    @staticmethod
+    # Read the table of inputs: a CSV file, or a .npy file of integers if numpy is installed.
+    # Each row is a run of the program and each column the input line of an INPUT statement, in order.
+    def readTable(tableFile, header = False):
+        if numpy is not None and tableFile.endswith('.npy'):
+            return numpy.load(tableFile)
+        with open(tableFile, 'r', newline = '') as csvFile:
+            rows = list(csv.reader(csvFile))
+        return rows[1:] if header else rows
+    
+    @staticmethod
+    # Run the program once for each row of the table, all the rows at the same time.
+    # The output and error message of each row are written to the result file.
+    def runTable(job, table, maxDigits = None):
+        File.check(job.file)
+        results = VectorMachine(Program.fromFile(job.file), table, Formatter(maxDigits)).run()
+        with open(job.resultFile, 'w', newline = '') as resultFile:
+            writer = csv.writer(resultFile)
+            writer.writerow(['row', 'output', 'error'])
+            for row, (output, error) in enumerate(results, 1):
+                writer.writerow([row, output, error or ''])
+        return results
+    
+    @staticmethod
+    # Display the status and time of each program in the following format, then the totals:
+    #  FILE <padding> STATUS <padding> TIME
+    def display(results, seconds):
+        col1Padding = max([len('FILE')] + [len(result.file) for result in results])
+        col2Padding = 10
+        
+        print('FILE'.ljust(col1Padding), 'STATUS'.ljust(col2Padding), 'TIME')
+        for result in results:
+            print(result.file.ljust(col1Padding), \
+                  result.status.ljust(col2Padding), \
+                  '%.3fs' % result.seconds)
+        
+        counts = { status: 0 for status in (Status.OK, Status.ERROR, Status.FAILED) }
+        for result in results:
+            counts[result.status] += 1
+        print('\n%d programs: %d ok, %d error, %d failed in %.3fs' % \
+              (len(results), counts[Status.OK], counts[Status.ERROR], counts[Status.FAILED], seconds))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run INTERPOL programs in parallel without prompting.')
+    parser.add_argument('files', nargs = '*', \
+                        help = 'program files or glob patterns e.g., "scripts/**/*%s"' % Constants.FILE_EXTENSION)
+    parser.add_argument('-m', '--manifest', action = 'append', default = [], \
+                        help = 'file listing a program and optionally its input file on each line')
+    parser.add_argument('-j', '--jobs', type = int, default = None, \
+                        help = 'number of processes, by default the number of CPUs')
+    parser.add_argument('--input-dir', \
+                        help = 'directory of the <name>%s input files, by default next to each program' % Job.INPUT_EXTENSION)
+    parser.add_argument('--output-dir', \
+                        help = 'directory of the <name>%s and <name>%s files, by default next to each program' % \
+                               (Job.OUTPUT_EXTENSION, Job.ERROR_EXTENSION))
+    parser.add_argument('--tables', action = 'store_true', \
+                        help = 'write the token/lexeme and symbols tables after the output')
+    parser.add_argument('--export', choices = Exporter.FORMATS, \
+                        help = 'also write the tables of each program that ran to its end to <name>%s and <name>%s ' \
+                               'in this format' % (Job.TOKENS_EXTENSION + '.EXT', Job.SYMBOLS_EXTENSION + '.EXT'))
+    parser.add_argument('--native', action = 'store_true', \
+                        help = 'translate the programs to Python code and execute them natively')
+    parser.add_argument('--max-digits', type = int, default = None, \
+                        help = 'largest number of digits of a printed integer, 0 for no limit, by default the limit of Python')
+    parser.add_argument('-t', '--table', \
+                        help = 'run a single program once for each row of this CSV or .npy file of inputs, ' \
+                               'writing the output and error of each row to <name>%s' % Job.RESULT_EXTENSION)
+    parser.add_argument('--header', action = 'store_true', \
+                        help = 'skip the first row of the CSV table')
+    options = parser.parse_args()
+    
+    if options.table is not None:
+        if len(options.files) != 1 or options.manifest:
+            parser.error('a table of inputs needs exactly one program file')
+        if options.output_dir is not None:
+            os.makedirs(options.output_dir, exist_ok = True)
+        job = Job(options.files[0], None, options.output_dir)
+        start = time.perf_counter()
+        try:
+            results = Batch.runTable(job, Batch.readTable(options.table, options.header), options.max_digits)
+        except (Error, OSError) as err:
+            print(err)
+            sys.exit(1)
+        errors = sum(1 for output, error in results if error is not None)
+        print('%d rows: %d ok, %d error in %.3fs' % (len(results), len(results) - errors, errors, time.perf_counter() - start))
+        sys.exit(0 if errors == 0 else 1)
+    
+    try:
+        jobs = Batch.getJobs(options.files, options.manifest, options.output_dir, options.input_dir)
+    except (ValueError, OSError) as err:
+        parser.error(str(err))
+    if options.output_dir is not None:
+        os.makedirs(options.output_dir, exist_ok = True)
+    
+    start = time.perf_counter()
+    results = Batch.runAll(jobs, options.jobs, options.tables, options.native, options.max_digits, options.export)
+    Batch.display(results, time.perf_counter() - start)
+    sys.exit(0 if all(result.status == Status.OK for result in results) else 1)
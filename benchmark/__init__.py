@@ -0,0 +1 @@
+# Benchmarks of the INTERPOL interpreter on synthetic programs, run with: python -m benchmark
@@ -0,0 +1,136 @@
+# Time the lexing, compiling and execution of the synthetic programs, write the timings as JSON
+# and compare them with the timings of a baseline.
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from interpreter import Compiler, Constants, Formatter, Lexer, MemoryOutput, NativeMachine, ReplayLexer, Tokens, \
+                        Transpiler, Variables, VirtualMachine
+from benchmark.generators import WORKLOADS
+
+class Benchmark:
+    # Timed phases of each program, in order.
+    PHASES = ('lex', 'compile', 'run', 'transpile', 'native')
+    
+    @staticmethod
+    # Shortest time of the function over the repeats, and its last result.
+    def measure(function, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        return best, result
+    
+    @staticmethod
+    # Read all the tokens of the text, so that compiling is timed without lexing.
+    def lex(text):
+        lexer = Lexer(text)
+        tokens = []
+        while True:
+            token = lexer.getNextToken()
+            tokens.append(token)
+            if token._type == 'EOF':
+                return tokens
+    
+    @staticmethod
+    # Time each phase of a program. The output is kept in memory with no limit on the digits.
+    def time(text, repeat):
+        timings = {}
+        timings['lex'], tokens = Benchmark.measure(lambda: Benchmark.lex(text), repeat)
+        timings['compile'], program = Benchmark.measure(lambda: Compiler(ReplayLexer(tokens), Tokens()).compile(), repeat)
+        timings['run'], output = Benchmark.measure(lambda: Benchmark.execute(VirtualMachine, program), repeat)
+        timings['transpile'], native = Benchmark.measure(lambda: Transpiler(program).transpile(), repeat)
+        program.native = native
+        timings['native'], nativeOutput = Benchmark.measure(lambda: Benchmark.execute(NativeMachine, program), repeat)
+        if nativeOutput != output:
+            raise AssertionError('the native output differs from the virtual machine output')
+        return timings
+    
+    @staticmethod
+    def execute(machine, program):
+        output = MemoryOutput()
+        machine(program, Variables(), output, Formatter(0)).run()
+        return output.getValue()
+    
+    @staticmethod
+    # Time the workloads at each of their sizes multiplied by the scale.
+    def run(names, scale, repeat, seed):
+        results = []
+        for name in names:
+            generator, sizes = WORKLOADS[name]
+            for size in sizes:
+                size = max(1, int(size * scale))
+                text = generator(size, seed)
+                timings = Benchmark.time(text, repeat)
+                results.append(dict(workload = name, size = size, **timings))
+                print('%-20s %8d  %s' % (name, size, '  '.join('%s %.4fs' % (phase, timings[phase]) \
+                                                                for phase in Benchmark.PHASES)), file = sys.stderr)
+        return {
+            'python': platform.python_version(),
+            'interpreter': Constants.VERSION,
+            'scale': scale,
+            'repeat': repeat,
+            'seed': seed,
+            'results': results,
+        }
+    
+    @staticmethod
+    # Compare the timings with the baseline, phase by phase for the same workload and size.
+    # A timing is a regression if it is slower by more than the threshold, as a fraction of the baseline.
+    # Timings shorter than minimum seconds on both sides are too noisy and ignored.
+    # Return the regressions as (workload, size, phase, baseline, timing).
+    def compare(report, baseline, threshold, minimum):
+        baselines = { (result['workload'], result['size']): result for result in baseline['results'] }
+        regressions = []
+        for result in report['results']:
+            previous = baselines.get((result['workload'], result['size']))
+            if previous is None:
+                continue
+            for phase in Benchmark.PHASES:
+                if phase not in previous or max(result[phase], previous[phase]) < minimum:
+                    continue
+                if result[phase] > previous[phase] * (1 + threshold):
+                    regressions.append((result['workload'], result['size'], phase, previous[phase], result[phase]))
+        return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the INTERPOL interpreter on synthetic programs.')
+    parser.add_argument('-w', '--workload', action = 'append', choices = sorted(WORKLOADS), \
+                        help = 'workload to run, all of them by default')
+    parser.add_argument('--scale', type = float, default = 1.0, \
+                        help = 'multiply the sizes of the programs')
+    parser.add_argument('--repeat', type = int, default = 3, \
+                        help = 'number of times each phase is timed, the shortest time is kept')
+    parser.add_argument('--seed', type = int, default = 0, \
+                        help = 'seed of the generated programs')
+    parser.add_argument('-o', '--output', \
+                        help = 'write the timings to this JSON file instead of the standard output')
+    parser.add_argument('-b', '--baseline', \
+                        help = 'JSON file of earlier timings to compare with')
+    parser.add_argument('--threshold', type = float, default = 0.1, \
+                        help = 'slowdown reported as a regression, as a fraction of the baseline')
+    parser.add_argument('--min-time', type = float, default = 0.001, \
+                        help = 'timings below this number of seconds are not compared')
+    options = parser.parse_args()
+    
+    report = Benchmark.run(options.workload or list(WORKLOADS), options.scale, options.repeat, options.seed)
+    if options.output is not None:
+        with open(options.output, 'w') as outputFile:
+            json.dump(report, outputFile, indent = 2)
+    else:
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    
+    if options.baseline is not None:
+        with open(options.baseline, 'r') as baselineFile:
+            regressions = Benchmark.compare(report, json.load(baselineFile), options.threshold, options.min_time)
+        for workload, size, phase, previous, current in regressions:
+            print('REGRESSION %s %d %s: %.4fs -> %.4fs (%+.0f%%)' % \
+                  (workload, size, phase, previous, current, (current / previous - 1) * 100), file = sys.stderr)
+        print('%d regressions above %.0f%%' % (len(regressions), options.threshold * 100), file = sys.stderr)
+        sys.exit(1 if regressions else 0)
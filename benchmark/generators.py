@@ -0,0 +1,94 @@
+# Generators of synthetic INTERPOL programs whose cost grows with their size.
+# The programs only depend on the size and the seed, never read an input and never fail.
+
+import random
+
+# Printable characters of the string literals, without the double quote.
+CHARACTERS = ''.join(chr(code) for code in range(32, 127) if chr(code) != '"')
+
+class Generator:
+    @staticmethod
+    # Long program of simple statements on a few variables, size statements.
+    def straightLine(size, seed = 0):
+        generator = random.Random(seed)
+        lines = ['BEGIN', 'VARINT a WITH 1', 'VARINT b WITH 2', 'VARINT c WITH 3']
+        for i in range(size):
+            kind = i % 4
+            if kind == 0:
+                lines.append('STORE MOD ADD MUL a %d b 1000003 IN a' % generator.randint(2, 99))
+            elif kind == 1:
+                lines.append('STORE MOD SUB MUL b c %d 1000033 IN b' % generator.randint(1, 99))
+            elif kind == 2:
+                lines.append('STORE ADD DIV a %d MEAN b c a IN c' % generator.randint(1, 9))
+            else:
+                lines.append('PRINTLN ADD a SUB b c')
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    # Prefix expressions nested size levels deep.
+    def nestedExpression(size, seed = 0):
+        generator = random.Random(seed)
+        lines = ['BEGIN', 'VARINT a WITH 5', 'VARINT b WITH 3']
+        for i in range(10):
+            operators = [generator.choice(('ADD a', 'SUB b', 'ADD b', 'SUB a')) for _ in range(size)]
+            lines.append('PRINTLN ' + ' '.join(operators) + ' %d' % i)
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    # MEAN of size operands.
+    def wideMean(size, seed = 0):
+        generator = random.Random(seed)
+        lines = ['BEGIN', 'VARINT a WITH 5', 'VARINT b WITH 3']
+        for i in range(10):
+            operands = [generator.choice(('a', 'b', str(generator.randint(-99, 99)))) for _ in range(size)]
+            lines.append('PRINTLN MEAN ' + ' '.join(operands))
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    # Symbols table of size variables, each one updated from two others.
+    def manyVariables(size, seed = 0):
+        generator = random.Random(seed)
+        lines = ['BEGIN']
+        for i in range(size):
+            lines.append('VARINT v%d WITH %d' % (i, i))
+        for i in range(size):
+            lines.append('STORE ADD v%d v%d IN v%d' % (generator.randrange(size), generator.randrange(size), i))
+        for i in range(0, size, 10):
+            lines.append('PRINTLN v%d' % i)
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    # String literals of size characters.
+    def hugeStrings(size, seed = 0):
+        generator = random.Random(seed)
+        lines = ['BEGIN']
+        for i in range(10):
+            text = ''.join(generator.choice(CHARACTERS) for _ in range(size))
+            lines.append('VARSTR s%d WITH "%s"' % (i, text))
+            lines.append('PRINTLN s%d' % i)
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    # Chain of powers whose results have about size digits, then thousands of times more.
+    def bigRaise(size, seed = 0):
+        lines = ['BEGIN', 'VARINT x WITH RAISE 10 %d' % size, 'VARINT y WITH RAISE x 3', 'VARINT z WITH MUL y y']
+        for i in range(10):
+            lines.append('STORE ADD RAISE x 2 z IN z')
+            lines.append('PRINTLN MOD ADD z %d 1000000007' % i)
+        lines.append('END')
+        return '\n'.join(lines) + '\n'
+
+# Name and generator of each workload, with its default sizes.
+WORKLOADS = {
+    'straight-line': (Generator.straightLine, (1000, 10000)),
+    'nested-expression': (Generator.nestedExpression, (100, 1000)),
+    'wide-mean': (Generator.wideMean, (1000, 10000)),
+    'many-variables': (Generator.manyVariables, (100, 1000)),
+    'huge-strings': (Generator.hugeStrings, (10000, 100000)),
+    'big-raise': (Generator.bigRaise, (1000, 10000)),
+}
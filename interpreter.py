@@ -1,11 +1,64 @@
 # Mary Ellery Queen Oliveros. 2021 December.
 
+import argparse
+import array
+import bisect
+import codecs
+import csv
+import decimal
+import hashlib
+import io
+import itertools
+import json
+import locale
+import marshal
 import math
+import mmap
+import multiprocessing
+import multiprocessing.connection
+import operator
 import os
+import re
+import sys
+import tempfile
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class Constants:
+    VERSION = '1.5.0'
     FILE_EXTENSION = '.ipol'
-    
+    CACHE_EXTENSION = '.ipolc'
+    CACHE_DIRECTORY = '__ipolcache__'
+    # Format of the instructions and native translations written to the cache, increased whenever either changes
+    # e.g., the arguments of the function generated by Transpiler, so that the programs cached before are compiled again.
+    CACHE_FORMAT = 3
+    # Set this environment variable to run without reading or writing the cache.
+    NO_CACHE_ENV = 'INTERPOL_NO_CACHE'
+    # Set this environment variable to classic to use the character by character lexer.
+    LEXER_ENV = 'INTERPOL_LEXER'
+    # Size in bytes of the chunks read by the streaming lexer.
+    CHUNK_SIZE = 1 << 20
+    # Number of characters of the chunks lexed by each process of the parallel lexer.
+    LEX_CHUNK_SIZE = 1 << 20
+    # Number of statements ahead of the one executing that may be evaluated by the processes of ParallelMachine.
+    PARALLEL_STATEMENTS = 64
+    # Largest number of bytes of the values kept by the expression cache.
+    MEMO_BYTES = 1 << 26
+    # Number of characters of output kept before writing them.
+    OUTPUT_BUFFER_SIZE = 1 << 16
+    # Extension of the file written next to the program by the profiler.
+    PROFILE_EXTENSION = '.profile.json'
+    # Number of source lines displayed by the profiler, the slowest first.
+    PROFILE_LINES = 20
+    # Number of compiled programs kept in memory by Engine.
+    ENGINE_PROGRAMS = 256
+    # Number of seconds between two checks of the file watched for changes.
+    WATCH_INTERVAL = 0.5
+
 # For reserved keywords and its equivalent tokens.
 class Keyword:
     ID = 'IDENTIFIER'
@@ -66,10 +119,109 @@ class Keyword:
         { 'lexeme': AND, 'token': 'DISTANCE_SEPARATOR' },
     ]
     
+    # Keyword dictionaries indexed by reserved keyword.
+    lexemes = { keyword['lexeme']: keyword for keyword in keywords }
+    
     @staticmethod
     # Retrieve the keyword dictionary based on reserved keyword.
     def get(lexeme):
-        return next((keyword for keyword in Keyword.keywords if keyword['lexeme'] == lexeme), None)
+        return Keyword.lexemes.get(lexeme)
+
+# For the instructions of the compiled program.
+class Opcode:
+    CONTEXT = 0
+    PUSH = 1
+    LOAD = 2
+    ADD = 3
+    SUB = 4
+    MUL = 5
+    DIV = 6
+    MOD = 7
+    RAISE = 8
+    ROOT = 9
+    MEAN = 10
+    DIST = 11
+    DROP = 12
+    DEFINE = 13
+    STORE = 14
+    INPUT = 15
+    PRINT = 16
+    PRINT_VAR = 17
+    ERROR = 18
+    SAVE = 19
+    RESTORE = 20
+    RAISE_MOD = 21
+    # Replace the arg[1] values on top of the stack by the result of the function arg[0] called with them, in order.
+    # Never compiled, see MemoizedMachine.
+    CALL = 22
+    
+    # Equivalent opcodes of the operators with 2 operands.
+    operators = {
+        Keyword.ADD: ADD,
+        Keyword.SUB: SUB,
+        Keyword.MUL: MUL,
+        Keyword.DIV: DIV,
+        Keyword.MOD: MOD,
+        Keyword.RAISE: RAISE,
+        Keyword.ROOT: ROOT,
+    }
+    
+    # Operations with 2 operands, the first operand being the top of the stack.
+    functions = {
+        ADD: lambda operand1, operand2: operand1 + operand2,
+        SUB: lambda operand1, operand2: operand1 - operand2,
+        MUL: lambda operand1, operand2: operand1 * operand2,
+        DIV: lambda operand1, operand2: operand1 // operand2,
+        MOD: lambda operand1, operand2: operand1 % operand2,
+        RAISE: lambda operand1, operand2: int(operand1 ** operand2),
+        ROOT: lambda operand1, operand2: Arithmetic.root(operand1, operand2),
+    }
+
+# Exact integer operations, without going through floats.
+class Arithmetic:
+    @staticmethod
+    # Nth root of a number rounded toward zero, as int(number ** (1 / n)) but exact for any integer.
+    def root(n, number):
+        if n == 0:
+            raise ZeroDivisionError('zeroth root')
+        if n == 1:
+            return number
+        # The root of a negative number is complex.
+        if number < 0 and n != -1:
+            raise ValueError('root of a negative number')
+        if n < 0:
+            # The inverse of the root is below 1, except for 1 and -1.
+            if number == 0:
+                raise ZeroDivisionError('negative root of zero')
+            return number if abs(number) == 1 else 0
+        if n == 2:
+            return math.isqrt(number)
+        if number < 2:
+            return number
+        if n >= number.bit_length():
+            return 1
+        
+        # Newton's iteration from a power of 2 above the root, decreasing down to the root.
+        root = 1 << -(-number.bit_length() // n)
+        while True:
+            nextRoot = ((n - 1) * root + number // root ** (n - 1)) // n
+            if nextRoot >= root:
+                return root
+            root = nextRoot
+    
+    @staticmethod
+    # Distance between two points rounded toward zero.
+    def distance(x1, y1, x2, y2):
+        return math.isqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+    
+    @staticmethod
+    # Same as int(base ** exponent) % modulus, without computing the power for a positive exponent.
+    def raiseMod(base, exponent, modulus):
+        if exponent < 0:
+            return int(base ** exponent) % modulus
+        if modulus == 0:
+            raise ZeroDivisionError('integer modulo by zero')
+        return pow(base, exponent, modulus)
 
 # For generic syntax error.
 class Error(Exception):
@@ -86,6 +238,7 @@ class Error(Exception):
     FILE_NOT_EXISTS = 'FILE_NOT_EXISTS'
     INVALID_FILE = 'INVALID_FILE'
     GENERAL_ERROR = 'GENERAL_ERROR'
+    DIGIT_LIMIT = 'DIGIT_LIMIT'
     
     errors = [
         { 'code': INVALID_SYNTAX, 'message': 'Invalid syntax at line number [ %d ]\n ----> %s' },
@@ -101,10 +254,13 @@ class Error(Exception):
         { 'code': FILE_NOT_EXISTS, 'message': 'File not found' },
         { 'code': INVALID_FILE, 'message': 'Invalid file' },
         { 'code': GENERAL_ERROR, 'message': 'Encountered general error' },
+        { 'code': DIGIT_LIMIT, 'message': 'Integer with more than %d digits printed at line number [ %d ]\n ----> %s\n' \
+                                          'Run with --max-digits to change the limit, 0 for no limit' },
     ]
     
     def __init__(self, code, args = tuple()):
         self.code = code
+        self.details = args
         error = next((err for err in self.errors if err['code'] == code), None)
         if error is not None:
             # Additional handling for invalid syntax to display the line number and syntax with error.
@@ -113,7 +269,7 @@ class Error(Exception):
             else:
                 self.message = error['message']
             super().__init__(self.message)
-            
+    
     # For string representation of error message.
     def __str__(self):
         return self.message
@@ -124,11 +280,11 @@ class Error(Exception):
         error = next((err for err in Error.errors if err['code'] == code), None)
         if error is not None:
             return error['message']
-    
+
 # To segregate the IO error when reading the file from the actual syntax error.
 class IOException(Error):
     pass
-    
+
 # For the messages.
 class Message:
     messages = {
@@ -146,28 +302,331 @@ class Message:
         'SYMBOL_HEADER_2': 'TYPE',
         'SYMBOL_HEADER_3': 'VALUE',
         'TERMINATED': '\n======== INTERPOL INTERPRETER TERMINATED ========',
+        'PROFILE_TITLE': '\n================ INTERPOL PROFILE ================\n',
+        'PROFILE_PHASES': 'lex %.6fs, parse %.6fs, eval %.6fs, input %.6fs',
+        'PROFILE_LINES': '\nSlowest %d of %d lines:',
+        'PROFILE_KINDS': '\nStatement kinds:',
+        'PROFILE_SAVED': '\nProfile written to %s',
+        'WATCH_STATUS': '\nLexed %d of %d lines, reused %d of %d statements in %.3fs',
+        'WATCH_WAITING': 'Watching %s for changes, press Ctrl-C to stop.',
+        'DEAD_STORES_TITLE': '\n============== INTERPOL DEAD STORES ==============\n',
+        'DEAD_STORES_REMOVED': 'Removed %d values, %d of %d instructions left\n',
+        'DEAD_STORES_HEADER': 'STATEMENT',
+        'MEMO_TITLE': '\n=========== INTERPOL EXPRESSION CACHE ============\n',
+        'MEMO_STATS': '%d hits, %d misses, %d evictions, %d values kept in %d bytes',
     }
     
     @staticmethod
     # Retrieve the actual message based on the message code.
     def get(code):
         return Message.messages[code]
-    
+
 # Utility to retrieve the file content.
 class File:
     @staticmethod
-    def getFileContent():
+    # Ask for the file name and check if it can be interpreted.
+    def getFileName():
         file = input(Message.get('FILE_PROMPT') % Constants.FILE_EXTENSION)
+        File.check(file)
+        return file
+    
+    @staticmethod
+    # Check if the file can be interpreted.
+    def check(file):
         if not file.endswith(Constants.FILE_EXTENSION):
             raise IOException(Error.INVALID_FILE)
         if not os.path.exists(file):
             raise IOException(Error.FILE_NOT_EXISTS)
         if os.path.getsize(file) == 0:
             raise IOException(Error.EMPTY_FILE)
-        return open(file, 'r').read()
+    
+    @staticmethod
+    def getFileContent(file = None):
+        if file is None:
+            file = File.getFileName()
+        with open(file, 'r') as source:
+            return source.read()
+    
+    @staticmethod
+    # Read the file content in chunks of about chunkSize bytes, each ending with a line break except the last one.
+    # The file is memory-mapped if possible, otherwise it is read through a buffer.
+    # The content is decoded and its line breaks translated the same way as getFileContent.
+    def readChunks(file, chunkSize = Constants.CHUNK_SIZE):
+        decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+        with open(file, 'rb') as source:
+            try:
+                data = mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                data = None
+            
+            if data is not None:
+                with data:
+                    start = 0
+                    while start < len(data):
+                        end = data.find(b'\n', start + chunkSize - 1)
+                        end = len(data) if end == -1 else end + 1
+                        yield File.decode(decoder, data[start:end], end == len(data))
+                        start = end
+            else:
+                while True:
+                    chunk = source.read(chunkSize)
+                    if not chunk:
+                        break
+                    if not chunk.endswith(b'\n'):
+                        chunk += source.readline()
+                    yield File.decode(decoder, chunk, False)
+                rest = File.decode(decoder, b'', True)
+                if rest:
+                    yield rest
+    
+    @staticmethod
+    # Decode a chunk and translate its line breaks. Chunks never end between a \r and a \n.
+    def decode(decoder, chunk, final):
+        text = decoder.decode(chunk, final)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    @staticmethod
+    # Check if the file content is longer than one character and ends with a line break, without reading it all.
+    def endsWithLineBreak(file):
+        with open(file, 'rb') as source:
+            size = source.seek(0, os.SEEK_END)
+            source.seek(max(size - 2, 0))
+            end = source.read()
+        return size > 1 and end[-1:] in (b'\n', b'\r') and not (size == 2 and end == b'\r\n')
+
+# Utility to keep the compiled program on disk, similar to __pycache__.
+# The cache file of <dir>/<name>.ipol is <dir>/__ipolcache__/<name>.ipolc and it contains
+# the key of the source it was compiled from, so a changed source is simply compiled again.
+class Cache:
+    @staticmethod
+    def isEnabled():
+        return not os.environ.get(Constants.NO_CACHE_ENV)
+    
+    @staticmethod
+    # The key is the hash of the source, the interpreter version and the format of the cache.
+    def getKey(text):
+        header = '%s\n%d\n' % (Constants.VERSION, Constants.CACHE_FORMAT)
+        return hashlib.sha256((header + text).encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    @staticmethod
+    def getPath(file):
+        name = os.path.splitext(os.path.basename(file))[0] + Constants.CACHE_EXTENSION
+        return os.path.join(os.path.dirname(file), Constants.CACHE_DIRECTORY, name)
+    
+    @staticmethod
+    # Retrieve the compiled program with a single read, see Program.deserialize for the tokens.
+    # Return None if there is no usable cache for this key.
+    def load(file, key, tokens = None):
+        if not Cache.isEnabled():
+            return None
+        try:
+            with open(Cache.getPath(file), 'rb') as cacheFile:
+                version, cacheKey, data = marshal.loads(cacheFile.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != Constants.VERSION or cacheKey != key:
+            return None
+        return Program.deserialize(data, tokens)
+    
+    @staticmethod
+    # Write the compiled program to a temporary file then rename it, so concurrent
+    # writers never leave a partial file behind. Failure to write is not an error.
+    def save(file, key, program):
+        if not Cache.isEnabled():
+            return
+        path = Cache.getPath(file)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            fd, tempPath = tempfile.mkstemp(dir = os.path.dirname(path), suffix = '.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as cacheFile:
+                    cacheFile.write(marshal.dumps((Constants.VERSION, key, program.serialize())))
+                os.replace(tempPath, path)
+            except BaseException:
+                os.unlink(tempPath)
+                raise
+        except (OSError, ValueError):
+            pass
+
+# Output of the program written to a text stream, the standard output by default, through a buffer.
+# The buffer is written once it holds size characters or when flushed. A size of 0 writes each output right away.
+class BufferedOutput:
+    def __init__(self, stream = None, size = Constants.OUTPUT_BUFFER_SIZE):
+        self.stream = sys.stdout if stream is None else stream
+        self.size = size
+        self.parts = []
+        self.length = 0
+    
+    def write(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+    
+    # Retrieve the buffered output and empty the buffer.
+    def take(self):
+        text = ''.join(self.parts)
+        self.parts = []
+        self.length = 0
+        return text
+    
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.take())
+        self.stream.flush()
+
+# Output of the program written to a binary file descriptor through a buffer, bypassing the text streams.
+class DescriptorOutput(BufferedOutput):
+    def __init__(self, fd, size = Constants.OUTPUT_BUFFER_SIZE, encoding = 'utf-8'):
+        BufferedOutput.__init__(self, None, size)
+        self.fd = fd
+        self.encoding = encoding
+    
+    def flush(self):
+        if self.parts:
+            data = memoryview(self.take().encode(self.encoding))
+            while data:
+                data = data[os.write(self.fd, data):]
+
+# Output of the program kept in memory instead of being written.
+class MemoryOutput:
+    def __init__(self):
+        self.parts = []
+    
+    def write(self, text):
+        self.parts.append(text)
+    
+    def flush(self):
+        pass
+    
+    def getValue(self):
+        return ''.join(self.parts)
+
+# Output kept in memory as well as written to the given output.
+class RecordedOutput(MemoryOutput):
+    def __init__(self, output):
+        MemoryOutput.__init__(self)
+        self.output = output
+    
+    def write(self, text):
+        self.parts.append(text)
+        self.output.write(text)
+    
+    def flush(self):
+        self.output.flush()
+
+# Integer with more digits than the limit of the formatter, see Formatter.
+class DigitLimitError(ValueError):
+    pass
+
+# Conversion of the printed values to text.
+# A large integer is split on powers of 2 and its parts joined back with decimal arithmetic,
+# which is subquadratic unlike str(), then written by parts of its digits, so that its whole text is never built.
+# An integer with more digits than the limit fails with DigitLimitError, turned into an Error with the line number
+# by the machines. The limit is the one of Python by default, 0 for no limit.
+class Formatter:
+    # Integers up to this number of bits are converted by str(), well below the limit of Python.
+    LARGE_BITS = 1 << 13
+    # Integers are split down to parts of this number of bits.
+    PART_BITS = 128
+    # Largest number of digits of each part written for a large integer.
+    CHUNK_DIGITS = 1 << 16
+    
+    def __init__(self, maxDigits = None):
+        if maxDigits is None:
+            maxDigits = sys.get_int_max_str_digits() if hasattr(sys, 'get_int_max_str_digits') else 0
+        self.maxDigits = maxDigits
+        # Integers with more bits are converted as large integers, checking their number of digits.
+        self.largeBits = Formatter.LARGE_BITS
+        if maxDigits > 0:
+            self.largeBits = min(self.largeBits, int((maxDigits - 1) / math.log10(2)))
+    
+    def format(self, value):
+        if type(value) is int and value.bit_length() > self.largeBits:
+            return self.formatInteger(value)
+        return str(value)
+    
+    # Write the value followed by end.
+    def write(self, write, value, end):
+        if type(value) is int and value.bit_length() > self.largeBits:
+            self.writeInteger(write, value)
+            write(end)
+        else:
+            write(str(value) + end)
+    
+    # Convert a large integer, failing if it has more digits than the limit.
+    def formatInteger(self, value):
+        parts = []
+        self.writeInteger(parts.append, value)
+        return ''.join(parts)
+    
+    # Write a large integer by parts of at most CHUNK_DIGITS digits.
+    # Nothing is written if it has more digits than the limit.
+    def writeInteger(self, write, value):
+        # The integer has at least this number of digits, do not convert it if already too many.
+        if self.maxDigits > 0 and int((value.bit_length() - 1) * math.log10(2)) >= self.maxDigits:
+            raise DigitLimitError('Exceeds the limit (%d digits) for integer string conversion' % self.maxDigits)
+        
+        with decimal.localcontext() as context:
+            context.prec = decimal.MAX_PREC
+            context.Emax = decimal.MAX_EMAX
+            context.Emin = decimal.MIN_EMIN
+            context.traps[decimal.Inexact] = True
+            result = Formatter.toDecimal(abs(value), abs(value).bit_length(), {})
+            digits = result.adjusted() + 1
+            if self.maxDigits > 0 and digits > self.maxDigits:
+                raise DigitLimitError('Exceeds the limit (%d digits) for integer string conversion' % self.maxDigits)
+            if value < 0:
+                write('-')
+            Formatter.writeDigits(write, result, digits)
+    
+    @staticmethod
+    # Write the given number of digits of a non-negative integral Decimal, with leading zeros if needed:
+    # high * 10 ** half + low, the high digits first.
+    def writeDigits(write, value, digits):
+        if digits <= Formatter.CHUNK_DIGITS:
+            write(str(value).zfill(digits))
+            return
+        half = digits >> 1
+        high = value.scaleb(-half).to_integral_value(rounding = decimal.ROUND_FLOOR)
+        low = value - high.scaleb(half)
+        del value
+        Formatter.writeDigits(write, high, digits - half)
+        del high
+        Formatter.writeDigits(write, low, half)
+    
+    @staticmethod
+    # Decimal of a positive integer of the given number of bits: high * 2 ** half + low.
+    def toDecimal(value, bits, powers):
+        if bits <= Formatter.PART_BITS:
+            return decimal.Decimal(value)
+        half = bits >> 1
+        high = value >> half
+        low = value - (high << half)
+        return Formatter.toDecimal(low, half, powers) + \
+               Formatter.toDecimal(high, bits - half, powers) * Formatter.getPower(half, powers)
+    
+    @staticmethod
+    # Decimal of 2 ** bits, keeping the powers already computed.
+    def getPower(bits, powers):
+        power = powers.get(bits)
+        if power is None:
+            if bits <= Formatter.PART_BITS:
+                power = decimal.Decimal(2) ** bits
+            elif bits - 1 in powers:
+                power = powers[bits - 1] * 2
+            else:
+                half = bits >> 1
+                power = Formatter.getPower(half, powers) * Formatter.getPower(bits - half, powers)
+            powers[bits] = power
+        return power
 
 # Holder for token/lexeme.
 class Token:
+    __slots__ = ('lineNo', '_type', 'token', 'lexeme')
+    
     def __init__(self, linoNo, _type, token, lexeme):
         self.lineNo = linoNo
         self._type = _type
@@ -176,19 +635,71 @@ class Token:
     
     def __repr__(self):
         return repr((self.lineNo, self.token, self.lexeme))
-        
+
 # Holder for the token/lexeme table.
+# The tokens are kept in parallel arrays rather than as Token objects: the line numbers, the code of the type
+# of each token and the lexemes, the names of the variables being shared by all their tokens.
 class Tokens:
     def __init__(self):
-        self.tokens = []
+        self.lineNos = array.array('q')
+        self.codes = array.array('B')
+        self.lexemes = []
+        # Type and token name of each code, the token name being the same for all the tokens of a type.
+        self.kinds = []
+        self.kindCodes = {}
     
     def define(self, token):
-        self.tokens.append(token)
-        
+        self.add(token.lineNo, token._type, token.token, token.lexeme)
+    
+    # Same as define, without a Token.
+    # Tokens are defined in order of line number, so the tokens of a line are next to each other.
+    def add(self, lineNo, _type, token, lexeme):
+        code = self.kindCodes.get(_type)
+        if code is None:
+            code = self.kindCodes[_type] = len(self.kinds)
+            self.kinds.append((_type, token))
+        if _type == Keyword.ID:
+            lexeme = sys.intern(lexeme)
+        self.lineNos.append(lineNo)
+        self.codes.append(code)
+        self.lexemes.append(lexeme)
+    
+    # Number of tokens defined so far.
+    def count(self):
+        return len(self.lineNos)
+    
+    # Retrieve the tokens of the table as (line number, type, token name, lexeme), from start to end.
+    def getRows(self, start = 0, end = None):
+        if end is None:
+            end = len(self.lineNos)
+        kinds = self.kinds
+        for i in range(start, end):
+            _type, token = kinds[self.codes[i]]
+            yield (self.lineNos[i], _type, token, self.lexemes[i])
+    
     # Retrieve all the tokens based on the line number.
-    def lookup(self, lineNo):
-        return list(filter(lambda item: item.lineNo == lineNo and item.lexeme != Keyword.EOS, self.tokens))
-        
+    # If end is given, only the first end tokens of the table are considered.
+    def lookup(self, lineNo, end = None):
+        tokens = []
+        start = bisect.bisect_left(self.lineNos, lineNo)
+        for row in self.getRows(start, len(self.lineNos) if end is None else max(start, end)):
+            if row[0] != lineNo:
+                break
+            if row[3] != Keyword.EOS:
+                tokens.append(Token(*row))
+        return tokens
+    
+    @staticmethod
+    # Format the tokens back to the syntax displayed on error.
+    def format(tokens):
+        lexemes = ''
+        for item in tokens:
+            if item._type == Keyword.STRING:
+                lexemes += '"' + item.lexeme + '" '
+            else:
+                lexemes += str(item.lexeme) + ' '
+        return lexemes
+    
     # Display the content of token/lexeme table in the following format:
     #  LINE NO. <padding> TOKENS <padding> LEXEMES
     def display(self):
@@ -199,10 +710,68 @@ class Tokens:
         print(Message.get('TOKEN_HEADER_1').ljust(col1Padding), \
               Message.get('TOKEN_HEADER_2').ljust(col2Padding), \
               Message.get('TOKEN_HEADER_3'))
-        for item in self.tokens:
-            print(str(item.lineNo).ljust(col1Padding), \
-                  item.token.ljust(col2Padding), \
-                  item.lexeme)
+        for lineNo, _type, token, lexeme in self.getRows():
+            print(str(lineNo).ljust(col1Padding), \
+                  token.ljust(col2Padding), \
+                  lexeme)
+
+# Holder for the tokens of the latest lines only, when the token/lexeme table is not needed.
+# These are enough to format the errors of the statement being compiled and executed.
+class RecentTokens(Tokens):
+    def __init__(self):
+        Tokens.__init__(self)
+        # Number of tokens dropped from the start of the table.
+        self.dropped = 0
+    
+    def add(self, lineNo, _type, token, lexeme):
+        if self.lineNos and lineNo != self.lineNos[-1]:
+            # Keep the tokens of the latest line before the new line starts.
+            start = bisect.bisect_left(self.lineNos, self.lineNos[-1])
+            del self.lineNos[:start]
+            del self.codes[:start]
+            del self.lexemes[:start]
+            self.dropped += start
+        Tokens.add(self, lineNo, _type, token, lexeme)
+    
+    def count(self):
+        return self.dropped + len(self.lineNos)
+    
+    # The end is counted from the start of the whole table.
+    def lookup(self, lineNo, end = None):
+        if end is not None:
+            end = max(end - self.dropped, 0)
+        return Tokens.lookup(self, lineNo, end)
+
+# Holder counting the tokens only, when the token/lexeme table is not needed and the whole program is compiled
+# before being executed. The tokens of a line are only needed to format an error: the source is lexed again
+# up to the tokens defined at the time of the error.
+class SourceTokens(Tokens):
+    def __init__(self, text):
+        Tokens.__init__(self)
+        self.text = text
+        self.size = 0
+    
+    def add(self, lineNo, _type, token, lexeme):
+        self.size += 1
+    
+    def count(self):
+        return self.size
+    
+    # The rows are read by lexing the source again e.g., to write the program to the cache.
+    def getRows(self, start = 0, end = None):
+        end = self.size if end is None else min(end, self.size)
+        lexer = Lexer.create(self.text)
+        # Same line numbers as Compiler.consume.
+        for i in range(end):
+            item = lexer.getNextToken()
+            if i >= start:
+                yield (lexer.lineNo + 1 if item._type == Keyword.EOF else lexer.lineNo, item._type, item.token, item.lexeme)
+    
+    def lookup(self, lineNo, end = None):
+        tokens = Tokens()
+        for row in self.getRows(0, end):
+            tokens.add(*row)
+        return tokens.lookup(lineNo)
 
 # Holder for the symbols.        
 class Variable:
@@ -218,27 +787,37 @@ class Variable:
         return repr((self.name, self._type, self.value))
 
 # Holder for the symbols table.   
+# The position of a variable in the table is its slot number.
 class Variables:
     def __init__(self):
         self.variables = []
+        # Slot number of each variable name.
+        self.slots = {}
     
     # Use to define a variable i.e., for VARINT and VARSTR.
+    # Return the slot number of the variable.
     def define(self, variable):
+        self.slots[variable.name] = len(self.variables)
         self.variables.append(variable)
-        
+        return self.slots[variable.name]
+    
     # Use to update the variable value i.e., for STORE.
     def update(self, name, value):
-        for item in self.variables:
-            if getattr(item, 'name', None) == name:
-                setattr(item, 'value', value)
-        
+        slot = self.slots.get(name)
+        if slot is not None:
+            self.variables[slot].value = value
+    
     # Retrieve the variable based on variable name.
     def lookup(self, name):
-        return next((item for item in self.variables if item.name == name), None)
-        
+        slot = self.slots.get(name)
+        if slot is not None:
+            return self.variables[slot]
+    
     # Display the content of symbol table in the following format:
     #  VARIABLE NAME <padding> TYPE <padding> VALUE
-    def display(self):
+    def display(self, formatter = None):
+        if formatter is None:
+            formatter = Formatter()
         col1Padding = 20
         col2Padding = 15
         
@@ -249,9 +828,321 @@ class Variables:
         for item in self.variables:
             print(item.name.ljust(col1Padding), \
                   item.displayType.ljust(col2Padding), \
-                  item.value)
+                  formatter.format(item.value))
+
+# Holder for the compiled program i.e., the instructions and the token/lexeme table.
+class Program:
+    def __init__(self, code, tokens):
+        self.code = code
+        self.tokens = tokens
+        # Translation by Transpiler, once needed.
+        self.native = None
+    
+    # Rebuild the line number and syntax for an error raised while executing.
+    # The context is recorded by the compiler as (line number, tokens consumed, pending syntax).
+    def getErrorArgs(self, context):
+        lineNo, end, pending = context
+        return (lineNo, Tokens.format(self.tokens.lookup(lineNo, end)) + pending)
+    
+    # Retrieve the translation of the program by Transpiler.
+    def getNative(self):
+        if self.native is None:
+            self.native = Transpiler(self).transpile()
+        return self.native
+    
+    # Convert to plain values that can be written to the cache.
+    # The translation is only valid for the same version of Python.
+    def serialize(self):
+        native = (sys.implementation.cache_tag, self.native) if self.native is not None else None
+        return (self.code, list(self.tokens.getRows()), native)
+    
+    @staticmethod
+    # Rebuild the program from the plain values of the cache.
+    # With tokens e.g., SourceTokens, the rows of the table are added to them instead.
+    def deserialize(data, tokens = None):
+        code, rows, native = data
+        if tokens is None:
+            tokens = Tokens()
+        for row in rows:
+            tokens.add(*row)
+        program = Program(code, tokens)
+        if native is not None and native[0] == sys.implementation.cache_tag:
+            program.native = native[1]
+        return program
+    
+    @staticmethod
+    # Compile the program of the text, see fromFile.
+    # With processes, the text is lexed by ParallelLexer on that many processes, 0 for the number of CPUs.
+    def compileText(text, eliminator = None, table = True, processes = None):
+        lexer = Lexer.create(text) if processes is None else ParallelLexer.create(text, processes or None)
+        try:
+            return Compiler(lexer, Tokens() if table else SourceTokens(text)).compile(eliminator)
+        finally:
+            if isinstance(lexer, ParallelLexer):
+                lexer.close()
+    
+    @staticmethod
+    # Compile the program of the file, or reuse it if the source was already seen.
+    # With native, the program is also translated by Transpiler.
+    # With an eliminator, the program is always compiled again so that it reports what it removed.
+    # Without the table, the token/lexeme table is not kept, see SourceTokens, and the table of the cache is only counted.
+    def fromFile(file, native = False, eliminator = None, table = True, processes = None):
+        text = File.getFileContent(file)
+        if eliminator is not None:
+            program = Program.compileText(text, eliminator, table, processes)
+            if native:
+                program.getNative()
+            return program
+        key = Cache.getKey(text)
+        program = Cache.load(file, key, None if table else SourceTokens(text))
+        if program is None:
+            program = Program.compileText(text, table = table, processes = processes)
+            if native:
+                program.getNative()
+            Cache.save(file, key, program)
+        elif native and program.native is None:
+            program.getNative()
+            Cache.save(file, key, program)
+        return program
+
+# Export of the token/lexeme and symbols tables to be read by other programs, as JSON Lines, CSV or a compact binary format.
+# Each row is written as it is read from the table, through a buffer of about size bytes:
+# no text of the whole table is built. The target is a path, a file descriptor or a binary file.
+#  JSONL: one object per row, { "line", "type", "token", "lexeme" } or { "name", "type", "value" }.
+#  CSV: a header then one row per token or variable, with the same columns.
+#  BINARY: MAGIC, the version and the table (T or S), then the rows. Each token is its line number and the code of
+#  its type, a new code being followed by the type and token name, then its lexeme. Each variable is its name and
+#  type then its value. Numbers are unsigned LEB128 varints, strings are the varint of their UTF-8 size then the bytes,
+#  and a value is k for a lexeme equal to its type, i then the varint size and the signed little-endian bytes of an integer
+#  or s then a string.
+class Exporter:
+    JSONL = 'jsonl'
+    CSV = 'csv'
+    BINARY = 'binary'
+    FORMATS = (JSONL, CSV, BINARY)
+    EXTENSIONS = { JSONL: '.jsonl', CSV: '.csv', BINARY: '.bin' }
+    MAGIC = b'IPOL'
+    BINARY_VERSION = 1
+    # Number of rows joined before being added to the buffer.
+    ROWS = 1024
+    # Prefix of a file descriptor given on the command line, and name of the standard output.
+    DESCRIPTOR = 'fd:'
+    STDOUT = '-'
+    TOKEN_COLUMNS = ('line', 'type', 'token', 'lexeme')
+    SYMBOL_COLUMNS = ('name', 'type', 'value')
+    
+    def __init__(self, target, _format = JSONL, formatter = None, size = Constants.OUTPUT_BUFFER_SIZE):
+        if _format not in Exporter.FORMATS:
+            raise ValueError('unknown export format %s' % _format)
+        # A path is opened here and closed by close, a file descriptor or a binary file is left open.
+        self.file = open(target, 'wb') if isinstance(target, str) else None
+        self.target = self.file if self.file is not None else target
+        self.format = _format
+        self.formatter = Formatter() if formatter is None else formatter
+        self.size = size
+        self.buffer = bytearray()
+    
+    @staticmethod
+    # Target given on the command line: the file descriptor N of fd:N, the standard output for -,
+    # a path otherwise e.g., 3 or ./fd:3.
+    def getTarget(target):
+        if target == Exporter.STDOUT:
+            return sys.stdout.fileno()
+        if target.startswith(Exporter.DESCRIPTOR):
+            descriptor = target[len(Exporter.DESCRIPTOR):]
+            if not descriptor.isdigit():
+                raise ValueError('invalid file descriptor %s' % target)
+            return int(descriptor)
+        return target
+    
+    # Add text to the buffer.
+    def write(self, text):
+        self.buffer += text.encode('utf-8', 'surrogatepass')
+        if len(self.buffer) >= self.size:
+            self.flush()
+    
+    def flush(self):
+        if self.buffer:
+            if isinstance(self.target, int):
+                # The text printed before e.g., the symbols table, is written first to a shared descriptor.
+                sys.stdout.flush()
+                data = memoryview(self.buffer)
+                while data:
+                    data = data[os.write(self.target, data):]
+            else:
+                self.target.write(self.buffer)
+            self.buffer = bytearray()
+    
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+    
+    # Text of a value within a JSON object, integers being written as numbers.
+    def getJSON(self, value):
+        if type(value) is int:
+            return self.formatter.format(value)
+        return json.dumps(value)
+    
+    @staticmethod
+    def getVarint(number):
+        data = bytearray()
+        while number > 0x7f:
+            data.append((number & 0x7f) | 0x80)
+            number >>= 7
+        data.append(number)
+        return data
+    
+    @staticmethod
+    def getString(text):
+        data = text.encode('utf-8', 'surrogatepass')
+        return Exporter.getVarint(len(data)) + data
+    
+    @staticmethod
+    def getValue(value):
+        if type(value) is int:
+            data = value.to_bytes(value.bit_length() // 8 + 1, 'little', signed = True)
+            return b'i' + Exporter.getVarint(len(data)) + data
+        return b's' + Exporter.getString(str(value))
+    
+    # Write the header then the rows as CSV, ROWS rows at a time.
+    def writeCSV(self, header, rows):
+        rows = iter(rows)
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator = '\n')
+        writer.writerow(header)
+        while text.tell():
+            self.write(text.getvalue())
+            text.seek(0)
+            text.truncate()
+            writer.writerows(itertools.islice(rows, Exporter.ROWS))
+    
+    # Write the rows of the token/lexeme table, see Tokens.getRows.
+    def writeTokens(self, tokens):
+        if self.format == Exporter.CSV:
+            self.writeCSV(Exporter.TOKEN_COLUMNS, tokens.getRows())
+        elif self.format == Exporter.JSONL:
+            # Text of the type and token name of each type, and of the keywords and names of variables.
+            kinds = {}
+            names = {}
+            rows = []
+            for lineNo, _type, token, lexeme in tokens.getRows():
+                kind = kinds.get(_type)
+                if kind is None:
+                    kind = kinds[_type] = ', "type": %s, "token": %s, "lexeme": ' % (json.dumps(_type), json.dumps(token))
+                if type(lexeme) is int:
+                    text = str(lexeme)
+                elif _type == Keyword.STRING:
+                    text = json.dumps(lexeme)
+                else:
+                    text = names.get(lexeme)
+                    if text is None:
+                        text = names[lexeme] = json.dumps(lexeme)
+                rows.append('{"line": %d%s%s}\n' % (lineNo, kind, text))
+                if len(rows) >= Exporter.ROWS:
+                    self.write(''.join(rows))
+                    rows = []
+            self.write(''.join(rows))
+        else:
+            self.buffer += Exporter.MAGIC + bytes((Exporter.BINARY_VERSION,)) + b'T'
+            # Bytes of the code of each type, and of the keywords and names of variables.
+            codes = {}
+            names = {}
+            previousLineNo = None
+            for lineNo, _type, token, lexeme in tokens.getRows():
+                if lineNo != previousLineNo:
+                    previousLineNo = lineNo
+                    line = Exporter.getVarint(lineNo)
+                code = codes.get(_type)
+                if code is None:
+                    self.buffer += line + Exporter.getVarint(len(codes)) + Exporter.getString(_type) + Exporter.getString(token)
+                    code = codes[_type] = bytes(Exporter.getVarint(len(codes)))
+                else:
+                    self.buffer += line + code
+                
+                if lexeme == _type:
+                    self.buffer += b'k'
+                elif type(lexeme) is int or _type == Keyword.STRING:
+                    self.buffer += Exporter.getValue(lexeme)
+                else:
+                    value = names.get(lexeme)
+                    if value is None:
+                        value = names[lexeme] = bytes(Exporter.getValue(lexeme))
+                    self.buffer += value
+                if len(self.buffer) >= self.size:
+                    self.flush()
+    
+    # Write the rows of the symbols table, the values being formatted as displayed by the formatter.
+    def writeVariables(self, variables):
+        if self.format == Exporter.CSV:
+            self.writeCSV(Exporter.SYMBOL_COLUMNS, \
+                          ((item.name, item.displayType, self.formatter.format(item.value)) for item in variables.variables))
+        elif self.format == Exporter.JSONL:
+            for item in variables.variables:
+                self.write('{"name": %s, "type": %s, "value": %s}\n' % \
+                           (json.dumps(item.name), json.dumps(item.displayType), self.getJSON(item.value)))
+        else:
+            self.buffer += Exporter.MAGIC + bytes((Exporter.BINARY_VERSION,)) + b'S'
+            for item in variables.variables:
+                self.buffer += Exporter.getString(item.name) + Exporter.getString(item.displayType) + \
+                               Exporter.getValue(item.value)
+                if len(self.buffer) >= self.size:
+                    self.flush()
+    
+    @staticmethod
+    # Read back the rows of a table written in the binary format, as tuples of the columns.
+    def readBinary(data):
+        data = memoryview(data)
+        if bytes(data[:len(Exporter.MAGIC)]) != Exporter.MAGIC or data[len(Exporter.MAGIC)] != Exporter.BINARY_VERSION:
+            raise ValueError('not an exported table')
+        table = bytes(data[len(Exporter.MAGIC) + 1:len(Exporter.MAGIC) + 2])
+        position = len(Exporter.MAGIC) + 2
+        
+        def readVarint():
+            nonlocal position
+            number = shift = 0
+            while True:
+                byte = data[position]
+                position += 1
+                number |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    return number
+        
+        def readString():
+            nonlocal position
+            size = readVarint()
+            position += size
+            return bytes(data[position - size:position]).decode('utf-8', 'surrogatepass')
+        
+        def readValue(_type):
+            nonlocal position
+            kind = data[position]
+            position += 1
+            if kind == ord('k'):
+                return _type
+            if kind == ord('i'):
+                size = readVarint()
+                position += size
+                return int.from_bytes(data[position - size:position], 'little', signed = True)
+            return readString()
+        
+        kinds = []
+        while position < len(data):
+            if table == b'T':
+                lineNo = readVarint()
+                code = readVarint()
+                if code == len(kinds):
+                    kinds.append((readString(), readString()))
+                _type, token = kinds[code]
+                yield (lineNo, _type, token, readValue(_type))
+            else:
+                name = readString()
+                _type = readString()
+                yield (name, _type, readValue(None))
 
-class Lexer:
+# Character by character lexer.
+class ClassicLexer:
     def __init__(self, text):
         self.text = text
         self.pos = 0
@@ -262,7 +1153,7 @@ class Lexer:
     # Raise an error and stop the execution.
     def raiseError(self, code):
         raise Error(code, (self.lineNo, self.peekUptoStatementEnd()))
-
+    
     # Use to retrieve the line syntax with error.
     def peekUptoStatementEnd(self):
         text = ''
@@ -284,7 +1175,7 @@ class Lexer:
                 self.lineNo += 1
             self.previousChar = self.currentChar
             self.currentChar = self.text[self.pos]
-            
+    
     # Look at the next character but do not process it yet.
     def peek(self):
         peekPos = self.pos + 1
@@ -297,7 +1188,7 @@ class Lexer:
     def skipWhitespace(self):
         while self.currentChar is not None and self.currentChar.isspace() and self.currentChar != '\n':
             self.advance()
-
+    
     # Ignore all comments.
     def skipComment(self):
         while self.currentChar is not None and self.currentChar != '\n':
@@ -312,19 +1203,19 @@ class Lexer:
     def isInteger(self, currentChar, nextChar):
         return currentChar.isdigit() \
                 or ((currentChar == '+' or currentChar == '-') and nextChar.isdigit())
-
+    
     # Retrieve the integer token.
     def getInteger(self):
         result = ''
         while self.currentChar is not None and not self.currentChar.isspace():
             result += self.currentChar
             self.advance()
-            
+        
         try:
             return Token(self.lineNo, Keyword.NUMBER, Keyword.NUMBER, int(result))
         except ValueError:
             self.raiseError(Error.INVALID_DATA_TYPE)
-
+    
     # Retrieve the string token.
     def getString(self):
         result = ''
@@ -334,7 +1225,7 @@ class Lexer:
                 self.advance()
             else:
                 self.raiseError(Error.INVALID_SYNTAX)
-
+        
         self.advance()
         return Token(self.lineNo, Keyword.STRING, Keyword.STRING, result)
     
@@ -344,7 +1235,7 @@ class Lexer:
         while self.currentChar is not None and self.currentChar.isalnum():
             result += self.currentChar
             self.advance()
-            
+        
         keyword = Keyword.get(result)
         if keyword is not None:
             # For keyword.
@@ -356,7 +1247,7 @@ class Lexer:
             token = Token(self.lineNo, Keyword.ID, Keyword.ID, result)
         else:
             self.raiseError(Error.INVALID_SYNTAX)
-                
+        
         return token
     
     # Retrieve the next token.
@@ -393,223 +1284,823 @@ class Lexer:
             
             # If reached here means syntax error.
             self.raiseError(Error.INVALID_SYNTAX)
-            
+        
         # For end of file.
         keyword = Keyword.get(Keyword.EOF)
         return Token(self.lineNo, keyword['lexeme'], keyword['token'], keyword['lexeme'])
 
-class Interpreter:
-    def __init__(self, lexer, tokens, variables):
-        self.lexer = lexer
-        self.tokens = tokens
-        self.variables = variables
-        self.currentToken = self.lexer.getNextToken()
+# Single pass lexer producing the same tokens, line numbers and errors as ClassicLexer.
+# A master regular expression skips the spaces and comments and recognizes the usual
+# tokens in one match; anything unusual e.g., non-ASCII characters or invalid numbers,
+# is scanned with slices following the same steps as ClassicLexer.getNextToken.
+class Lexer(ClassicLexer):
+    SKIP = r'(?:[^\S\n]+|\#[^\n]*)*'
+    MASTER = re.compile(SKIP + r'''(?:
+        (?P<EOS>\n)
+        | (?P<STRING>"[ !#-~]*")
+        | (?P<NUMBER>[+-]?[0-9]+(?=\s|\Z))
+        | (?P<WORD>[A-Za-z][A-Za-z0-9]*(?![A-Za-z0-9]|[^\x00-\x7f]))
+        | (?P<EOF>\Z)
+    )''', re.VERBOSE)
+    SKIP = re.compile(SKIP)
+    WHITESPACE = re.compile(r'\s')
+    NON_WHITESPACE = re.compile(r'\S+')
+    NON_PRINTABLE = re.compile(r'[^ -~]')
+    
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        # Position of the text in the whole source, see StreamLexer.
+        self.offset = 0
+        self.pos = 0
+        # ClassicLexer starts counting from 2 if the text ends with a line break,
+        # as soon as the first character is processed.
+        self.firstLineNo = 2 if self.length > 1 and text[-1] == '\n' else 1
+        self.lineNo = self.firstLineNo
+        # Line breaks counted so far and the next line break to count, see getLineNo.
+        self.lineBreaks = 0
+        self.nextLineBreak = self.findLineBreak(0)
+        # Position where the line of the last counted line break starts.
+        self.lineStart = 0
+        # Trigger the same error as ClassicLexer for an empty text.
+        self.text[self.pos]
+    
+    @staticmethod
+    # Create the lexer selected by the INTERPOL_LEXER environment variable i.e., classic or the default.
+    def create(text):
+        if os.environ.get(Constants.LEXER_ENV) == 'classic':
+            return ClassicLexer(text)
+        return Lexer(text)
+    
+    def findLineBreak(self, pos):
+        lineBreak = self.text.find('\n', pos)
+        return self.length if lineBreak == -1 else lineBreak
+    
+    # Line number at pos, counted the same way as ClassicLexer.advance:
+    # a line break only counts once the character after it is processed.
+    def getLineNo(self, pos):
+        if pos == 0 and self.offset == 0:
+            return 1
+        last = (pos if pos < self.length else self.length - 1) - 1
+        while self.nextLineBreak < last:
+            self.lineBreaks += 1
+            self.lineStart = self.nextLineBreak + 1
+            self.nextLineBreak = self.findLineBreak(self.lineStart)
+        return self.firstLineNo + self.lineBreaks
+    
+    # Use to retrieve the line syntax with error, from the start of its line up to pos.
+    # Same result as ClassicLexer.peekUptoStatementEnd without walking back the line.
+    def peekUptoStatementEnd(self):
+        peekPos = self.pos
+        if self.text[peekPos] == '\n':
+            peekPos = peekPos - 1
         
-    def raiseError(self, code):
-        tokens = self.tokens.lookup(self.lexer.lineNo)
-        if self.currentToken._type is not Keyword.EOS:
-            tokens.append(self.currentToken)
-        lexemes = ''
-        for item in tokens:
-            if item._type == Keyword.STRING:
-                lexemes += '"' + item.lexeme + '" '
-            else:
-                lexemes += str(item.lexeme) + ' '
-        raise Error(code, (self.lexer.lineNo, lexemes))
+        # At most the line break just before pos is not counted yet.
+        lineStart = self.lineStart
+        lineBreak = self.nextLineBreak
+        while lineBreak <= peekPos:
+            lineStart = lineBreak + 1
+            lineBreak = self.findLineBreak(lineStart)
+        if lineStart > 0 or self.offset > 0:
+            return self.text[lineStart:peekPos + 1]
+        
+        # ClassicLexer walks back past the start of the text to its last line.
+        return self.getLastLine() + self.text[:peekPos + 1]
     
-    # Consume the token and retrieve the next token.
-    def consume(self, _type):
-        if self.currentToken._type == _type:
-            if self.currentToken._type == Keyword.EOF:
-                self.tokens.define(Token(self.lexer.lineNo + 1, _type, self.currentToken.token, self.currentToken.lexeme))
-            else:
-                self.tokens.define(Token(self.lexer.lineNo, _type, self.currentToken.token, self.currentToken.lexeme))
-                
-            if self.currentToken._type != Keyword.EOF:
-                self.currentToken = self.lexer.getNextToken()
+    # Retrieve the text after the last line break.
+    def getLastLine(self):
+        lastLineBreak = self.text.rfind('\n')
+        if lastLineBreak == -1:
+            raise IndexError('string index out of range')
+        return self.text[lastLineBreak + 1:]
+    
+    # Raise an error at the given position.
+    def raiseErrorAt(self, pos, code):
+        self.pos = pos
+        self.lineNo = self.getLineNo(pos)
+        self.raiseError(code)
+    
+    # Retrieve the next token.
+    def getNextToken(self):
+        if self.pos >= self.length:
+            self.lineNo = self.getLineNo(self.pos)
+            return Token(self.lineNo, Keyword.EOF, 'END_OF_FILE', Keyword.EOF)
+        
+        match = self.MASTER.match(self.text, self.pos)
+        if match is None:
+            return self.getUnusualToken()
+        
+        pos = self.pos = match.end()
+        if pos - 1 > self.nextLineBreak:
+            self.lineNo = self.getLineNo(pos)
+        
+        kind = match.lastgroup
+        if kind == 'WORD':
+            lexeme = match.group(kind)
+            keyword = Keyword.lexemes.get(lexeme)
+            if keyword is not None:
+                return Token(self.lineNo, keyword['lexeme'], keyword['token'], keyword['lexeme'])
+            if len(lexeme) < 50:
+                return Token(self.lineNo, Keyword.ID, Keyword.ID, lexeme)
+            self.raiseError(Error.INVALID_SYNTAX)
+        elif kind == 'EOS':
+            return Token(self.lineNo, Keyword.EOS, 'END_OF_STATEMENT', Keyword.EOS)
+        elif kind == 'NUMBER':
+            return Token(self.lineNo, Keyword.NUMBER, Keyword.NUMBER, int(match.group(kind)))
+        elif kind == 'STRING':
+            return Token(self.lineNo, Keyword.STRING, Keyword.STRING, match.group(kind)[1:-1])
         else:
+            self.lineNo = self.getLineNo(pos)
+            return Token(self.lineNo, Keyword.EOF, 'END_OF_FILE', Keyword.EOF)
+    
+    # Retrieve the token that the master regular expression does not recognize.
+    def getUnusualToken(self):
+        text = self.text
+        pos = self.SKIP.match(text, self.pos).end()
+        currentChar = text[pos]
+        
+        # For string.
+        if currentChar == '"':
+            end = text.find('"', pos + 1)
+            if end == -1:
+                end = self.length
+            result = text[pos + 1:end]
+            nonPrintable = self.NON_PRINTABLE.search(result)
+            if nonPrintable is not None:
+                self.raiseErrorAt(pos + 1 + nonPrintable.start(), Error.INVALID_SYNTAX)
+            self.pos = end + 1
+            self.lineNo = self.getLineNo(self.pos)
+            return Token(self.lineNo, Keyword.STRING, Keyword.STRING, result)
+        
+        # For integer.
+        nextChar = text[pos + 1] if pos + 1 < self.length else None
+        if self.isInteger(currentChar, nextChar):
+            end = self.NON_WHITESPACE.match(text, pos).end()
+            try:
+                result = int(text[pos:end])
+            except ValueError:
+                self.raiseErrorAt(end, Error.INVALID_DATA_TYPE)
+            self.pos = end
+            self.lineNo = self.getLineNo(end)
+            return Token(self.lineNo, Keyword.NUMBER, Keyword.NUMBER, result)
+        
+        # For variable and reserved keyword.
+        if currentChar.isalnum():
+            end = pos + 1
+            while end < self.length and text[end].isalnum():
+                end += 1
+            result = text[pos:end]
+            self.pos = end
+            self.lineNo = self.getLineNo(end)
+            keyword = Keyword.get(result)
+            if keyword is not None:
+                return Token(self.lineNo, keyword['lexeme'], keyword['token'], keyword['lexeme'])
+            elif len(result) < 50 and result[0].isalpha():
+                return Token(self.lineNo, Keyword.ID, Keyword.ID, result)
             self.raiseError(Error.INVALID_SYNTAX)
-            
-    def isInteger(self, value):
-        try:
-            int(value)
-            return True
-        except ValueError:
-            return False
         
-    # Create stack for expression.
-    def createStack(self):
-        stack = []
-        while self.currentToken._type != Keyword.EOS and self.currentToken._type != Keyword.IN:
-            stackItem = ''
-            if self.currentToken._type in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, \
-                                           Keyword.RAISE, Keyword.ROOT, Keyword.MEAN, Keyword.DIST, \
-                                           Keyword.AND, Keyword.NUMBER, Keyword.ID):
-                if self.currentToken._type == Keyword.ID:
-                    variable = self.variables.lookup(self.currentToken.lexeme)
-                    if variable is not None:
-                        stackItem = variable.value
-                        if variable._type == Keyword.NUMBER and self.isInteger(stackItem):
-                            self.consume(Keyword.ID)
-                            stack.append(stackItem)
-                        else:
-                            self.raiseError(Error.INCOMPATIBLE_DATA_TYPE)
+        # If reached here means syntax error.
+        self.raiseErrorAt(pos, Error.INVALID_SYNTAX)
 
-                    else:
-                        self.raiseError(Error.UNDECLARED_VARIABLE)
-                # if not identifier or the rest of the valid tokens.
-                else:
-                    stackItem = self.currentToken.lexeme
-                    self.consume(self.currentToken._type)
-                    stack.append(stackItem)
-            else:
-                self.raiseError(Error.INVALID_SYNTAX)
+# Lexer reading the source file in chunks instead of a single text, for very large programs.
+# Each chunk ends with a line break, so a token or a line is never split between chunks,
+# and only the current and the next chunk are kept in memory.
+class StreamLexer(Lexer):
+    def __init__(self, file, chunkSize = Constants.CHUNK_SIZE):
+        self.file = file
+        self.chunks = File.readChunks(file, chunkSize)
+        text = next(self.chunks, '')
+        self.nextText = next(self.chunks, None)
+        Lexer.__init__(self, text)
+        # Line numbers depend on the end of the whole file, not of the first chunk.
+        self.firstLineNo = 2 if File.endsWithLineBreak(file) else 1
+        self.lineNo = self.firstLineNo
+        self.setLength()
+    
+    # The end of the text is not the end of the source while there is a next chunk.
+    def setLength(self):
+        self.length = len(self.text) + (0 if self.nextText is None else 1)
+    
+    # Continue with the next chunk once the current one is fully read.
+    def loadNextChunk(self):
+        # Count the line breaks of the current chunk except its last one,
+        # which only counts once the next chunk is read.
+        self.getLineNo(self.pos)
+        self.offset += len(self.text)
+        self.pos -= len(self.text)
+        self.text = self.nextText
+        self.nextText = next(self.chunks, None)
+        self.setLength()
+        self.nextLineBreak = -1
+        self.lineStart = 0
+    
+    # Close the file before all the chunks are read.
+    def close(self):
+        self.chunks.close()
+    
+    # The last line is read again from the file, as it is only needed for an error on the first line.
+    def getLastLine(self):
+        lastLine = None
+        for text in File.readChunks(self.file):
+            lastLineBreak = text.rfind('\n')
+            if lastLineBreak != -1:
+                lastLine = text[lastLineBreak + 1:]
+            elif lastLine is not None:
+                lastLine += text
+        if lastLine is None:
+            raise IndexError('string index out of range')
+        return lastLine
+    
+    def peekUptoStatementEnd(self):
+        if self.pos >= len(self.text) and self.nextText is not None:
+            self.loadNextChunk()
+        return Lexer.peekUptoStatementEnd(self)
+    
+    def getNextToken(self):
+        if self.pos >= len(self.text) and self.nextText is not None:
+            self.loadNextChunk()
+        return Lexer.getNextToken(self)
 
-        return stack
+# Lexer returning tokens already read, ending with the EOF token.
+class ReplayLexer:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.lineNo = 1
     
-    # Process expression:
-    #  <number> | 
-    #  ADD <expression> <expression> | 
-    #  SUB <expression> <expression> | 
-    #  MUL <expression> <expression> | 
-    #  DIV <expression> <expression> | 
-    #  MOD <expression> <expression> | 
-    #  RAISE <expression> <expression> | 
-    #  ROOT <expression> <expression> | 
-    #  MEAN ( <expression> )* | 
-    #  DIST <expression> <expression> AND <expression> <expression>
-    def parseExpression(self):
+    def getNextToken(self):
+        token = self.tokens[self.position]
+        self.lineNo = token.lineNo
+        if self.position < len(self.tokens) - 1:
+            self.position += 1
+        return token
+
+# Lexer of the successive versions of a program, only lexing again the lines that changed.
+# Strings cannot span lines, so the tokens of a line only depend on its text, and their line number on its position.
+# A line that fails is lexed again with the whole text as usual, for exactly the same error.
+class IncrementalLexer:
+    def __init__(self):
+        # Tokens of the lines of the last version as (type, token, lexeme, end position in the line),
+        # by text of the line with its line break.
+        self.lines = {}
+        # Number of lines of the last version and of lines that were lexed again.
+        self.count = 0
+        self.lexed = 0
+    
+    @staticmethod
+    # Retrieve the tokens of the text of a line, or None if it fails.
+    def lexLine(text):
+        lexer = Lexer(text)
+        tokens = []
         try:
-            if self.currentToken._type in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, \
-                                           Keyword.RAISE, Keyword.ROOT, Keyword.MEAN, Keyword.DIST, \
-                                           Keyword.AND, Keyword.NUMBER, Keyword.ID):
-                stack = self.createStack()
-            else:
-                self.raiseError(Error.INVALID_SYNTAX)
+            while True:
+                token = lexer.getNextToken()
+                if token._type == Keyword.EOF:
+                    return tokens
+                tokens.append((token._type, token.token, token.lexeme, lexer.pos))
+        except Exception:
+            return None
     
-            # Scan the stack from right to left.
-            result = 0
-            workingStack = []
+    # Retrieve the lexer of a version of the program.
+    def getLexer(self, text):
+        lines = [line + '\n' for line in text.split('\n')]
+        lines[-1] = lines[-1][:-1]
+        if not lines[-1]:
+            lines.pop()
+        self.count = len(lines)
+        self.lexed = 0
+        if not lines:
+            return Lexer(text)
+        
+        # Same line numbers as Lexer: a token ending the text only counts the line breaks before the last 2 characters.
+        firstLineNo = 2 if len(text) > 1 and text[-1] == '\n' else 1
+        lastLineNo = firstLineNo + text.count('\n', 0, max(0, len(text) - 2))
+        lineNo = firstLineNo
+        lineStart = 0
+        cache = {}
+        tokens = []
+        for index, line in enumerate(lines):
+            lineTokens = cache.get(line)
+            if lineTokens is None:
+                lineTokens = self.lines.get(line)
+            if lineTokens is None:
+                lineTokens = IncrementalLexer.lexLine(line)
+                self.lexed += 1
+                if lineTokens is None:
+                    self.lines.update(cache)
+                    return Lexer(text)
+            cache[line] = lineTokens
+            for _type, token, lexeme, end in lineTokens:
+                lineNo = max(lineNo, firstLineNo + index if lineStart + end < len(text) else lastLineNo)
+                tokens.append(Token(lineNo, _type, token, lexeme))
+            lineStart += len(line)
+        self.lines = cache
+        
+        tokens.append(Token(max(lineNo, lastLineNo), Keyword.EOF, 'END_OF_FILE', Keyword.EOF))
+        return ReplayLexer(tokens)
+
+# Lexer of a large text split into chunks of whole lines, lexed at the same time by a pool of processes.
+# Strings cannot span lines and a line break always ends a statement, so each chunk is lexed on its own
+# and the line numbers of its tokens follow from the number of line breaks before it, see IncrementalLexer.
+# The chunks are taken in order as soon as they are lexed, so the compiler starts with the first one.
+# A chunk that fails is lexed again with the whole text as usual, skipping the tokens already returned,
+# for exactly the same error.
+class ParallelLexer:
+    # Type and token name of each type code, the lexeme of a keyword being its type.
+    # The last code is the EOS token of a line break, the keyword EOS being the same token without ending the line.
+    KINDS = [(keyword['lexeme'], keyword['token']) for keyword in Keyword.keywords] + \
+            [(Keyword.ID, Keyword.ID), (Keyword.NUMBER, Keyword.NUMBER), (Keyword.STRING, Keyword.STRING)] + \
+            [(Keyword.EOS, Keyword.get(Keyword.EOS)['token'])]
+    LINE_BREAK = len(KINDS) - 1
+    KIND_CODES = { _type: code for code, (_type, token) in enumerate(KINDS[:LINE_BREAK]) }
     
-            for i in range((len(stack) - 1), -1, -1):
+    def __init__(self, text, processes = None, chunkSize = Constants.LEX_CHUNK_SIZE):
+        self.text = text
+        # Same line numbers as Lexer: a token ending the text only counts the line breaks before the last 2 characters.
+        self.firstLineNo = 2 if len(text) > 1 and text[-1] == '\n' else 1
+        self.lastLineNo = self.firstLineNo + text.count('\n', 0, max(0, len(text) - 2))
+        self.lineNo = self.firstLineNo
+        
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = text.find('\n', start + chunkSize - 1)
+            end = len(text) if end == -1 else end + 1
+            chunks.append(text[start:end])
+            start = end
+        self.pool = multiprocessing.Pool(processes)
+        self.results = self.pool.imap(ParallelLexer.lexChunk, chunks)
+        # Number of chunks not taken yet.
+        self.chunks = len(chunks)
+        
+        # Tokens of the current chunk.
+        self.tokens = []
+        self.position = 0
+        # Line breaks before the current chunk.
+        self.lineBreaks = 0
+        # Number of tokens of the chunks before the current one.
+        self.count = 0
+        # Serial lexer once a chunk fails.
+        self.lexer = None
     
-                currentStack = stack[i]
+    @staticmethod
+    # Create the lexer of a text, a Lexer for a text of a single chunk.
+    def create(text, processes = None, chunkSize = Constants.LEX_CHUNK_SIZE):
+        if len(text) <= chunkSize or text.find('\n', chunkSize - 1) in (-1, len(text) - 1):
+            return Lexer.create(text)
+        return ParallelLexer(text, processes, chunkSize)
     
-                # Get the AND for DIST.
-                if currentStack == Keyword.AND:
-                    workingStack.append(currentStack)
-                    continue
+    @staticmethod
+    # Lex a chunk in a worker process. Return the type codes of its tokens, their lexemes, the line breaks
+    # before each of them and whether the last token ends the chunk, or None if the chunk fails.
+    def lexChunk(text):
+        lexer = Lexer(text)
+        codes = bytearray()
+        lexemes = []
+        lineBreaks = array.array('I')
+        kindCodes = ParallelLexer.KIND_CODES
+        count = 0
+        try:
+            while True:
+                token = lexer.getNextToken()
+                _type = token._type
+                if _type == Keyword.EOF:
+                    break
+                lineBreaks.append(count)
+                if _type == Keyword.EOS and text[lexer.pos - 1] == '\n':
+                    codes.append(ParallelLexer.LINE_BREAK)
+                    count += 1
+                else:
+                    codes.append(kindCodes[_type])
+                lexemes.append(sys.intern(token.lexeme) if _type == Keyword.ID else token.lexeme)
+                end = lexer.pos
+        except Exception:
+            return None
+        return (bytes(codes), lexemes, lineBreaks.tobytes(), bool(codes) and end == len(text))
     
-                if currentStack in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, Keyword.RAISE, Keyword.ROOT):
-                    if len(workingStack) >= 2:
-                        operand1 = workingStack.pop()
-                        operand2 = workingStack.pop()
-                    else:
-                        self.raiseError(Error.INVALID_EXPRESSION)
-    
-                    if self.isInteger(operand1) and self.isInteger(operand2):
-                        operand1 = int(operand1)
-                        operand2 = int(operand2)
-                        
-                        if currentStack == Keyword.ADD:
-                            result = operand1 + operand2
-                        elif currentStack == Keyword.SUB:
-                            result = operand1 - operand2
-                        elif currentStack == Keyword.MUL:
-                            result = operand1 * operand2
-                        elif currentStack == Keyword.DIV:
-                            result = operand1 // operand2
-                        elif currentStack == Keyword.MOD:
-                            result = operand1 % operand2
-                        elif currentStack == Keyword.RAISE:
-                            result = operand1 ** operand2
-                        elif currentStack == Keyword.ROOT:
-                            result = int(operand2 ** (1 / operand1))
-    
-                        workingStack.append(int(result))
-                        continue
-                    else:
-                        self.raiseError(Error.INVALID_EXPRESSION)
+    # Tokens of the next chunk, or None once the chunk fails.
+    def loadNextChunk(self):
+        result = next(self.results)
+        self.chunks -= 1
+        if self.chunks == 0:
+            self.close()
+        if result is None:
+            return None
+        
+        codes, lexemes, lineBreaks, endsText = result
+        lineBreaks = array.array('I', lineBreaks)
+        firstLineNo = self.firstLineNo + self.lineBreaks
+        kinds = ParallelLexer.KINDS
+        tokens = [Token(firstLineNo + lineBreak, kind[0], kind[1], lexeme) \
+                  for lineBreak, kind, lexeme in zip(lineBreaks, map(kinds.__getitem__, codes), lexemes)]
+        if tokens:
+            self.lineBreaks += lineBreaks[-1] + (codes[-1] == ParallelLexer.LINE_BREAK)
+            if tokens[0].lineNo < self.lineNo:
+                tokens[0].lineNo = self.lineNo
+            if endsText and self.chunks == 0:
+                tokens[-1].lineNo = max(tokens[-2].lineNo if len(tokens) > 1 else self.lineNo, self.lastLineNo)
+        return tokens
     
-                elif currentStack == Keyword.DIST:
-                    # Check if DIST has 4 parameters.
-                    if len(workingStack) >= 4:
-                        operand1 = workingStack.pop()
-                        operand2 = workingStack.pop()
-                        operatorAnd = workingStack.pop()
-                        operand3 = workingStack.pop()
-                        operand4 = workingStack.pop()
-                    else:
-                        self.raiseError(Error.INVALID_EXPRESSION)
-    
-                    if self.isInteger(operand1) and self.isInteger(operand2) and self.isInteger(operand3) \
-                        and self.isInteger(operand4) and operatorAnd == Keyword.AND:
-                        operand1 = int(operand1)
-                        operand2 = int(operand2)
-                        operand3 = int(operand3)
-                        operand4 = int(operand4)
-                        result = int(math.sqrt(((operand1 - operand3) ** 2) + ((operand2 - operand4) ** 2)))
-                        workingStack.append(int(result))
-                        continue
+    def getNextToken(self):
+        if self.lexer is not None:
+            try:
+                return self.lexer.getNextToken()
+            finally:
+                self.lineNo = self.lexer.lineNo
+        
+        while self.position >= len(self.tokens):
+            if self.chunks == 0:
+                self.lineNo = max(self.lineNo, self.lastLineNo)
+                return Token(self.lineNo, Keyword.EOF, 'END_OF_FILE', Keyword.EOF)
+            self.count += len(self.tokens)
+            tokens = self.loadNextChunk()
+            if tokens is None:
+                # Same tokens then the same error as the serial lexer.
+                self.close()
+                self.lexer = Lexer.create(self.text)
+                for _ in range(self.count):
+                    self.lexer.getNextToken()
+                return self.getNextToken()
+            self.tokens = tokens
+            self.position = 0
+        
+        token = self.tokens[self.position]
+        self.position += 1
+        self.lineNo = token.lineNo
+        return token
     
-                elif currentStack == Keyword.MEAN:
-                    if len(workingStack) > 0:
+    # Stop the processes, before all the chunks are lexed if needed.
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+# Optimization of the instructions of an expression, with exactly the same results and errors.
+# The instructions are rebuilt into a tree where equal subexpressions are the same node:
+# subexpressions of numbers only are computed while compiling, and subexpressions repeated
+# within the expression are computed once then kept in a temporary.
+# A subexpression that fails e.g., division by zero, is left as is to fail while executing.
+class Optimizer:
+    # Largest number of bits of a computed number, so that the compiled program stays small.
+    MAX_BITS = 4096
     
-                        meanStack = []
-                        while len(workingStack) > 0:
-                            operand1 = workingStack.pop()
-                            if self.isInteger(operand1):
-                                meanStack.append(int(operand1))
-                            else:
-                                workingStack.append(operand1)
-                                break
+    def __init__(self):
+        # Each node as (opcode, arg, children), the children in the order they are computed.
+        self.nodes = []
+        self.nodeIds = {}
     
-                        result = sum(meanStack) // len(meanStack)
-                        workingStack.append(int(result))
-                        continue
+    # Node of an instruction whose operands are the given nodes.
+    def getNode(self, opcode, arg, children = ()):
+        key = (opcode, arg, children)
+        nodeId = self.nodeIds.get(key)
+        if nodeId is None:
+            nodeId = self.nodeIds[key] = len(self.nodes)
+            self.nodes.append(key)
+        return nodeId
+    
+    @staticmethod
+    # Compute an operation as the virtual machine does, with the values in the order they are pushed.
+    def evaluate(opcode, arg, values):
+        if opcode in Opcode.functions:
+            operand2, operand1 = values
+            # Do not compute a power larger than allowed, it may take as long as the whole program.
+            if opcode == Opcode.RAISE and abs(operand1) > 1 and operand2 > 0 and \
+               (operand1.bit_length() - 1) * operand2 > Optimizer.MAX_BITS:
+                return None
+            return Opcode.functions[opcode](operand1, operand2)
+        if opcode == Opcode.MEAN:
+            return sum(values) // arg
+        if opcode == Opcode.DIST:
+            operand4, operand3, operatorAnd, operand2, operand1 = values
+            return Arithmetic.distance(operand1, operand2, operand3, operand4)
+        if opcode == Opcode.RAISE_MOD:
+            modulus, exponent, base = values
+            return Arithmetic.raiseMod(base, exponent, modulus)
+        return None
+    
+    # Node of an operation, replaced by its result if all the operands are numbers.
+    def fold(self, opcode, arg, children):
+        values = []
+        for child in children:
+            childOpcode, value, grandChildren = self.nodes[child]
+            if childOpcode != Opcode.PUSH:
+                return self.getNode(opcode, arg, children)
+            values.append(value)
+        
+        try:
+            result = Optimizer.evaluate(opcode, arg, values)
+        except Exception:
+            result = None
+        if type(result) is not int or result.bit_length() > Optimizer.MAX_BITS:
+            return self.getNode(opcode, arg, children)
+        return self.getNode(Opcode.PUSH, result)
     
-                if self.isInteger(currentStack):
-                    workingStack.append(int(currentStack))
+    # Return the optimized instructions of an expression, the first one being its CONTEXT.
+    def optimize(self, code):
+        stack = []
+        # Discarded values with nothing below on the stack, computed before the result.
+        prefix = []
+        
+        for opcode, arg in code[1:]:
+            if opcode == Opcode.PUSH or opcode == Opcode.LOAD:
+                stack.append(self.getNode(opcode, arg))
+            elif opcode in Opcode.functions:
+                operand1 = stack.pop()
+                operand2 = stack.pop()
+                # The remainder of a power is computed without the power itself.
+                if opcode == Opcode.MOD and self.nodes[operand1][0] == Opcode.RAISE:
+                    stack.append(self.fold(Opcode.RAISE_MOD, None, (operand2,) + self.nodes[operand1][2]))
+                else:
+                    stack.append(self.fold(opcode, arg, (operand2, operand1)))
+            elif opcode == Opcode.MEAN or opcode == Opcode.DIST:
+                count = arg if opcode == Opcode.MEAN else 5
+                operands = tuple(stack[-count:])
+                del stack[-count:]
+                stack.append(self.fold(opcode, arg, operands))
+            elif opcode == Opcode.DROP:
+                operands = tuple(stack[-arg:])
+                del stack[-arg:]
+                # Numbers and variables can be discarded without computing them.
+                if all(self.nodes[operand][0] in (Opcode.PUSH, Opcode.LOAD) for operand in operands):
                     continue
+                # Otherwise the value below is computed first, then the discarded values.
+                if stack:
+                    stack[-1] = self.getNode(Opcode.DROP, arg, (stack[-1],) + operands)
+                else:
+                    prefix.append(self.getNode(Opcode.DROP, arg, operands))
+            else:
+                return code
+        
+        if len(stack) != 1:
+            return code
+        
+        roots = prefix + stack
+        # A single number or variable cannot fail, so it does not need the error context.
+        if not prefix and self.nodes[stack[0]][0] in (Opcode.PUSH, Opcode.LOAD):
+            opcode, arg, children = self.nodes[stack[0]]
+            return [(opcode, arg)]
+        return [code[0]] + self.generate(roots)
     
-            # Expression must provide only one final result.
-            if len(workingStack) == 1:
-                result = workingStack.pop()
-                return result
+    # Generate the instructions of the nodes, keeping the result of a repeated node in a temporary.
+    def generate(self, roots):
+        # Count how many times each node is computed, without counting again inside a repeated node.
+        counts = [0] * len(self.nodes)
+        pending = list(roots)
+        while pending:
+            nodeId = pending.pop()
+            counts[nodeId] += 1
+            if counts[nodeId] == 1:
+                pending.extend(self.nodes[nodeId][2])
+        
+        code = []
+        temporaries = {}
+        # Each pending node is generated before its children if not yet expanded, after them otherwise.
+        pending = [(nodeId, False) for nodeId in reversed(roots)]
+        while pending:
+            nodeId, expanded = pending.pop()
+            opcode, arg, children = self.nodes[nodeId]
+            if nodeId in temporaries:
+                code.append((Opcode.RESTORE, temporaries[nodeId]))
+            elif not children:
+                code.append((opcode, arg))
+            elif not expanded:
+                pending.append((nodeId, True))
+                pending.extend((child, False) for child in reversed(children))
             else:
-                self.raiseError(Error.INVALID_EXPRESSION)
-        except ArithmeticError:
-            self.raiseError(Error.INVALID_OPERATIONS)
+                code.append((opcode, arg))
+                # A discarding node leaves no value of its own to keep.
+                if counts[nodeId] > 1 and opcode != Opcode.DROP:
+                    temporaries[nodeId] = len(temporaries)
+                    code.append((Opcode.SAVE, temporaries[nodeId]))
+        return code
+
+# Translate the tokens into the instructions of a program.
+# Errors are not raised while compiling but recorded as an instruction,
+# so that everything before the error is still executed in the same order.
+class Compiler:
+    # Marker for an integer in the working stack.
+    INTEGER = Keyword.INTEGER
+    # Kinds of statements, any other statement being an expression.
+    KINDS = (Keyword.VARINT, Keyword.VARSTR, Keyword.STORE, Keyword.INPUT, Keyword.PRINT, Keyword.PRINTLN)
+    EXPRESSION = 'EXPRESSION'
+    
+    def __init__(self, lexer, tokens):
+        self.lexer = lexer
+        self.tokens = tokens
+        self.code = []
+        # Declared variables and its type.
+        self.symbols = {}
+        # Slot number of the declared variables i.e., its position in the symbols table.
+        self.slots = {}
+        # Integer variables currently holding a non-integer value e.g., VARINT x WITH AND.
+        self.nonIntegers = set()
+        # First token of the statement being compiled, None outside of the statements.
+        self.statement = None
+        self.currentToken = self.lexer.getNextToken()
+    
+    def raiseError(self, code):
+        tokens = self.tokens.lookup(self.lexer.lineNo)
+        if self.currentToken._type is not Keyword.EOS:
+            tokens.append(self.currentToken)
+        raise Error(code, (self.lexer.lineNo, Tokens.format(tokens)))
+    
+    # Kind of the statement being compiled i.e., its first keyword or EXPRESSION, None outside of the statements.
+    def getStatementKind(self):
+        if self.statement is None:
+            return None
+        return self.statement._type if self.statement._type in Compiler.KINDS else Compiler.EXPRESSION
+    
+    # Record where the execution is for errors that can only be detected while executing.
+    def getErrorContext(self):
+        pending = ''
+        if self.currentToken._type is not Keyword.EOS:
+            pending = Tokens.format([self.currentToken])
+        return (self.lexer.lineNo, self.tokens.count(), pending)
+    
+    # Add an instruction to the program.
+    def emit(self, opcode, arg = None):
+        self.code.append((opcode, arg))
+    
+    # Consume the token and retrieve the next token.
+    def consume(self, _type):
+        if self.currentToken._type == _type:
+            if self.currentToken._type == Keyword.EOF:
+                self.tokens.add(self.lexer.lineNo + 1, _type, self.currentToken.token, self.currentToken.lexeme)
+            else:
+                self.tokens.add(self.lexer.lineNo, _type, self.currentToken.token, self.currentToken.lexeme)
+            
+            if self.currentToken._type != Keyword.EOF:
+                self.currentToken = self.lexer.getNextToken()
+        else:
+            self.raiseError(Error.INVALID_SYNTAX)
+    
+    # Create stack for expression.
+    def createStack(self):
+        stack = []
+        while self.currentToken._type != Keyword.EOS and self.currentToken._type != Keyword.IN:
+            if self.currentToken._type in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, \
+                                           Keyword.RAISE, Keyword.ROOT, Keyword.MEAN, Keyword.DIST, \
+                                           Keyword.AND, Keyword.NUMBER, Keyword.ID):
+                if self.currentToken._type == Keyword.ID:
+                    varName = self.currentToken.lexeme
+                    if varName in self.symbols:
+                        if self.symbols[varName] == Keyword.NUMBER and varName not in self.nonIntegers:
+                            stack.append(self.currentToken)
+                            self.consume(Keyword.ID)
+                        else:
+                            self.raiseError(Error.INCOMPATIBLE_DATA_TYPE)
+                    else:
+                        self.raiseError(Error.UNDECLARED_VARIABLE)
+                # if not identifier or the rest of the valid tokens.
+                else:
+                    stack.append(self.currentToken)
+                    self.consume(self.currentToken._type)
+            else:
+                self.raiseError(Error.INVALID_SYNTAX)
+        
+        return stack
+    
+    # Process expression:
+    #  <number> |
+    #  ADD <expression> <expression> |
+    #  SUB <expression> <expression> |
+    #  MUL <expression> <expression> |
+    #  DIV <expression> <expression> |
+    #  MOD <expression> <expression> |
+    #  RAISE <expression> <expression> |
+    #  ROOT <expression> <expression> |
+    #  MEAN ( <expression> )* |
+    #  DIST <expression> <expression> AND <expression> <expression>
+    # The instructions leave the result on the stack of the virtual machine.
+    # Return the kind of the result i.e., INTEGER or AND.
+    def parseExpression(self):
+        if self.currentToken._type in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, \
+                                       Keyword.RAISE, Keyword.ROOT, Keyword.MEAN, Keyword.DIST, \
+                                       Keyword.AND, Keyword.NUMBER, Keyword.ID):
+            stack = self.createStack()
+        else:
+            self.raiseError(Error.INVALID_SYNTAX)
+        
+        start = len(self.code)
+        self.emit(Opcode.CONTEXT, self.getErrorContext())
+        
+        # Scan the stack from right to left.
+        # The working stack only tracks the kind of each value the virtual machine will hold.
+        workingStack = []
+        
+        for i in range((len(stack) - 1), -1, -1):
+        
+            currentStack = stack[i]._type
+            
+            # Get the AND for DIST.
+            if currentStack == Keyword.AND:
+                self.emit(Opcode.PUSH, Keyword.AND)
+                workingStack.append(currentStack)
+                continue
+            
+            if currentStack in Opcode.operators:
+                if len(workingStack) >= 2:
+                    operand1 = workingStack.pop()
+                    operand2 = workingStack.pop()
+                else:
+                    self.raiseError(Error.INVALID_EXPRESSION)
+                
+                if operand1 == self.INTEGER and operand2 == self.INTEGER:
+                    self.emit(Opcode.operators[currentStack])
+                    workingStack.append(self.INTEGER)
+                    continue
+                else:
+                    self.raiseError(Error.INVALID_EXPRESSION)
+            
+            elif currentStack == Keyword.DIST:
+                # Check if DIST has 4 parameters.
+                if len(workingStack) >= 4:
+                    operand1 = workingStack.pop()
+                    operand2 = workingStack.pop()
+                    operatorAnd = workingStack.pop()
+                    operand3 = workingStack.pop()
+                    operand4 = workingStack.pop()
+                else:
+                    self.raiseError(Error.INVALID_EXPRESSION)
+                
+                if operand1 == self.INTEGER and operand2 == self.INTEGER and operand3 == self.INTEGER \
+                    and operand4 == self.INTEGER and operatorAnd == Keyword.AND:
+                    self.emit(Opcode.DIST)
+                    workingStack.append(self.INTEGER)
+                    continue
+                
+                # Otherwise, the operands are discarded.
+                self.emit(Opcode.DROP, 5)
+            
+            elif currentStack == Keyword.MEAN:
+                if len(workingStack) > 0:
+                
+                    count = 0
+                    while len(workingStack) > 0:
+                        operand1 = workingStack.pop()
+                        if operand1 == self.INTEGER:
+                            count += 1
+                        else:
+                            workingStack.append(operand1)
+                            break
+                    
+                    # Average of nothing is a division by zero.
+                    if count == 0:
+                        self.raiseError(Error.INVALID_OPERATIONS)
+                    
+                    self.emit(Opcode.MEAN, count)
+                    workingStack.append(self.INTEGER)
+                    continue
             
+            if currentStack == Keyword.NUMBER:
+                self.emit(Opcode.PUSH, stack[i].lexeme)
+                workingStack.append(self.INTEGER)
+            elif currentStack == Keyword.ID:
+                self.emit(Opcode.LOAD, self.slots[stack[i].lexeme])
+                workingStack.append(self.INTEGER)
+        
+        # Expression must provide only one final result.
+        if len(workingStack) == 1:
+            self.code[start:] = Optimizer().optimize(self.code[start:])
+            return workingStack.pop()
+        else:
+            self.raiseError(Error.INVALID_EXPRESSION)
+    
     # Process assign statement:
-    #  VARINT <variable> ( WITH <expression> ) | 
-    #  VARSTR <variable> ( WITH "<string>" | <expression> ) | 
+    #  VARINT <variable> ( WITH <expression> ) |
+    #  VARSTR <variable> ( WITH "<string>" | <expression> ) |
     #  STORE "<string>" | <expression> IN <variable>
     def assignStatement(self):
         if self.currentToken._type == Keyword.VARINT:
             self.consume(Keyword.VARINT)
-        
+            
             varName = self.currentToken.lexeme
-            if self.variables.lookup(varName) is not None:
+            if varName in self.symbols:
                 self.raiseError(Error.DUPLICATE_VAR)
             self.consume(Keyword.ID)
-        
-            result = 0
+            
+            result = self.INTEGER
             if self.currentToken._type == Keyword.WITH:
                 self.consume(Keyword.WITH)
                 
                 # For strong-typing; must not accept string.
                 if self.currentToken._type == Keyword.STRING:
                     self.raiseError(Error.INVALID_DATA_TYPE)
-                    
-                result = self.parseExpression()
                 
-            self.variables.define(Variable(varName, Keyword.NUMBER, result))
+                result = self.parseExpression()
+            else:
+                self.emit(Opcode.PUSH, 0)
+            
+            self.emit(Opcode.DEFINE, (varName, Keyword.NUMBER))
+            self.symbols[varName] = Keyword.NUMBER
+            self.slots[varName] = len(self.slots)
+            if result != self.INTEGER:
+                self.nonIntegers.add(varName)
         elif self.currentToken._type == Keyword.VARSTR:
             self.consume(Keyword.VARSTR)
             
             varName = self.currentToken.lexeme
-            if self.variables.lookup(varName) is not None:
+            if varName in self.symbols:
                 self.raiseError(Error.DUPLICATE_VAR)
             self.consume(Keyword.ID)
             
@@ -619,20 +2110,23 @@ class Interpreter:
                 
                 # For strong-typing; must only accept string.
                 if self.currentToken._type != Keyword.STRING:
-                    result = self.parseExpression()
+                    self.parseExpression()
                     self.raiseError(Error.INVALID_DATA_TYPE)
-                    
+                
                 result = self.currentToken.lexeme
                 self.consume(Keyword.STRING)
-                
-            self.variables.define(Variable(varName, Keyword.STRING, result))
-        elif self.currentToken._type == Keyword.STORE: 
+            
+            self.emit(Opcode.PUSH, result)
+            self.emit(Opcode.DEFINE, (varName, Keyword.STRING))
+            self.symbols[varName] = Keyword.STRING
+            self.slots[varName] = len(self.slots)
+        elif self.currentToken._type == Keyword.STORE:
             self.consume(Keyword.STORE)
             
-            result = ''
+            result = self.INTEGER
             varType = self.currentToken._type
             if self.currentToken._type == Keyword.STRING:
-                result = self.currentToken.lexeme
+                self.emit(Opcode.PUSH, self.currentToken.lexeme)
                 self.consume(Keyword.STRING)
             else:
                 varType = Keyword.NUMBER
@@ -643,15 +2137,18 @@ class Interpreter:
             self.consume(Keyword.IN)
             
             varName = self.currentToken.lexeme
-            variable = self.variables.lookup(varName)
-            if variable is None:
+            if varName not in self.symbols:
                 self.raiseError(Error.UNDECLARED_VARIABLE)
             # For strong-typing; must only accept the declared type.
-            if variable._type != varType:
+            if self.symbols[varName] != varType:
                 self.raiseError(Error.INVALID_DATA_TYPE)
             self.consume(Keyword.ID)
             
-            self.variables.update(varName, result)
+            self.emit(Opcode.STORE, self.slots[varName])
+            if result != self.INTEGER:
+                self.nonIntegers.add(varName)
+            else:
+                self.nonIntegers.discard(varName)
     
     # Process the input statement:
     #  INPUT <variable>
@@ -659,46 +2156,43 @@ class Interpreter:
         self.consume(Keyword.INPUT)
         
         varName = self.currentToken.lexeme
-        variable = self.variables.lookup(varName)
-        if variable is None:
+        if varName not in self.symbols:
             self.raiseError(Error.UNDECLARED_VARIABLE)
         self.consume(Keyword.ID)
         
-        _input = input()
-        if variable._type == Keyword.NUMBER and not self.isInteger(_input):
-            self.raiseError(Error.INVALID_DATA_TYPE_INPUT)
-        
-        self.variables.update(varName, _input)
-        
+        self.emit(Opcode.CONTEXT, self.getErrorContext())
+        self.emit(Opcode.INPUT, (self.slots[varName], self.symbols[varName]))
+        self.nonIntegers.discard(varName)
+    
     # Process the output statement:
-    #  PRINT <variable> | PRINT "<string>" | PRINT <expression> | 
+    #  PRINT <variable> | PRINT "<string>" | PRINT <expression> |
     #  PRINTLN <variable> | PRINTLN "<string>" | PRINTLN <expression>
     def printOutputStatement(self):
         appendNextLine = False
         if self.currentToken._type == Keyword.PRINT:
             self.consume(Keyword.PRINT)
-        elif self.currentToken._type == Keyword.PRINTLN: 
+        elif self.currentToken._type == Keyword.PRINTLN:
             appendNextLine = True
             self.consume(Keyword.PRINTLN)
-            
+        
         if self.currentToken._type == Keyword.ID:
-            variable = self.variables.lookup(self.currentToken.lexeme)
-            if variable is None:
+            varName = self.currentToken.lexeme
+            if varName not in self.symbols:
                 self.raiseError(Error.UNDECLARED_VARIABLE)
-            result = str(variable.value)
             self.consume(Keyword.ID)
-        elif self.currentToken._type == Keyword.STRING:
-            result = self.currentToken.lexeme
-            self.consume(Keyword.STRING)
+            self.emit(Opcode.CONTEXT, self.getErrorContext())
+            self.emit(Opcode.PRINT_VAR, (self.slots[varName], appendNextLine))
         else:
-            result = str(self.parseExpression())
-            
-        if appendNextLine:
-            result += '\n'
-        
-        print(result, end = '', flush = True)
-     
-    # Parse a line.       
+            if self.currentToken._type == Keyword.STRING:
+                self.emit(Opcode.PUSH, self.currentToken.lexeme)
+                self.consume(Keyword.STRING)
+            else:
+                self.parseExpression()
+            # Context of an integer with too many digits.
+            self.emit(Opcode.CONTEXT, self.getErrorContext())
+            self.emit(Opcode.PRINT, appendNextLine)
+    
+    # Parse a line.
     def parseStatement(self):
         if self.currentToken._type == Keyword.VARINT \
             or self.currentToken._type == Keyword.VARSTR \
@@ -715,25 +2209,29 @@ class Interpreter:
         elif self.currentToken._type in (Keyword.ADD, Keyword.SUB, Keyword.MUL, Keyword.DIV, Keyword.MOD, \
                                          Keyword.RAISE, Keyword.ROOT, Keyword.MEAN, Keyword.DIST):
             self.parseExpression()
+            self.emit(Opcode.DROP, 1)
     
-    # Parse all the lines.
+    # Parse all the lines, pausing after each statement.
     def parseStatementList(self):
         while self.currentToken._type == Keyword.EOS:
             # Consume any line break.
             self.consume(Keyword.EOS)
             
             # Ignore any BEGIN syntax.
-            if self.currentToken._type != Keyword.BEGIN:   
+            if self.currentToken._type != Keyword.BEGIN:
+                self.statement = self.currentToken
                 self.parseStatement()
-                
+            yield
+        self.statement = None
+    
     def parseProgram(self):
         # Everything must begin and it should be with BEGIN.
         if self.currentToken._type == Keyword.BEGIN:
             self.consume(Keyword.BEGIN)
         else:
             self.raiseError(Error.INVALID_SYNTAX)
-            
-        self.parseStatementList()
+        
+        yield from self.parseStatementList()
         
         # Display error if reached EOF before END.
         if self.currentToken._type == Keyword.EOF:
@@ -744,42 +2242,1894 @@ class Interpreter:
             self.consume(Keyword.END)
         else:
             self.raiseError(Error.INVALID_SYNTAX)
-            
+    
     def parse(self):
         # Consume any line break before BEGIN.
         while self.currentToken._type == Keyword.EOS:
             self.consume(Keyword.EOS)
         
-        self.parseProgram()
+        yield from self.parseProgram()
         
         # Consume any line break before the end-of-file.
         while self.currentToken._type == Keyword.EOS:
             self.consume(Keyword.EOS)
-            
+        
         # Actual end-of-file.
         if self.currentToken._type == Keyword.EOF:
             self.consume(Keyword.EOF)
         else:
             self.raiseError(Error.INVALID_SYNTAX)
+    
+    # Compile one statement at a time, yielding the instructions of each statement
+    # so that they can be executed before the rest of the program is read.
+    # The first error stops the compilation and becomes the last instruction.
+    def compileStatements(self):
+        try:
+            for _ in self.parse():
+                code, self.code = self.code, []
+                yield code
+        except Error as err:
+            self.emit(Opcode.ERROR, (err.code, err.details))
+        except Exception:
+            self.emit(Opcode.ERROR, (Error.GENERAL_ERROR, tuple()))
+        yield self.code
+    
+    # Compile the whole program.
+    # With an eliminator, the values that are never read are removed, see DeadStoreEliminator.
+    def compile(self, eliminator = None):
+        if eliminator is not None:
+            statements = [(self.statement.lineNo if self.statement is not None else self.lexer.lineNo, statementCode) \
+                          for statementCode in self.compileStatements()]
+            return Program(eliminator.eliminate(statements), self.tokens)
+        code = []
+        for statementCode in self.compileStatements():
+            code += statementCode
+        return Program(code, self.tokens)
+
+# Removal of the stores whose value is never read, over the compiled statements of the whole program.
+# The program has no branches: the value stored in a variable is read by the statements up to the next one
+# assigning the variable, and the values left at the end are read by the symbols table.
+# A STORE or an expression statement whose value is never read is removed, and such a declaration keeps
+# its default value so that the variable is still declared at the same slot.
+# A value whose computation may fail is kept, so that the output, inputs and errors are the same.
+# Once an error stops the program, the variables may not hold the values they would have without the removal.
+class DeadStoreEliminator:
+    def __init__(self):
+        # Removed values as (line number, statement kind, variable name or None for an expression).
+        self.removed = []
+        # Number of instructions before and after the removal.
+        self.instructions = 0
+        self.kept = 0
+    
+    @staticmethod
+    # Check that the instructions of a value cannot fail, following the numbers known while compiling.
+    def isSafe(code):
+        stack = []
+        temporaries = {}
+        for opcode, arg in code:
+            if opcode == Opcode.CONTEXT:
+                continue
+            if opcode == Opcode.PUSH:
+                stack.append(arg)
+            elif opcode == Opcode.LOAD:
+                # Unknown integer.
+                stack.append(None)
+            elif opcode == Opcode.SAVE:
+                temporaries[arg] = stack[-1]
+            elif opcode == Opcode.RESTORE:
+                stack.append(temporaries[arg])
+            elif opcode == Opcode.DROP:
+                del stack[-arg:]
+            elif opcode in Opcode.functions or opcode in (Opcode.MEAN, Opcode.DIST, Opcode.RAISE_MOD):
+                count = 2 if opcode in Opcode.functions else arg if opcode == Opcode.MEAN else \
+                        5 if opcode == Opcode.DIST else 3
+                if count < 1 or len(stack) < count:
+                    return False
+                values = stack[-count:]
+                del stack[-count:]
+                
+                if None not in values:
+                    try:
+                        result = Optimizer.evaluate(opcode, arg, values)
+                    except Exception:
+                        return False
+                    stack.append(result if type(result) is int and result.bit_length() <= Optimizer.MAX_BITS else None)
+                    continue
+                
+                # Values in the order they are pushed, the first operand last.
+                if opcode == Opcode.DIV or opcode == Opcode.MOD:
+                    safe = type(values[0]) is int and values[0] != 0
+                elif opcode == Opcode.RAISE:
+                    safe = type(values[0]) is int and 0 <= values[0] <= Optimizer.MAX_BITS
+                elif opcode == Opcode.ROOT:
+                    safe = values[1] == 1
+                elif opcode == Opcode.RAISE_MOD:
+                    safe = type(values[1]) is int and values[1] >= 0 and type(values[0]) is int and values[0] != 0
+                else:
+                    # ADD, SUB, MUL, MEAN and DIST of integers cannot fail.
+                    safe = True
+                if not safe:
+                    return False
+                stack.append(None)
+            else:
+                return False
+        return True
+    
+    # Return the instructions of the statements, given as (line number, instructions) in order, without the dead values.
+    def eliminate(self, statements):
+        statements = [(lineNo, list(code)) for lineNo, code in statements]
+        self.instructions = sum(len(code) for lineNo, code in statements)
+        
+        # Slot of each declaration, in the order they are executed.
+        slots = {}
+        names = []
+        for index, (lineNo, code) in enumerate(statements):
+            for opcode, arg in code:
+                if opcode == Opcode.DEFINE:
+                    slots[index] = len(names)
+                    names.append(arg[0])
+        
+        # Variables whose value is read later, from the last statement back to the first.
+        live = set(range(len(names)))
+        for index in range(len(statements) - 1, -1, -1):
+            lineNo, code = statements[index]
+            if not code:
+                continue
+            opcode, arg = code[-1]
+            
+            if any(instruction[0] == Opcode.ERROR for instruction in code):
+                # The statement stopping the program is kept as is.
+                live.update(range(len(names)))
+            elif opcode in (Opcode.STORE, Opcode.DEFINE, Opcode.DROP):
+                slot = arg if opcode == Opcode.STORE else slots.get(index)
+                if (opcode == Opcode.DROP or slot not in live) and DeadStoreEliminator.isSafe(code[:-1]):
+                    if opcode != Opcode.DEFINE:
+                        statements[index] = (lineNo, [])
+                        self.removed.append((lineNo, Keyword.STORE if opcode == Opcode.STORE else Compiler.EXPRESSION, \
+                                             names[slot] if opcode == Opcode.STORE else None))
+                        continue
+                    # A single number or string costs the same as the default value.
+                    if len(code) > 2:
+                        value = 0 if arg[1] == Keyword.NUMBER else ''
+                        statements[index] = (lineNo, [(Opcode.PUSH, value), (opcode, arg)])
+                        self.removed.append((lineNo, Keyword.VARINT if arg[1] == Keyword.NUMBER else Keyword.VARSTR, \
+                                             names[slot]))
+                    continue
+                live.discard(slot)
+            elif opcode == Opcode.INPUT:
+                live.discard(arg[0])
+            
+            for opcode, arg in code:
+                if opcode == Opcode.LOAD:
+                    live.add(arg)
+                elif opcode == Opcode.PRINT_VAR:
+                    live.add(arg[0])
+        
+        self.removed.reverse()
+        code = []
+        for lineNo, statementCode in statements:
+            code += statementCode
+        self.kept = len(code)
+        return code
+    
+    # Display the number of values removed then each of them in the following format:
+    #  LINE NO. <padding> STATEMENT <padding> VARIABLE NAME
+    def display(self):
+        col1Padding = 10
+        col2Padding = 15
+        
+        print(Message.get('DEAD_STORES_TITLE'))
+        print(Message.get('DEAD_STORES_REMOVED') % (len(self.removed), self.kept, self.instructions))
+        print(Message.get('TOKEN_HEADER_1').ljust(col1Padding), \
+              Message.get('DEAD_STORES_HEADER').ljust(col2Padding), \
+              Message.get('SYMBOL_HEADER_1'))
+        for lineNo, kind, name in self.removed:
+            print(str(lineNo).ljust(col1Padding), \
+                  kind.ljust(col2Padding), \
+                  name or '')
+
+# Stack-based execution of the compiled program.
+class VirtualMachine:
+    def __init__(self, program, variables, output = None, formatter = None):
+        self.program = program
+        self.variables = variables
+        self.output = BufferedOutput() if output is None else output
+        self.formatter = Formatter() if formatter is None else formatter
+        # Read a line of input for the INPUT statement.
+        self.input = input
+        # Called with each value stored or printed when set e.g., by the profiler.
+        self.measure = None
+    
+    # Execute all the instructions, or the given ones only.
+    # The output is flushed before reading an input, on error and at the end of the program.
+    # When only some of the instructions are given, flushing at the end is left to the caller.
+    def run(self, code = None):
+        try:
+            self.execute(code)
+        except BaseException:
+            self.output.flush()
+            raise
+        if code is None:
+            self.output.flush()
+    
+    # Variables are accessed by slot number and integers are stored as int.
+    def execute(self, code):
+        variables = self.variables
+        slots = variables.variables
+        output = self.output
+        write = output.write
+        formatter = self.formatter
+        # Integers with more bits are written by the formatter.
+        largeBits = formatter.largeBits
+        measure = self.measure
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        temporaries = {}
+        context = None
+        
+        try:
+            for opcode, arg in self.program.code if code is None else code:
+                if opcode == Opcode.PUSH:
+                    push(arg)
+                elif opcode == Opcode.LOAD:
+                    push(slots[arg].value)
+                elif opcode == Opcode.CONTEXT:
+                    context = arg
+                elif opcode == Opcode.ADD:
+                    operand1 = pop()
+                    stack[-1] = operand1 + stack[-1]
+                elif opcode == Opcode.SUB:
+                    operand1 = pop()
+                    stack[-1] = operand1 - stack[-1]
+                elif opcode == Opcode.MUL:
+                    operand1 = pop()
+                    stack[-1] = operand1 * stack[-1]
+                elif opcode == Opcode.DIV:
+                    operand1 = pop()
+                    stack[-1] = operand1 // stack[-1]
+                elif opcode == Opcode.MOD:
+                    operand1 = pop()
+                    stack[-1] = operand1 % stack[-1]
+                elif opcode == Opcode.RAISE:
+                    operand1 = pop()
+                    stack[-1] = int(operand1 ** stack[-1])
+                elif opcode == Opcode.ROOT:
+                    operand1 = pop()
+                    stack[-1] = Arithmetic.root(operand1, stack[-1])
+                elif opcode == Opcode.MEAN:
+                    operands = stack[-arg:]
+                    del stack[-arg:]
+                    push(sum(operands) // arg)
+                elif opcode == Opcode.DIST:
+                    operand1 = pop()
+                    operand2 = pop()
+                    pop()
+                    operand3 = pop()
+                    operand4 = pop()
+                    push(Arithmetic.distance(operand1, operand2, operand3, operand4))
+                elif opcode == Opcode.RAISE_MOD:
+                    operand1 = pop()
+                    operand2 = pop()
+                    stack[-1] = Arithmetic.raiseMod(operand1, operand2, stack[-1])
+                elif opcode == Opcode.DROP:
+                    del stack[-arg:]
+                elif opcode == Opcode.PRINT:
+                    result = pop()
+                    if measure is not None:
+                        measure(result)
+                    if type(result) is int and result.bit_length() > largeBits:
+                        formatter.write(write, result, '\n' if arg else '')
+                        continue
+                    result = str(result)
+                    if arg:
+                        result += '\n'
+                    write(result)
+                elif opcode == Opcode.PRINT_VAR:
+                    slot, appendNextLine = arg
+                    result = slots[slot].value
+                    if measure is not None:
+                        measure(result)
+                    if type(result) is int and result.bit_length() > largeBits:
+                        formatter.write(write, result, '\n' if appendNextLine else '')
+                        continue
+                    result = str(result)
+                    if appendNextLine:
+                        result += '\n'
+                    write(result)
+                elif opcode == Opcode.DEFINE:
+                    varName, varType = arg
+                    variables.define(Variable(varName, varType, pop()))
+                    if measure is not None:
+                        measure(slots[-1].value)
+                elif opcode == Opcode.STORE:
+                    slots[arg].value = pop()
+                    if measure is not None:
+                        measure(slots[arg].value)
+                elif opcode == Opcode.INPUT:
+                    slot, varType = arg
+                    output.flush()
+                    _input = self.input()
+                    if varType == Keyword.NUMBER:
+                        try:
+                            _input = int(_input)
+                        except ValueError:
+                            raise Error(Error.INVALID_DATA_TYPE_INPUT, self.program.getErrorArgs(context))
+                    slots[slot].value = _input
+                elif opcode == Opcode.SAVE:
+                    temporaries[arg] = stack[-1]
+                elif opcode == Opcode.RESTORE:
+                    push(temporaries[arg])
+                elif opcode == Opcode.ERROR:
+                    code, details = arg
+                    raise Error(code, details)
+                elif opcode == Opcode.CALL:
+                    function, count = arg
+                    operands = stack[-count:]
+                    del stack[-count:]
+                    push(function(*operands))
+        except ArithmeticError:
+            raise Error(Error.INVALID_OPERATIONS, self.program.getErrorArgs(context))
+        except DigitLimitError:
+            raise Error(Error.DIGIT_LIMIT, (formatter.maxDigits,) + self.program.getErrorArgs(context))
+
+# Translation of a compiled program into the source of a single Python function, compiled once.
+# Variables are local variables of the function and operations are native Python operations.
+# Values are computed in the same order as VirtualMachine: at most one operation is pending
+# within the expression being built, any other is first assigned to a temporary.
+class Transpiler:
+    # Name of the function in the generated source.
+    FUNCTION = 'program'
+    # Arguments of the function, the functions and values used by the generated code.
+    ARGUMENTS = ('_print', '_read', '_int', '_sum', '_root', '_distance', '_raiseMod', '_Error', '_contexts')
+    # Deepest operation kept within a single Python expression, below the nesting limits of Python.
+    MAX_DEPTH = 20
+    
+    def __init__(self, program):
+        self.program = program
+        self.lines = []
+        # Position in contexts of the error context of each line.
+        self.lineContexts = []
+        self.contexts = []
+        self.context = -1
+        # Values of the stack as (expression, is an operation, depth).
+        self.stack = []
+        # Position in the stack of the pending operation.
+        self.pending = None
+        self.temporaries = 0
+        # Name and type of the variable of each slot.
+        self.defines = []
+    
+    def addLine(self, line):
+        self.lines.append('    ' + line)
+        self.lineContexts.append(self.context)
+    
+    @staticmethod
+    # Python literal of a value, in hexadecimal for a large integer as there is no limit on its digits.
+    # A negative integer is enclosed in parentheses, otherwise -2 ** 2 would be -(2 ** 2).
+    def getLiteral(value):
+        if type(value) is not int:
+            return repr(value)
+        literal = hex(value) if value.bit_length() > 64 else repr(value)
+        return '(%s)' % literal if value < 0 else literal
+    
+    # Compute the value at the position of the stack now, keeping it in a temporary.
+    def assign(self, position, name = None):
+        if name is None:
+            name = '_t%d' % self.temporaries
+            self.temporaries += 1
+        self.addLine('%s = %s' % (name, self.stack[position][0]))
+        self.stack[position] = (name, False, 0)
+        if self.pending == position:
+            self.pending = None
+    
+    # Replace the count values at the top of the stack by the expression of an operation on them.
+    # The pending operation is computed first if it is not one of the operands.
+    def apply(self, count, expression, operands):
+        if self.pending is not None and self.pending < len(self.stack) - count:
+            self.assign(self.pending)
+        depth = 1 + max([operand[2] for operand in operands] or [0])
+        del self.stack[len(self.stack) - count:]
+        self.stack.append((expression, True, depth))
+        self.pending = len(self.stack) - 1
+        if depth > self.MAX_DEPTH:
+            self.assign(self.pending)
+    
+    # Remove the value at the top of the stack and return its expression.
+    def pop(self):
+        expression = self.stack.pop()[0]
+        if self.pending == len(self.stack):
+            self.pending = None
+        if not self.stack:
+            self.temporaries = 0
+        return expression
+    
+    # Compute the pending operation now, discarding its value.
+    def discardPending(self):
+        if self.pending is not None:
+            self.addLine(self.stack[self.pending][0])
+            self.pending = None
+    
+    # Generate the source of the function.
+    def generate(self):
+        functions = {
+            Opcode.ADD: '(%s + %s)',
+            Opcode.SUB: '(%s - %s)',
+            Opcode.MUL: '(%s * %s)',
+            Opcode.DIV: '(%s // %s)',
+            Opcode.MOD: '(%s %% %s)',
+            Opcode.RAISE: '_int(%s ** %s)',
+        }
+        stack = self.stack
+        
+        for opcode, arg in self.program.code:
+            if opcode == Opcode.PUSH:
+                stack.append((self.getLiteral(arg), False, 0))
+            elif opcode == Opcode.LOAD:
+                stack.append(('_v%d' % arg, False, 0))
+            elif opcode == Opcode.CONTEXT:
+                # The pending operation fails with the context before this one.
+                if self.pending is not None:
+                    self.assign(self.pending)
+                self.context = len(self.contexts)
+                self.contexts.append(arg)
+            elif opcode in functions:
+                operand1, operand2 = stack[-1], stack[-2]
+                self.apply(2, functions[opcode] % (operand1[0], operand2[0]), (operand1, operand2))
+            elif opcode == Opcode.ROOT:
+                operand1, operand2 = stack[-1], stack[-2]
+                self.apply(2, '_root(%s, %s)' % (operand1[0], operand2[0]), (operand1, operand2))
+            elif opcode == Opcode.RAISE_MOD:
+                operand1, operand2, operand3 = stack[-1], stack[-2], stack[-3]
+                self.apply(3, '_raiseMod(%s, %s, %s)' % (operand1[0], operand2[0], operand3[0]), (operand1, operand2, operand3))
+            elif opcode == Opcode.MEAN:
+                operands = stack[-arg:]
+                expression = '(_sum((%s,)) // %d)' % (', '.join(operand[0] for operand in operands), arg)
+                self.apply(arg, expression, operands)
+            elif opcode == Opcode.DIST:
+                operand4, operand3, operatorAnd, operand2, operand1 = stack[-5:]
+                expression = '_distance(%s, %s, %s, %s)' % (operand1[0], operand2[0], operand3[0], operand4[0])
+                self.apply(5, expression, stack[-5:])
+            elif opcode == Opcode.DROP:
+                # The pending operation is computed even if its value is discarded, as it may fail.
+                if self.pending is not None and self.pending >= len(stack) - arg:
+                    self.discardPending()
+                del stack[len(stack) - arg:]
+                if not stack:
+                    self.temporaries = 0
+            elif opcode == Opcode.SAVE:
+                self.assign(len(stack) - 1, '_s%d' % arg)
+            elif opcode == Opcode.RESTORE:
+                stack.append(('_s%d' % arg, False, 0))
+            elif opcode == Opcode.PRINT:
+                self.addLine('_print(%s, %r)' % (self.pop(), '\n' if arg else ''))
+            elif opcode == Opcode.PRINT_VAR:
+                slot, appendNextLine = arg
+                self.addLine('_print(_v%d, %r)' % (slot, '\n' if appendNextLine else ''))
+            elif opcode == Opcode.DEFINE:
+                self.addLine('_v%d = %s' % (len(self.defines), self.pop()))
+                self.defines.append(arg)
+            elif opcode == Opcode.STORE:
+                self.addLine('_v%d = %s' % (arg, self.pop()))
+            elif opcode == Opcode.INPUT:
+                slot, varType = arg
+                self.addLine('_v%d = _read(_contexts[%d], %r)' % (slot, self.context, varType))
+            elif opcode == Opcode.ERROR:
+                self.discardPending()
+                self.addLine('raise _Error(%r, %r)' % arg)
+        
+        header = 'def %s(%s):' % (self.FUNCTION, ', '.join(self.ARGUMENTS))
+        return '\n'.join([header] + self.lines + ['    return locals()', ''])
+    
+    # Return the code of the program as (code object, error contexts, context of each line, variables).
+    def transpile(self):
+        source = self.generate()
+        code = compile(source, '<%s>' % self.FUNCTION, 'exec')
+        return (code, tuple(self.contexts), tuple(self.lineContexts), tuple(self.defines))
+
+# Execution of a program translated by Transpiler, with the same output, variables and errors as VirtualMachine.
+class NativeMachine:
+    def __init__(self, program, variables, output = None, formatter = None):
+        self.program = program
+        self.variables = variables
+        self.output = BufferedOutput() if output is None else output
+        self.formatter = Formatter() if formatter is None else formatter
+        # Read a line of input for the INPUT statement.
+        self.input = input
+    
+    # Write the value of a PRINT statement.
+    def print(self, value, end):
+        self.formatter.write(self.output.write, value, end)
+    
+    # Read the input of a variable of the given type.
+    def read(self, context, varType):
+        self.output.flush()
+        _input = self.input()
+        if varType == Keyword.NUMBER:
+            try:
+                _input = int(_input)
+            except ValueError:
+                raise Error(Error.INVALID_DATA_TYPE_INPUT, self.program.getErrorArgs(context))
+        return _input
+    
+    def run(self):
+        code, contexts, lineContexts, defines = self.program.getNative()
+        namespace = {}
+        exec(code, namespace)
+        function = namespace[Transpiler.FUNCTION]
+        
+        try:
+            try:
+                values = function(self.print, self.read, int, sum, Arithmetic.root, Arithmetic.distance, \
+                                  Arithmetic.raiseMod, Error, contexts)
+            except BaseException as exception:
+                # Retrieve the variables and the line of the generated code where it failed.
+                traceback = exception.__traceback__
+                while traceback is not None and traceback.tb_frame.f_code is not function.__code__:
+                    traceback = traceback.tb_next
+                if traceback is None:
+                    raise
+                self.define(defines, traceback.tb_frame.f_locals)
+                if isinstance(exception, (ArithmeticError, DigitLimitError)):
+                    # The first line is the function definition.
+                    args = self.program.getErrorArgs(contexts[lineContexts[traceback.tb_lineno - 2]])
+                    if isinstance(exception, DigitLimitError):
+                        raise Error(Error.DIGIT_LIMIT, (self.formatter.maxDigits,) + args) from None
+                    raise Error(Error.INVALID_OPERATIONS, args) from None
+                raise
+        except BaseException:
+            self.output.flush()
+            raise
+        self.define(defines, values)
+        self.output.flush()
+    
+    # Define the variables with their values at the end of the execution.
+    def define(self, defines, values):
+        for slot, (varName, varType) in enumerate(defines):
+            name = '_v%d' % slot
+            if name not in values:
+                break
+            self.variables.define(Variable(varName, varType, values[name]))
+
+# Program of a single value evaluated by ParallelMachine in another process, without the token/lexeme table.
+# The context of an error is kept so that its message is rebuilt with the table of the whole program.
+class ValueProgram:
+    def __init__(self, code):
+        self.code = code
+        self.context = None
+    
+    def getErrorArgs(self, context):
+        self.context = context
+        return (context[0], '')
+
+# Execution of a compiled program with its costly statements evaluated at the same time on a pool of processes.
+# The program has no branches, so the statement whose value each LOAD reads is known before running.
+# A statement storing or printing a value computed with RAISE, ROOT or RAISE_MOD is sent to a process
+# as soon as the values it reads are known, up to PARALLEL_STATEMENTS statements ahead.
+# The statements still take effect in order: the values are stored, and the output, inputs and errors happen,
+# exactly as with VirtualMachine, which executes all the other statements.
+class ParallelMachine:
+    # Operations costly enough to be evaluated by another process.
+    COSTLY = (Opcode.RAISE, Opcode.ROOT, Opcode.RAISE_MOD)
+    # Instructions of a value without side effect.
+    VALUE = (Opcode.CONTEXT, Opcode.PUSH, Opcode.LOAD, Opcode.ADD, Opcode.SUB, Opcode.MUL, Opcode.DIV, Opcode.MOD, \
+             Opcode.RAISE, Opcode.ROOT, Opcode.MEAN, Opcode.DIST, Opcode.RAISE_MOD, Opcode.DROP, Opcode.SAVE, \
+             Opcode.RESTORE)
+    # Instructions ending a statement once the stack is empty.
+    ENDS = (Opcode.DEFINE, Opcode.STORE, Opcode.DROP, Opcode.INPUT, Opcode.PRINT, Opcode.PRINT_VAR, Opcode.ERROR)
+    
+    def __init__(self, program, variables, output = None, formatter = None, processes = None):
+        self.program = program
+        self.variables = variables
+        self.output = BufferedOutput() if output is None else output
+        self.formatter = Formatter() if formatter is None else formatter
+        # Read a line of input for the INPUT statement.
+        self.input = input
+        self.processes = processes
+        # Number of statements evaluated by the processes.
+        self.evaluated = 0
+    
+    @staticmethod
+    # Split the instructions into statements, the stack being empty after each of them.
+    def getStatements(code):
+        statements = []
+        start = 0
+        depth = 0
+        for position, (opcode, arg) in enumerate(code):
+            if opcode in (Opcode.PUSH, Opcode.LOAD, Opcode.RESTORE):
+                depth += 1
+            elif opcode in Opcode.functions or opcode in (Opcode.DEFINE, Opcode.STORE, Opcode.PRINT):
+                depth -= 1
+            elif opcode == Opcode.MEAN:
+                depth = depth - arg + 1 if arg else 1
+            elif opcode == Opcode.DIST:
+                depth -= 4
+            elif opcode == Opcode.RAISE_MOD:
+                depth -= 2
+            elif opcode == Opcode.DROP:
+                depth = depth - arg if arg else 0
+            # Removing more values than there are leaves the stack empty.
+            depth = max(depth, 0)
+            if depth == 0 and opcode in ParallelMachine.ENDS:
+                statements.append(code[start:position + 1])
+                start = position + 1
+        if start < len(code):
+            statements.append(code[start:])
+        return statements
+    
+    @staticmethod
+    # Check that a statement only stores or prints a costly value, its temporaries being saved before being restored.
+    def isCostly(statement):
+        if statement[-1][0] not in (Opcode.DEFINE, Opcode.STORE, Opcode.DROP, Opcode.PRINT):
+            return False
+        costly = False
+        saved = set()
+        for opcode, arg in statement[:-1]:
+            if opcode not in ParallelMachine.VALUE or (opcode == Opcode.RESTORE and arg not in saved):
+                return False
+            if opcode == Opcode.SAVE:
+                saved.add(arg)
+            costly = costly or opcode in ParallelMachine.COSTLY
+        return costly
+    
+    @staticmethod
+    # Group the statements into the units executed in order, each as (instructions, reads, last instructions).
+    # A costly statement is a unit of its own, its instructions storing the value in the slot following the values
+    # it reads, each read as (slot, unit assigning the slot last or -1), and its last instructions storing or
+    # printing the value with the context of the statement.
+    # The other statements in a row are a single unit executed by VirtualMachine, without reads.
+    # Each unit starts with the context of the instructions before it, for the errors.
+    # The slots of the variables defined by the program follow the slotCount ones already defined.
+    def getUnits(code, slotCount):
+        units = []
+        inline = []
+        # Last unit assigning each slot.
+        writers = {}
+        context = None
+        for statement in ParallelMachine.getStatements(code):
+            prefix = [(Opcode.CONTEXT, context)] if context is not None and statement[0][0] != Opcode.CONTEXT else []
+            if ParallelMachine.isCostly(statement):
+                if inline:
+                    units.append((inline, None, None))
+                    inline = []
+                reads = []
+                positions = {}
+                code = prefix
+                for opcode, arg in statement[:-1]:
+                    if opcode == Opcode.LOAD:
+                        if arg not in positions:
+                            positions[arg] = len(reads)
+                            reads.append((arg, writers.get(arg, -1)))
+                        arg = positions[arg]
+                    code.append((opcode, arg))
+                code.append((Opcode.STORE, len(reads)))
+                contexts = [arg for opcode, arg in statement if opcode == Opcode.CONTEXT]
+                units.append((code, reads, [(Opcode.CONTEXT, contexts[-1] if contexts else context), statement[-1]]))
+                unit = len(units) - 1
+            else:
+                inline += statement if inline else prefix + statement
+                unit = len(units)
+            
+            for opcode, arg in statement:
+                if opcode == Opcode.CONTEXT:
+                    context = arg
+                elif opcode == Opcode.DEFINE:
+                    writers[slotCount] = unit
+                    slotCount += 1
+                elif opcode == Opcode.STORE:
+                    writers[arg] = unit
+                elif opcode == Opcode.INPUT:
+                    writers[arg[0]] = unit
+        if inline:
+            units.append((inline, None, None))
+        return units
+    
+    @staticmethod
+    # Evaluate the instructions of a value in a worker process, the LOAD instructions reading the given values.
+    # Return (True, value), or (False, context) if the evaluation fails.
+    def evaluate(code, values):
+        variables = Variables()
+        for value in values + [None]:
+            variables.variables.append(Variable(None, Keyword.NUMBER, value))
+        program = ValueProgram(code)
+        try:
+            VirtualMachine(program, variables).execute(None)
+        except Error:
+            return (False, program.context)
+        return (True, variables.variables[-1].value)
+    
+    # Values read by a costly unit, or None if one of them is not known yet.
+    # The units before the next one have taken effect, the others are known once evaluated without error.
+    def getValues(self, reads, nextUnit, results):
+        slots = self.variables.variables
+        values = []
+        for slot, writer in reads:
+            if writer < nextUnit:
+                values.append(slots[slot].value)
+            elif results.get(writer, (False,))[0]:
+                values.append(results[writer][1])
+            else:
+                return None
+        return values
+    
+    @staticmethod
+    # Main loop of a worker process, evaluating the values sent by the machine until the connection is closed.
+    def serve(connection):
+        while True:
+            try:
+                code, values = connection.recv()
+            except EOFError:
+                return
+            try:
+                result = ParallelMachine.evaluate(code, values)
+            except Exception as exception:
+                result = (None, exception)
+            connection.send(result)
+    
+    @staticmethod
+    # Start a worker process, as [process, connection, unit being evaluated or None].
+    def startWorker():
+        connection, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target = ParallelMachine.serve, args = (child,), daemon = True)
+        process.start()
+        child.close()
+        return [process, connection, None]
+    
+    @staticmethod
+    def stopWorker(worker):
+        worker[1].close()
+        worker[0].kill()
+        worker[0].join()
+    
+    # Send the waiting units whose values are known to the idle workers, the first ones first,
+    # then keep the results received within the timeout in seconds, None to wait for the first one.
+    def dispatch(self, units, nextUnit, waiting, workers, results, timeout):
+        for worker in workers:
+            if worker[2] is not None:
+                continue
+            for position, unit in enumerate(waiting):
+                values = self.getValues(units[unit][1], nextUnit, results)
+                if values is not None:
+                    del waiting[position]
+                    worker[1].send((units[unit][0], values))
+                    worker[2] = unit
+                    break
+            else:
+                break
+        
+        connections = { worker[1]: worker for worker in workers if worker[2] is not None }
+        for connection in multiprocessing.connection.wait(list(connections), timeout):
+            worker = connections[connection]
+            try:
+                results[worker[2]] = connection.recv()
+            except (EOFError, OSError) as err:
+                # The worker died e.g., out of memory.
+                results[worker[2]] = (None, err)
+                ParallelMachine.stopWorker(worker)
+                worker[:] = ParallelMachine.startWorker()
+            worker[2] = None
+    
+    def run(self):
+        machine = VirtualMachine(self.program, self.variables, self.output, self.formatter)
+        machine.input = self.input
+        units = ParallelMachine.getUnits(self.program.code, len(self.variables.variables))
+        if all(reads is None for code, reads, last in units):
+            machine.run()
+            return
+        
+        workers = []
+        # Evaluated units as (True, value), (False, context) or (None, exception).
+        results = {}
+        # Costly units not sent yet in order, and the next unit to look at.
+        waiting = []
+        ahead = 0
+        try:
+            try:
+                for _ in range(self.processes or os.cpu_count() or 1):
+                    workers.append(ParallelMachine.startWorker())
+                for index, (code, reads, last) in enumerate(units):
+                    while ahead < len(units) and ahead <= index + Constants.PARALLEL_STATEMENTS:
+                        if units[ahead][1] is not None:
+                            waiting.append(ahead)
+                        ahead += 1
+                    self.dispatch(units, index, waiting, workers, results, 0)
+                    
+                    if reads is None:
+                        machine.execute(code)
+                        continue
+                    while index not in results:
+                        # The unit taking effect next never waits for the ones after it: a worker evaluating
+                        # one of them is restarted, and the unit is sent again later.
+                        if index in waiting and all(worker[2] is not None for worker in workers):
+                            worker = max(workers, key = lambda worker: worker[2])
+                            bisect.insort(waiting, worker[2])
+                            ParallelMachine.stopWorker(worker)
+                            worker[:] = ParallelMachine.startWorker()
+                        self.dispatch(units, index, waiting, workers, results, None)
+                    
+                    self.evaluated += 1
+                    success, value = results.pop(index)
+                    if success is None:
+                        raise value
+                    if not success:
+                        raise Error(Error.INVALID_OPERATIONS, self.program.getErrorArgs(value))
+                    if last[-1][0] != Opcode.DROP:
+                        machine.execute([(Opcode.PUSH, value)] + last)
+            finally:
+                for worker in workers:
+                    ParallelMachine.stopWorker(worker)
+        except BaseException:
+            self.output.flush()
+            raise
+        self.output.flush()
+
+# Values of the costly operations already computed, the least recently used being removed first once
+# the values and the operands of their keys take more than maxBytes bytes, as measured by sys.getsizeof.
+# An operation is kept by its opcode and the values of its operands, whatever the instructions computing them,
+# so that the values stay valid for any expression, statement, run or program.
+class ExpressionCache:
+    def __init__(self, maxBytes = Constants.MEMO_BYTES):
+        self.maxBytes = maxBytes
+        # Values as (value, size in bytes) by key, the least recently used first.
+        self.values = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    # Key of the value of the operation with the operands in the order of the stack.
+    def getKey(opcode, operands):
+        return (opcode,) + tuple(operands)
+    
+    # Retrieve the value of the key, or None if it is not kept.
+    def get(self, key):
+        item = self.values.pop(key, None)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.values[key] = item
+        return item[0]
+    
+    def put(self, key, value):
+        size = sys.getsizeof(value) + sum(map(sys.getsizeof, key))
+        if size > self.maxBytes:
+            return
+        while self.values and self.size + size > self.maxBytes:
+            self.size -= self.values.pop(next(iter(self.values)))[1]
+            self.evictions += 1
+        self.values[key] = (value, size)
+        self.size += size
+    
+    # Display the number of hits, misses and evictions, and the values kept.
+    def display(self):
+        print(Message.get('MEMO_TITLE'))
+        print(Message.get('MEMO_STATS') % (self.hits, self.misses, self.evictions, len(self.values), self.size))
+
+# Execution of a compiled program by VirtualMachine reusing the value of each costly operation computed before
+# with the same operands, see ExpressionCache, including the operations within an expression e.g., RAISE x 1000
+# in ROOT 3 RAISE x 1000. The cache is kept from one run to the next and may be shared by several programs.
+# An operation that fails is computed again each time, so the output, inputs, errors and variables are the same
+# as VirtualMachine.
+class MemoizedMachine:
+    # Number of operands of each costly operation.
+    OPERANDS = { Opcode.RAISE: 2, Opcode.ROOT: 2, Opcode.RAISE_MOD: 3 }
+    
+    def __init__(self, program, variables, output = None, formatter = None, cache = None):
+        self.program = program
+        self.variables = variables
+        self.output = BufferedOutput() if output is None else output
+        self.formatter = Formatter() if formatter is None else formatter
+        # Read a line of input for the INPUT statement.
+        self.input = input
+        self.cache = ExpressionCache() if cache is None else cache
+    
+    @staticmethod
+    # Compute the costly operation with the operands in the order of the stack, like VirtualMachine.
+    def compute(opcode, operands):
+        if opcode == Opcode.RAISE_MOD:
+            modulus, exponent, base = operands
+            return Arithmetic.raiseMod(base, exponent, modulus)
+        operand2, operand1 = operands
+        return Opcode.functions[opcode](operand1, operand2)
+    
+    # Function called instead of the costly operation, reusing its values.
+    def getFunction(self, opcode):
+        cache = self.cache
+        def function(*operands):
+            key = ExpressionCache.getKey(opcode, operands)
+            value = cache.get(key)
+            if value is None:
+                value = MemoizedMachine.compute(opcode, operands)
+                cache.put(key, value)
+            return value
+        return function
+    
+    # Instructions of the program, each costly operation being a call of its function.
+    def getCode(self):
+        calls = { opcode: (Opcode.CALL, (self.getFunction(opcode), count)) \
+                  for opcode, count in MemoizedMachine.OPERANDS.items() }
+        return [calls.get(instruction[0], instruction) for instruction in self.program.code]
+    
+    def run(self):
+        machine = VirtualMachine(self.program, self.variables, self.output, self.formatter)
+        machine.input = self.input
+        machine.run(self.getCode())
+        self.output.flush()
+
+# Execution of a compiled program over a table of inputs, each row being a separate run of the program
+# whose INPUT statements read the columns of the row in order.
+# Each instruction is executed once for all the rows: a value is either the same for all the rows
+# or a column holding the value of each row. Columns are numpy arrays when numpy is installed,
+# of int64 as long as the values fit, otherwise of Python values. Any operation that numpy cannot do
+# exactly is done row by row the same way as VirtualMachine. A row stops at its first error,
+# the other rows go on.
+class VectorMachine:
+    # Exclusive bound of the int64 results, whatever the default integer of numpy on the platform.
+    INT64_BOUND = int(numpy.iinfo(numpy.int64).max) + 1 if numpy is not None else 1 << 63
+    # Largest magnitude kept in an int64 column, so that adding two of them cannot overflow.
+    LIMIT = INT64_BOUND >> 1
+    
+    # The table is a list of rows, each a list of input lines, or a 2-dimensional numpy array.
+    def __init__(self, program, table, formatter = None):
+        self.program = program
+        self.table = table
+        self.formatter = Formatter() if formatter is None else formatter
+        # Position in the table of the rows still running.
+        self.active = numpy.arange(len(table), dtype = numpy.int64) if numpy is not None else list(range(len(table)))
+        # Error message of each row, None if the row ran up to its end.
+        self.errors = [None] * len(table)
+        # Output of the rows as (rows, text of each row or of all the rows, text appended to each row).
+        self.outputs = []
+        self.stack = []
+        self.slots = []
+        self.temporaries = {}
+        self.context = None
+        self.inputs = 0
+    
+    def isColumn(self, value):
+        if numpy is not None:
+            return isinstance(value, numpy.ndarray)
+        return isinstance(value, list)
+    
+    # Check if the value is an int64 column or an integer within its limit.
+    def isInt64(self, value):
+        if numpy is not None and isinstance(value, numpy.ndarray):
+            return value.dtype == numpy.int64
+        return type(value) is int and numpy is not None and abs(value) <= self.LIMIT
+    
+    # Largest magnitude of an int64 column or integer, computed with Python integers since the absolute value
+    # of the smallest int64 does not fit.
+    def getBound(self, value):
+        if isinstance(value, numpy.ndarray):
+            return max(-int(value.min()), int(value.max()), 0) if len(value) else 0
+        return abs(value)
+    
+    # Iterate the value of each active row.
+    def iterate(self, value):
+        if not self.isColumn(value):
+            return itertools.repeat(value, len(self.active))
+        return value.tolist() if numpy is not None else value
+    
+    # Create a column from the values of the active rows.
+    def toColumn(self, values):
+        if numpy is None:
+            return values
+        if set(map(type, values)) <= { int } and (not values or max(values) <= self.LIMIT and min(values) >= -self.LIMIT):
+            return numpy.array(values, dtype = numpy.int64)
+        column = numpy.empty(len(values), dtype = object)
+        column[:] = values
+        return column
+    
+    # Keep an int64 column within its limit.
+    def normalize(self, column):
+        if self.getBound(column) > self.LIMIT:
+            return column.astype(object)
+        return column
+    
+    def select(self, value, keep):
+        if not self.isColumn(value):
+            return value
+        if numpy is not None:
+            return value[keep]
+        return [item for item, kept in zip(value, keep) if kept]
+    
+    # Error message for an exception raised by the rows, the same as displayed by VirtualMachine.
+    def getErrorMessage(self, exception):
+        if isinstance(exception, Error):
+            return str(exception)
+        if isinstance(exception, ArithmeticError):
+            return str(Error(Error.INVALID_OPERATIONS, self.program.getErrorArgs(self.context)))
+        if isinstance(exception, DigitLimitError):
+            return str(Error(Error.DIGIT_LIMIT, (self.formatter.maxDigits,) + self.program.getErrorArgs(self.context)))
+        return Error.getMessage('GENERAL_ERROR')
+    
+    # Stop the active rows at the given positions with the error message, or the message of each row.
+    # Return which of the active rows are kept, to select the values taken from the stack.
+    def stopRows(self, positions, messages):
+        active = self.active
+        if isinstance(messages, str):
+            messages = itertools.repeat(messages)
+        for position, message in zip(positions, messages):
+            self.errors[active[position]] = message
+        if numpy is not None:
+            keep = numpy.ones(len(active), dtype = bool)
+            keep[positions] = False
+        else:
+            keep = [True] * len(active)
+            for position in positions:
+                keep[position] = False
+        self.active = self.select(active, keep)
+        self.stack[:] = [self.select(value, keep) for value in self.stack]
+        self.slots[:] = [self.select(value, keep) for value in self.slots]
+        self.temporaries = { index: self.select(value, keep) for index, value in self.temporaries.items() }
+        return keep
+    
+    # Apply the function row by row, stopping the rows that fail.
+    def applyRows(self, function, *operands):
+        if not any(self.isColumn(operand) for operand in operands):
+            try:
+                return function(*operands)
+            except Exception as exception:
+                self.stopRows(range(len(self.active)), self.getErrorMessage(exception))
+                return None
+        
+        results = []
+        positions = []
+        messages = []
+        for position, args in enumerate(zip(*[self.iterate(operand) for operand in operands])):
+            try:
+                results.append(function(*args))
+            except Exception as exception:
+                positions.append(position)
+                messages.append(self.getErrorMessage(exception))
+        
+        # The results are only of the rows that did not fail.
+        if positions:
+            self.stopRows(positions, messages)
+        return self.toColumn(results)
+    
+    # Execute a binary arithmetic operation, with numpy if the result is exact.
+    def binaryOperation(self, opcode, operand1, operand2):
+        if numpy is not None and (self.isColumn(operand1) or self.isColumn(operand2)) \
+            and self.isInt64(operand1) and self.isInt64(operand2):
+            bound1 = self.getBound(operand1)
+            bound2 = self.getBound(operand2)
+            if opcode == Opcode.ADD and bound1 + bound2 < self.INT64_BOUND:
+                return self.normalize(numpy.add(operand1, operand2, dtype = numpy.int64))
+            if opcode == Opcode.SUB and bound1 + bound2 < self.INT64_BOUND:
+                return self.normalize(numpy.subtract(operand1, operand2, dtype = numpy.int64))
+            if opcode == Opcode.MUL and bound1 * bound2 < self.INT64_BOUND:
+                return self.normalize(numpy.multiply(operand1, operand2, dtype = numpy.int64))
+            if opcode in (Opcode.DIV, Opcode.MOD):
+                # Division by zero stops the row.
+                zeros = numpy.flatnonzero(numpy.broadcast_to(numpy.equal(operand2, 0), self.active.shape))
+                if len(zeros):
+                    keep = self.stopRows(zeros, self.getErrorMessage(ZeroDivisionError()))
+                    operand1 = self.select(operand1, keep)
+                    operand2 = self.select(operand2, keep)
+                    if not len(self.active):
+                        return numpy.array([], dtype = numpy.int64)
+                if opcode == Opcode.DIV:
+                    return numpy.floor_divide(operand1, operand2, dtype = numpy.int64)
+                return numpy.remainder(operand1, operand2, dtype = numpy.int64)
+            if opcode == Opcode.RAISE:
+                exponent = int(operand2.min()) if self.isColumn(operand2) and len(operand2) else operand2
+                if not self.isColumn(exponent) and exponent >= 0 \
+                    and bound1.bit_length() * bound2 < self.LIMIT.bit_length():
+                    return numpy.power(operand1, operand2, dtype = numpy.int64)
+        return self.applyRows(Opcode.functions[opcode], operand1, operand2)
+    
+    # Average of the operands, with numpy if the sum cannot overflow.
+    def mean(self, operands):
+        count = len(operands)
+        if numpy is not None and any(self.isColumn(operand) for operand in operands) \
+            and all(self.isInt64(operand) for operand in operands) \
+            and sum(self.getBound(operand) for operand in operands) < self.INT64_BOUND:
+            total = operands[0]
+            for operand in operands[1:]:
+                total = numpy.add(total, operand, dtype = numpy.int64)
+            return numpy.floor_divide(total, count, dtype = numpy.int64)
+        return self.applyRows(lambda *values: sum(values) // count, *operands)
+    
+    # Distance between two points, with numpy if the sum of squares cannot overflow.
+    def distance(self, operand1, operand2, operand3, operand4):
+        operands = (operand1, operand2, operand3, operand4)
+        if numpy is not None and any(self.isColumn(operand) for operand in operands) \
+            and all(self.isInt64(operand) for operand in operands) \
+            and (self.getBound(operand1) + self.getBound(operand3)) ** 2 + \
+                (self.getBound(operand2) + self.getBound(operand4)) ** 2 <= self.LIMIT:
+            difference1 = numpy.subtract(operand1, operand3, dtype = numpy.int64)
+            difference2 = numpy.subtract(operand2, operand4, dtype = numpy.int64)
+            squares = numpy.add(numpy.multiply(difference1, difference1, dtype = numpy.int64), \
+                                numpy.multiply(difference2, difference2, dtype = numpy.int64), dtype = numpy.int64)
+            squares = numpy.broadcast_to(squares, self.active.shape)
+            roots = numpy.trunc(numpy.sqrt(squares.astype(numpy.float64))).astype(numpy.int64)
+            # The float square root can be one off for large sums, move it to the exact integer root.
+            roots -= (roots * roots > squares).astype(numpy.int64)
+            roots += ((roots + 1) * (roots + 1) <= squares).astype(numpy.int64)
+            return roots
+        return self.applyRows(Arithmetic.distance, *operands)
+    
+    # Read the next input line of each active row, converted to int for an integer variable.
+    def input(self, varType):
+        index = self.inputs
+        self.inputs += 1
+        
+        if numpy is not None and isinstance(self.table, numpy.ndarray):
+            if index >= self.table.shape[1]:
+                self.stopRows(range(len(self.active)), Error.getMessage('GENERAL_ERROR'))
+                return None
+            cells = self.table[self.active, index]
+            if varType == Keyword.NUMBER and cells.dtype.kind == 'i':
+                return self.normalize(cells.astype(numpy.int64))
+            cells = cells.tolist()
+        else:
+            rows = self.table
+            if len(self.active) != len(self.table):
+                rows = [self.table[row] for row in self.iterate(self.active)]
+            try:
+                cells = list(map(operator.itemgetter(index), rows))
+            except IndexError:
+                # A row without enough columns has no more input.
+                cells = [row[index] if index < len(row) else None for row in rows]
+        
+        # Usually all the input lines are valid and can be converted at once.
+        if set(map(type, cells)) == { str }:
+            if varType != Keyword.NUMBER:
+                return self.toColumn(cells)
+            try:
+                return self.toColumn(list(map(int, cells)))
+            except ValueError:
+                pass
+        
+        def convert(cell):
+            if cell is None:
+                raise EOFError()
+            if not isinstance(cell, str):
+                cell = str(cell)
+            if varType != Keyword.NUMBER:
+                return cell
+            try:
+                return int(cell)
+            except ValueError:
+                raise Error(Error.INVALID_DATA_TYPE_INPUT, self.program.getErrorArgs(self.context))
+        
+        return self.applyRows(convert, self.toColumn(cells))
+    
+    # Text of the value of each active row.
+    def format(self, value, appendNextLine):
+        if self.isInt64(value) and self.isColumn(value):
+            texts = value.astype(str).tolist()
+        else:
+            texts = self.applyRows(self.formatter.format, value)
+            if self.isColumn(texts):
+                texts = texts.tolist() if numpy is not None else texts
+        if texts is not None and len(self.active):
+            self.outputs.append((self.active, texts, '\n' if appendNextLine else ''))
+    
+    # Execute all the instructions for all the rows.
+    # Return the output and the error message, or None, of each row.
+    def run(self):
+        try:
+            for opcode, arg in self.program.code:
+                if not len(self.active):
+                    break
+                
+                if opcode == Opcode.PUSH:
+                    self.stack.append(arg)
+                elif opcode == Opcode.LOAD:
+                    self.stack.append(self.slots[arg])
+                elif opcode == Opcode.CONTEXT:
+                    self.context = arg
+                elif opcode in Opcode.functions:
+                    operand1 = self.stack.pop()
+                    operand2 = self.stack.pop()
+                    self.stack.append(self.binaryOperation(opcode, operand1, operand2))
+                elif opcode == Opcode.MEAN:
+                    operands = self.stack[-arg:]
+                    del self.stack[-arg:]
+                    self.stack.append(self.mean(operands))
+                elif opcode == Opcode.DIST:
+                    operand1 = self.stack.pop()
+                    operand2 = self.stack.pop()
+                    self.stack.pop()
+                    operand3 = self.stack.pop()
+                    operand4 = self.stack.pop()
+                    self.stack.append(self.distance(operand1, operand2, operand3, operand4))
+                elif opcode == Opcode.RAISE_MOD:
+                    operand1 = self.stack.pop()
+                    operand2 = self.stack.pop()
+                    operand3 = self.stack.pop()
+                    self.stack.append(self.applyRows(Arithmetic.raiseMod, operand1, operand2, operand3))
+                elif opcode == Opcode.DROP:
+                    del self.stack[-arg:]
+                elif opcode == Opcode.PRINT:
+                    self.format(self.stack.pop(), arg)
+                elif opcode == Opcode.PRINT_VAR:
+                    slot, appendNextLine = arg
+                    self.format(self.slots[slot], appendNextLine)
+                elif opcode == Opcode.DEFINE:
+                    self.slots.append(self.stack.pop())
+                elif opcode == Opcode.STORE:
+                    self.slots[arg] = self.stack.pop()
+                elif opcode == Opcode.INPUT:
+                    slot, varType = arg
+                    value = self.input(varType)
+                    if len(self.active):
+                        self.slots[slot] = value
+                elif opcode == Opcode.SAVE:
+                    self.temporaries[arg] = self.stack[-1]
+                elif opcode == Opcode.RESTORE:
+                    self.stack.append(self.temporaries[arg])
+                elif opcode == Opcode.ERROR:
+                    code, details = arg
+                    self.stopRows(range(len(self.active)), str(Error(code, details)))
+        except Exception:
+            # Anything else fails the same way for all the rows e.g., a malformed stack.
+            self.stopRows(range(len(self.active)), Error.getMessage('GENERAL_ERROR'))
+        
+        return list(zip(self.getOutputs(), self.errors))
+    
+    # Join the output of each row.
+    def getOutputs(self):
+        outputs = [''] * len(self.table)
+        for rows, texts, end in self.outputs:
+            if isinstance(texts, str):
+                texts = itertools.repeat(texts + end)
+            elif end:
+                texts = map(operator.add, texts, itertools.repeat(end))
+            
+            # The rows are in order, so all the rows are there if there are as many.
+            if len(rows) == len(outputs):
+                outputs = list(map(operator.add, outputs, texts))
+            else:
+                for row, text in zip(self.iterate(rows), texts):
+                    outputs[row] += text
+        return outputs
+
+# Lexer adding the time taken to read each token to the line of the token, see Profiler.
+class ProfiledLexer:
+    def __init__(self, lexer, profiler):
+        self.lexer = lexer
+        self.profiler = profiler
+    
+    @property
+    def lineNo(self):
+        return self.lexer.lineNo
+    
+    def getNextToken(self):
+        start = time.perf_counter()
+        token = self.lexer.getNextToken()
+        self.profiler.add(token.lineNo, 'lex', time.perf_counter() - start)
+        return token
+
+# Execution of the program one statement at a time, recording where the time goes.
+# For each source line: the number of statements executed, the time spent lexing, parsing,
+# evaluating and waiting for the INPUT statements, and the size in bits of the largest integer stored or printed.
+# The same figures are summed up for each kind of statement.
+class Profiler:
+    PHASES = ('lex', 'parse', 'eval', 'input')
+    
+    def __init__(self, file):
+        self.file = file
+        # Figures of each source line, by line number.
+        self.lines = {}
+        # Total time of each phase, including the time outside of the statements e.g., flushing the output.
+        self.phases = dict.fromkeys(Profiler.PHASES, 0.0)
+        # Figures of the line of the statement being executed.
+        self.line = None
+        self.read = input
+    
+    # Retrieve the figures of the line, created the first time.
+    def getLine(self, lineNo):
+        line = self.lines.get(lineNo)
+        if line is None:
+            line = self.lines[lineNo] = dict(line = lineNo, kind = '', count = 0, bits = 0, \
+                                             **dict.fromkeys(Profiler.PHASES, 0.0))
+        return line
+    
+    def add(self, lineNo, phase, seconds):
+        self.getLine(lineNo)[phase] += seconds
+        self.phases[phase] += seconds
+    
+    # Read a line of input for the virtual machine, timing the wait.
+    def input(self):
+        start = time.perf_counter()
+        try:
+            return self.read()
+        finally:
+            self.add(self.line['line'], 'input', time.perf_counter() - start)
+    
+    # Keep the size in bits of the largest integer stored or printed by the virtual machine.
+    def measure(self, value):
+        if type(value) is int:
+            bits = value.bit_length()
+            if bits > self.line['bits']:
+                self.line['bits'] = bits
+    
+    # Compile and execute the program read by the lexer, like the stream mode.
+    # The output is flushed at the end, as well as on error.
+    def run(self, lexer, tokens, variables, output = None, formatter = None):
+        lexTime = self.phases['lex']
+        start = time.perf_counter()
+        compiler = Compiler(ProfiledLexer(lexer, self), tokens)
+        self.phases['parse'] += time.perf_counter() - start - (self.phases['lex'] - lexTime)
+        machine = VirtualMachine(Program([], tokens), variables, output, formatter)
+        self.read = machine.input
+        machine.input = self.input
+        machine.measure = self.measure
+        statements = compiler.compileStatements()
+        
+        try:
+            while True:
+                lexTime = self.phases['lex']
+                start = time.perf_counter()
+                code = next(statements, None)
+                if code is None:
+                    break
+                seconds = time.perf_counter() - start - (self.phases['lex'] - lexTime)
+                
+                # Statements are counted on the line they begin, anything else on the current line.
+                statement = compiler.statement
+                self.line = self.getLine(lexer.lineNo if statement is None else statement.lineNo)
+                self.add(self.line['line'], 'parse', seconds)
+                if not code:
+                    continue
+                if statement is not None:
+                    self.line['kind'] = compiler.getStatementKind()
+                self.line['count'] += 1
+                
+                inputTime = self.phases['input']
+                start = time.perf_counter()
+                try:
+                    machine.run(code)
+                finally:
+                    self.add(self.line['line'], 'eval', \
+                             time.perf_counter() - start - (self.phases['input'] - inputTime))
+        finally:
+            start = time.perf_counter()
+            machine.output.flush()
+            self.phases['eval'] += time.perf_counter() - start
+    
+    @staticmethod
+    # Total time of the figures.
+    def getTotal(figures):
+        return sum(figures[phase] for phase in Profiler.PHASES)
+    
+    # Sum up the figures of the lines for each kind of statement, the slowest first.
+    def getKinds(self):
+        kinds = {}
+        for line in self.lines.values():
+            if not line['kind']:
+                continue
+            kind = kinds.get(line['kind'])
+            if kind is None:
+                kind = kinds[line['kind']] = dict(kind = line['kind'], count = 0, bits = 0, \
+                                                  **dict.fromkeys(Profiler.PHASES, 0.0))
+            kind['count'] += line['count']
+            kind['bits'] = max(kind['bits'], line['bits'])
+            for phase in Profiler.PHASES:
+                kind[phase] += line[phase]
+        return sorted(kinds.values(), key = Profiler.getTotal, reverse = True)
+    
+    # Figures of the lines, the slowest first.
+    def getLines(self):
+        return sorted(self.lines.values(), key = Profiler.getTotal, reverse = True)
+    
+    # Display the total time of each phase, the slowest lines then the kinds of statements in the following format:
+    #  LINE <padding> KIND <padding> COUNT <padding> LEX <padding> PARSE <padding> EVAL <padding> INPUT <padding> TOTAL <padding> BITS
+    #  KIND <padding> COUNT <padding> LEX <padding> PARSE <padding> EVAL <padding> INPUT <padding> TOTAL <padding> BITS
+    def display(self, limit = Constants.PROFILE_LINES):
+        print(Message.get('PROFILE_TITLE'))
+        print(Message.get('PROFILE_PHASES') % tuple(self.phases[phase] for phase in Profiler.PHASES))
+        
+        lines = self.getLines()
+        print(Message.get('PROFILE_LINES') % (min(limit, len(lines)), len(lines)))
+        Profiler.displayRows(('line', 'kind'), lines[:limit])
+        
+        print(Message.get('PROFILE_KINDS'))
+        Profiler.displayRows(('kind',), self.getKinds())
+    
+    @staticmethod
+    # Display the given columns of the rows followed by their figures, times being in seconds.
+    def displayRows(columns, rows):
+        padding = 12
+        figures = ('count',) + Profiler.PHASES + ('total', 'bits')
+        
+        print(*[column.upper().ljust(padding) for column in columns], \
+              *[figure.upper().rjust(padding) for figure in figures])
+        for row in rows:
+            row = dict(row, total = Profiler.getTotal(row))
+            print(*[str(row[column]).ljust(padding) for column in columns], \
+                  *[('%.6f' % row[figure] if type(row[figure]) is float else str(row[figure])).rjust(padding) \
+                    for figure in figures])
+    
+    # Write the figures to the file as JSON, the lines and kinds of statements being the slowest first.
+    def save(self, file):
+        report = {
+            'file': self.file,
+            'interpreter': Constants.VERSION,
+            'phases': self.phases,
+            'lines': [dict(line, total = Profiler.getTotal(line)) for line in self.getLines()],
+            'kinds': [dict(kind, total = Profiler.getTotal(kind)) for kind in self.getKinds()],
+        }
+        with open(file, 'w') as profileFile:
+            json.dump(report, profileFile, indent = 2)
+
+# Subscribers to the events of a run, see Interpreter.
+# Each callback receives the line number, the time of the event given by time.perf_counter and the details of the event:
+#  TOKEN: the token read by the lexer.
+#  STATEMENT_START: the kind of the statement, see Compiler.getStatementKind.
+#  STATEMENT_END: the kind of the statement and the seconds taken to execute it.
+#  VARIABLE_DEFINED, VARIABLE_UPDATED: the variable, with its new value.
+#  OUTPUT: the text written.
+#  INPUT: the line read and the seconds spent waiting for it.
+#  ERROR: the exception stopping the run, raised again once reported.
+class Hooks:
+    TOKEN = 'TOKEN'
+    STATEMENT_START = 'STATEMENT_START'
+    STATEMENT_END = 'STATEMENT_END'
+    VARIABLE_DEFINED = 'VARIABLE_DEFINED'
+    VARIABLE_UPDATED = 'VARIABLE_UPDATED'
+    OUTPUT = 'OUTPUT'
+    INPUT = 'INPUT'
+    ERROR = 'ERROR'
+    EVENTS = (TOKEN, STATEMENT_START, STATEMENT_END, VARIABLE_DEFINED, VARIABLE_UPDATED, OUTPUT, INPUT, ERROR)
+    
+    def __init__(self):
+        # Callbacks of each event, in order of subscription.
+        self.callbacks = {}
+    
+    # Call the callback on each occurrence of the event.
+    def subscribe(self, event, callback):
+        if event not in Hooks.EVENTS:
+            raise ValueError('unknown event %s' % event)
+        self.callbacks.setdefault(event, []).append(callback)
+    
+    def unsubscribe(self, event, callback):
+        callbacks = self.callbacks.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.callbacks.pop(event, None)
+    
+    # Check if someone subscribed to the event, or to any event.
+    def has(self, event = None):
+        return bool(self.callbacks) if event is None else event in self.callbacks
+    
+    def fire(self, event, lineNo, *details):
+        timestamp = time.perf_counter()
+        for callback in self.callbacks.get(event, ()):
+            callback(lineNo, timestamp, *details)
+
+# Lexer reporting each token read to the subscribers of the TOKEN event.
+class ObservedLexer:
+    def __init__(self, lexer, hooks):
+        self.lexer = lexer
+        self.hooks = hooks
+    
+    @property
+    def lineNo(self):
+        return self.lexer.lineNo
+    
+    def getNextToken(self):
+        token = self.lexer.getNextToken()
+        self.hooks.fire(Hooks.TOKEN, token.lineNo, token)
+        return token
+
+# Output reporting each text written to the subscribers of the OUTPUT event,
+# on the line of the statement being executed by the interpreter.
+class ObservedOutput:
+    def __init__(self, output, interpreter):
+        self.output = output
+        self.interpreter = interpreter
+    
+    def write(self, text):
+        self.output.write(text)
+        self.interpreter.hooks.fire(Hooks.OUTPUT, self.interpreter.lineNo, text)
+    
+    def flush(self):
+        self.output.flush()
+
+class Interpreter:
+    def __init__(self, lexer, tokens, variables, output = None, hooks = None, formatter = None):
+        # Without subscribers, the run is the same as if there were no hooks.
+        self.hooks = hooks if hooks is not None and hooks.has() else None
+        if self.hooks is not None and self.hooks.has(Hooks.TOKEN):
+            lexer = ObservedLexer(lexer, self.hooks)
+        self.compiler = Compiler(lexer, tokens)
+        self.variables = variables
+        self.output = output
+        self.formatter = formatter
+        # Read a line of input for the INPUT statement.
+        self.input = input
+        # Line of the statement being executed.
+        self.lineNo = None
+    
+    # Compile the program then execute it.
+    def parse(self):
+        if self.hooks is not None:
+            self.observe()
+            return
+        machine = VirtualMachine(self.compiler.compile(), self.variables, self.output, self.formatter)
+        machine.input = self.input
+        machine.run()
+    
+    # Compile and execute one statement at a time, reporting the events to the subscribers.
+    # Only the events with subscribers are observed, the others cost nothing.
+    def observe(self):
+        hooks = self.hooks
+        compiler = self.compiler
+        output = BufferedOutput() if self.output is None else self.output
+        if hooks.has(Hooks.OUTPUT):
+            output = ObservedOutput(output, self)
+        machine = VirtualMachine(Program([], compiler.tokens), self.variables, output, self.formatter)
+        machine.input = self.input
+        if hooks.has(Hooks.INPUT):
+            machine.input = lambda: self.read(self.input)
+        variableEvents = hooks.has(Hooks.VARIABLE_DEFINED) or hooks.has(Hooks.VARIABLE_UPDATED)
+        
+        try:
+            for code in compiler.compileStatements():
+                if not code:
+                    continue
+                
+                # Anything outside of the statements e.g., an error before END, is on the current line.
+                kind = compiler.getStatementKind()
+                self.lineNo = compiler.lexer.lineNo if kind is None else compiler.statement.lineNo
+                if kind is not None:
+                    hooks.fire(Hooks.STATEMENT_START, self.lineNo, kind)
+                start = time.perf_counter()
+                machine.run(code)
+                seconds = time.perf_counter() - start
+                if variableEvents:
+                    self.fireVariables(code)
+                if kind is not None:
+                    hooks.fire(Hooks.STATEMENT_END, self.lineNo, kind, seconds)
+        except Exception as err:
+            hooks.fire(Hooks.ERROR, self.lineNo, err)
+            raise
+        output.flush()
+    
+    # Read a line of input with the given function and report it with the time spent waiting.
+    def read(self, read):
+        start = time.perf_counter()
+        line = read()
+        self.hooks.fire(Hooks.INPUT, self.lineNo, line, time.perf_counter() - start)
+        return line
+    
+    # Report the variables defined or updated by the instructions of a statement.
+    def fireVariables(self, code):
+        for opcode, arg in code:
+            if opcode == Opcode.DEFINE:
+                self.hooks.fire(Hooks.VARIABLE_DEFINED, self.lineNo, self.variables.lookup(arg[0]))
+            elif opcode == Opcode.STORE:
+                self.hooks.fire(Hooks.VARIABLE_UPDATED, self.lineNo, self.variables.variables[arg])
+            elif opcode == Opcode.INPUT:
+                self.hooks.fire(Hooks.VARIABLE_UPDATED, self.lineNo, self.variables.variables[arg[0]])
+
+# Outcome of a run by Engine: the output, unless written elsewhere, the symbols table and the error stopping the run, if any.
+class RunResult:
+    def __init__(self, output, variables, error):
+        self.output = output
+        self.variables = variables
+        self.error = error
+    
+    # Retrieve the values of the variables by name.
+    def getValues(self):
+        return { variable.name: variable.value for variable in self.variables.variables }
+
+# Interpreter to embed in an application: programs are given as text, their inputs as any iterable of lines
+# and their output kept in memory or written to any output, without the standard streams.
+# The compiled programs are kept in memory by the hash of their source and reused by the next runs of the same source.
+# Nothing else is kept from one run to the next, so the same engine can run any number of programs.
+class Engine:
+    def __init__(self, native = False, maxDigits = None, cacheSize = Constants.ENGINE_PROGRAMS):
+        self.native = native
+        self.formatter = Formatter(maxDigits)
+        self.cacheSize = cacheSize
+        # Compiled programs by key, the least recently used first.
+        self.programs = {}
+    
+    # Compile the program, or reuse it if the source was already seen.
+    # The token/lexeme table is never displayed, so only the source is kept to format the errors, see SourceTokens.
+    def compile(self, source):
+        key = Cache.getKey(source)
+        program = self.programs.pop(key, None)
+        if program is None:
+            program = Compiler(Lexer.create(source), SourceTokens(source)).compile()
+            if self.native:
+                program.getNative()
+            while self.programs and len(self.programs) >= self.cacheSize:
+                del self.programs[next(iter(self.programs))]
+        if self.cacheSize > 0:
+            self.programs[key] = program
+        return program
+    
+    @staticmethod
+    # Function reading the inputs one line at a time like input(), failing the same way once there are no more.
+    # The inputs are either a text of several lines or any iterable of lines, a line being converted by str() if needed.
+    def getReader(inputs):
+        lines = iter(inputs.splitlines() if isinstance(inputs, str) else inputs)
+        def read():
+            line = next(lines, None)
+            if line is None:
+                raise EOFError
+            line = str(line)
+            return line[:-1] if line.endswith('\n') else line
+        return read
+    
+    # Run the program of the source text. The output is returned as text unless an output with write and flush is given.
+    # The run is observed by the subscribers of the hooks if any, see Interpreter.
+    def run(self, source, inputs = (), output = None, hooks = None):
+        memory = MemoryOutput() if output is None else None
+        variables = Variables()
+        read = Engine.getReader(inputs)
+        error = None
+        try:
+            if not source:
+                raise IOException(Error.EMPTY_FILE)
+            if hooks is not None and hooks.has():
+                interpreter = Interpreter(Lexer.create(source), RecentTokens(), variables, output or memory, hooks, self.formatter)
+                interpreter.input = read
+                interpreter.parse()
+            else:
+                machine = NativeMachine if self.native else VirtualMachine
+                machine = machine(self.compile(source), variables, output or memory, self.formatter)
+                machine.input = read
+                machine.run()
+        except Error as err:
+            error = err
+        except Exception:
+            error = Error(Error.GENERAL_ERROR)
+        return RunResult(memory.getValue() if memory is not None else None, variables, error)
+
+# Run the program of the source text with a new Engine, see Engine.run.
+def run(source, inputs = (), output = None, native = False, maxDigits = None):
+    return Engine(native, maxDigits).run(source, inputs, output)
+
+# Run the program of a file again each time it changes, only lexing again the lines that changed, see IncrementalLexer.
+# The statements of the last run are kept with the output they wrote and the variables they set:
+# the next run reuses them up to the first statement that changed or that reads an input, then executes the rest.
+class Watcher:
+    def __init__(self, file, output = None, formatter = None, interval = Constants.WATCH_INTERVAL):
+        self.file = file
+        self.output = BufferedOutput() if output is None else output
+        self.formatter = formatter
+        self.interval = interval
+        self.lexer = IncrementalLexer()
+        # Statements of the last run as (instructions, output, (slot, name, type, value) of the variables set).
+        self.statements = []
+        # Number of statements of the last run and of statements reused from the run before.
+        self.count = 0
+        self.reused = 0
+        # Modification time and size of the file when it was last read.
+        self.version = None
+    
+    @staticmethod
+    # Set the variables as a statement of the last run did.
+    def replay(variables, effects):
+        for slot, varName, varType, value in effects:
+            if slot == len(variables.variables):
+                variables.define(Variable(varName, varType, value))
+            else:
+                variables.variables[slot].value = value
+    
+    # Run the current version of the program and return its variables and the error stopping it, if any.
+    def run(self):
+        variables = Variables()
+        output = RecordedOutput(self.output)
+        statements = []
+        self.count = 0
+        self.reused = 0
+        try:
+            self.version = self.getVersion()
+            File.check(self.file)
+            compiler = Compiler(self.lexer.getLexer(File.getFileContent(self.file)), Tokens())
+            machine = VirtualMachine(Program([], compiler.tokens), variables, output, self.formatter)
+            
+            reusable = True
+            for code in compiler.compileStatements():
+                if not code:
+                    continue
+                position = self.count
+                self.count += 1
+                reusable = reusable and position < len(self.statements) and self.statements[position][0] == code and \
+                           all(opcode != Opcode.INPUT for opcode, arg in code)
+                if reusable:
+                    statement = self.statements[position]
+                    output.write(statement[1])
+                    Watcher.replay(variables, statement[2])
+                    statements.append(statement)
+                    self.reused += 1
+                    continue
+                
+                start = len(output.parts)
+                machine.run(code)
+                effects = []
+                for opcode, arg in code:
+                    if opcode in (Opcode.DEFINE, Opcode.STORE, Opcode.INPUT):
+                        slot = len(variables.variables) - 1 if opcode == Opcode.DEFINE else \
+                               arg if opcode == Opcode.STORE else arg[0]
+                        variable = variables.variables[slot]
+                        effects.append((slot, variable.name, variable._type, variable.value))
+                statements.append((code, ''.join(output.parts[start:]), effects))
+            output.flush()
+        except Error as err:
+            return variables, err
+        except Exception:
+            return variables, Error(Error.GENERAL_ERROR)
+        finally:
+            self.statements = statements
+        return variables, None
+    
+    # Retrieve the modification time and size of the file, None if it cannot be read.
+    def getVersion(self):
+        try:
+            stat = os.stat(self.file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    # Wait until the file changes from the version last read, checking every interval seconds.
+    def wait(self):
+        while self.getVersion() == self.version:
+            time.sleep(self.interval)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Interpreter for INTERPOL programs.')
+    parser.add_argument('--stream', action = 'store_true', \
+                        help = 'read the program in chunks and execute each statement as soon as it is compiled')
+    parser.add_argument('--no-token-table', action = 'store_true', \
+                        help = 'do not keep nor display the token/lexeme table')
+    parser.add_argument('--buffer-size', type = int, default = Constants.OUTPUT_BUFFER_SIZE, \
+                        help = 'number of characters of output kept before writing them, 0 to write each output right away')
+    parser.add_argument('--native', action = 'store_true', \
+                        help = 'translate the program to Python code and execute it natively')
+    parser.add_argument('--max-digits', type = int, default = None, \
+                        help = 'largest number of digits of a printed integer, 0 for no limit, by default the limit of Python')
+    parser.add_argument('--profile', action = 'store_true', \
+                        help = 'time the lexing, parsing, evaluation and input of each line and display the slowest ones')
+    parser.add_argument('--profile-output', \
+                        help = 'JSON file of the profile, by default <name>%s next to the program' % Constants.PROFILE_EXTENSION)
+    parser.add_argument('--profile-lines', type = int, default = Constants.PROFILE_LINES, \
+                        help = 'number of lines displayed by the profile, the slowest first')
+    parser.add_argument('--watch', action = 'store_true', \
+                        help = 'run the program again each time the file changes, reusing the unchanged statements')
+    parser.add_argument('--remove-dead-stores', action = 'store_true', \
+                        help = 'remove the stored values that are never read before running and display what was removed')
+    parser.add_argument('--export-tokens', type = Exporter.getTarget, metavar = 'FILE', \
+                        help = 'also write the token/lexeme table to this file, fd:N for file descriptor N or - for stdout')
+    parser.add_argument('--export-symbols', type = Exporter.getTarget, metavar = 'FILE', \
+                        help = 'also write the symbols table to this file, fd:N for file descriptor N or - for stdout')
+    parser.add_argument('--export-format', choices = Exporter.FORMATS, default = Exporter.JSONL, \
+                        help = 'format of the exported tables, JSON Lines by default')
+    parser.add_argument('--parallel-lex', type = int, nargs = '?', const = 0, default = None, metavar = 'PROCESSES', \
+                        help = 'lex a large program in chunks of lines on a pool of processes, by default the number of CPUs')
+    parser.add_argument('--parallel-eval', type = int, nargs = '?', const = 0, default = None, metavar = 'PROCESSES', \
+                        help = 'evaluate the independent RAISE, ROOT and RAISE_MOD statements on a pool of processes, ' \
+                               'by default the number of CPUs')
+    parser.add_argument('--memoize', action = 'store_true', \
+                        help = 'reuse the value of a RAISE, ROOT or RAISE_MOD expression already computed ' \
+                               'with the same variables, and display the hits and misses')
+    parser.add_argument('--memo-size', type = int, default = Constants.MEMO_BYTES, metavar = 'BYTES', \
+                        help = 'largest number of bytes of the values kept by --memoize, the least recently used ' \
+                               'being removed first')
+    options = parser.parse_args()
+    if options.stream and options.native:
+        parser.error('--native cannot be used with --stream')
+    if options.profile and options.native:
+        parser.error('--native cannot be used with --profile')
+    if options.watch and (options.stream or options.native or options.profile):
+        parser.error('--watch cannot be used with --stream, --native or --profile')
+    if options.remove_dead_stores and (options.stream or options.profile or options.watch):
+        parser.error('--remove-dead-stores cannot be used with --stream, --profile or --watch')
+    if options.parallel_lex is not None and (options.stream or options.profile or options.watch):
+        parser.error('--parallel-lex cannot be used with --stream, --profile or --watch')
+    if options.parallel_eval is not None and (options.stream or options.native or options.profile or options.watch):
+        parser.error('--parallel-eval cannot be used with --stream, --native, --profile or --watch')
+    if options.memoize and (options.stream or options.native or options.profile or options.watch or \
+                            options.parallel_eval is not None):
+        parser.error('--memoize cannot be used with --stream, --native, --profile, --watch or --parallel-eval')
+    if options.export_tokens is not None and (options.no_token_table or options.watch):
+        parser.error('--export-tokens cannot be used with --no-token-table or --watch')
+    
+    profiler = None
+    eliminator = DeadStoreEliminator() if options.remove_dead_stores else None
+    cache = ExpressionCache(options.memo_size) if options.memoize else None
+    
     try:
         print(Message.get('STARTED'))
-    
-        text = File.getFileContent()
         
-        lexer = Lexer(text)
+        file = File.getFileName()
         variables = Variables()
-        tokens = Tokens()
-        interpreter = Interpreter(lexer, tokens, variables)
+        formatter = Formatter(options.max_digits)
         
-        print(Message.get('OUTPUT_TITLE'))
-        print(Message.get('OUTPUT_START'))
-        interpreter.parse()
-        print(Message.get('OUTPUT_END'))
-
-        tokens.display()
-        variables.display()
+        if options.watch:
+            watcher = Watcher(file, BufferedOutput(size = options.buffer_size), formatter)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    print(Message.get('OUTPUT_TITLE'))
+                    print(Message.get('OUTPUT_START'))
+                    variables, error = watcher.run()
+                    print(Message.get('OUTPUT_END') if error is None else error)
+                    print(Message.get('WATCH_STATUS') % (watcher.lexer.lexed, watcher.lexer.count, \
+                                                         watcher.reused, watcher.count, time.perf_counter() - start))
+                    print(Message.get('WATCH_WAITING') % file)
+                    watcher.wait()
+            except KeyboardInterrupt:
+                # The symbols table of the last run is displayed once stopped.
+                pass
+        elif options.profile:
+            tokens = RecentTokens() if options.no_token_table else Tokens()
+            lexer = StreamLexer(file) if options.stream else Lexer.create(File.getFileContent(file))
+            try:
+                profiler = Profiler(file)
+                
+                print(Message.get('OUTPUT_TITLE'))
+                print(Message.get('OUTPUT_START'))
+                profiler.run(lexer, tokens, variables, BufferedOutput(size = options.buffer_size), formatter)
+                print(Message.get('OUTPUT_END'))
+            finally:
+                if options.stream:
+                    lexer.close()
+            
+            if not options.no_token_table:
+                tokens.display()
+        elif options.stream:
+            tokens = RecentTokens() if options.no_token_table else Tokens()
+            lexer = StreamLexer(file)
+            try:
+                compiler = Compiler(lexer, tokens)
+                output = BufferedOutput(size = options.buffer_size)
+                machine = VirtualMachine(Program([], tokens), variables, output, formatter)
+                
+                print(Message.get('OUTPUT_TITLE'))
+                print(Message.get('OUTPUT_START'))
+                for code in compiler.compileStatements():
+                    machine.run(code)
+                output.flush()
+                print(Message.get('OUTPUT_END'))
+            finally:
+                lexer.close()
+            
+            if not options.no_token_table:
+                tokens.display()
+        else:
+            program = Program.fromFile(file, options.native, eliminator, not options.no_token_table, options.parallel_lex)
+            machine = NativeMachine if options.native else VirtualMachine
+            
+            print(Message.get('OUTPUT_TITLE'))
+            print(Message.get('OUTPUT_START'))
+            output = BufferedOutput(size = options.buffer_size)
+            if options.parallel_eval is not None:
+                ParallelMachine(program, variables, output, formatter, options.parallel_eval or None).run()
+            elif cache is not None:
+                MemoizedMachine(program, variables, output, formatter, cache).run()
+            else:
+                machine(program, variables, output, formatter).run()
+            print(Message.get('OUTPUT_END'))
+            
+            tokens = program.tokens
+            if not options.no_token_table:
+                tokens.display()
+        variables.display(formatter)
+        
+        if options.export_tokens is not None:
+            exporter = Exporter(options.export_tokens, options.export_format, formatter)
+            try:
+                exporter.writeTokens(tokens)
+            finally:
+                exporter.close()
+        if options.export_symbols is not None:
+            exporter = Exporter(options.export_symbols, options.export_format, formatter)
+            try:
+                exporter.writeVariables(variables)
+            finally:
+                exporter.close()
         
         print(Message.get('TERMINATED'))
     except IOException as ioe:
@@ -791,3 +4141,21 @@ if __name__ == '__main__':
     except:
         print(Error.getMessage('GENERAL_ERROR'))
     
+    # The removed values are also reported when the program stops on an error, once compiled.
+    if eliminator is not None and eliminator.instructions:
+        eliminator.display()
+    
+    # The hits and misses are also reported when the program stops on an error.
+    if cache is not None:
+        cache.display()
+    
+    # The profile is also reported when the program stops on an error.
+    if profiler is not None:
+        profiler.display(options.profile_lines)
+        profileFile = options.profile_output or os.path.splitext(profiler.file)[0] + Constants.PROFILE_EXTENSION
+        try:
+            profiler.save(profileFile)
+            print(Message.get('PROFILE_SAVED') % profileFile)
+        except OSError as err:
+            print(err)
+
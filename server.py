@@ -0,0 +1,300 @@
+# Run INTERPOL programs sent over a local socket, on a pool of warm worker processes.
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from interpreter import Cache, Constants, Engine, Error
+
+class Status:
+    # The program ran up to its end.
+    OK = 'OK'
+    # The program stopped on an INTERPOL error.
+    ERROR = 'ERROR'
+    # The program did not finish in time, its worker was replaced.
+    TIMEOUT = 'TIMEOUT'
+    # The queue of requests is full, the request was not run.
+    BUSY = 'BUSY'
+    # The request could not be run e.g., malformed request or worker failure.
+    FAILED = 'FAILED'
+
+# Messages framed by their size: a 4 bytes big-endian length followed by as many bytes of UTF-8 JSON.
+class Protocol:
+    HEADER = struct.Struct('>I')
+    # Largest message accepted, in bytes.
+    MAX_SIZE = 1 << 26
+    
+    @staticmethod
+    def send(connection, message):
+        data = json.dumps(message).encode('utf-8')
+        connection.sendall(Protocol.HEADER.pack(len(data)) + data)
+    
+    @staticmethod
+    # Read exactly size bytes, or None if the connection is closed before the first one.
+    def read(connection, size):
+        data = bytearray()
+        while len(data) < size:
+            part = connection.recv(size - len(data))
+            if not part:
+                if data:
+                    raise ConnectionError('connection closed within a message')
+                return None
+            data += part
+        return bytes(data)
+    
+    @staticmethod
+    # Read the next message, or None once the connection is closed.
+    def receive(connection):
+        header = Protocol.read(connection, Protocol.HEADER.size)
+        if header is None:
+            return None
+        size, = Protocol.HEADER.unpack(header)
+        if size > Protocol.MAX_SIZE:
+            raise ValueError('message of %d bytes is too large' % size)
+        data = Protocol.read(connection, size) if size else b''
+        if data is None:
+            raise ConnectionError('connection closed within a message')
+        return json.loads(data.decode('utf-8'))
+
+# Process running the requests one at a time with its own Engine, so the programs it has
+# already seen stay compiled in its memory.
+class Worker:
+    # Workers replaced while the server runs are started from the threads handling the connections. They are forked by
+    # a server process of their own, with the interpreter already imported, or started as new Python processes where
+    # there is none, so that they never inherit the locks held by the other threads.
+    CONTEXT = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() \
+                                          else 'spawn')
+    
+    def __init__(self, native = False, maxDigits = None, cacheSize = Constants.ENGINE_PROGRAMS):
+        self.connection, child = Worker.CONTEXT.Pipe()
+        self.process = Worker.CONTEXT.Process(target = Worker.serve, args = (child, native, maxDigits, cacheSize), \
+                                              daemon = True)
+        self.process.start()
+        child.close()
+    
+    @staticmethod
+    # Main loop of the worker process, until the server closes the pipe.
+    # A request failing unexpectedly gets a FAILED response, and the worker goes on with the next one.
+    def serve(connection, native, maxDigits, cacheSize):
+        engine = Engine(native, maxDigits, cacheSize)
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                return
+            try:
+                response = Worker.execute(engine, request)
+            except Exception:
+                response = WorkerPool.getFailure(Status.FAILED, Error.getMessage('GENERAL_ERROR'))
+            connection.send(response)
+    
+    @staticmethod
+    # Run a request: { 'source': text, 'inputs': text or list of lines }.
+    # Return the response without the timings of the server.
+    def execute(engine, request):
+        source = request['source']
+        start = time.perf_counter()
+        cached = Cache.getKey(source) in engine.programs
+        if source:
+            try:
+                engine.compile(source)
+            except Error:
+                # Reported by the run, as the program stays uncompiled.
+                pass
+        compiled = time.perf_counter()
+        result = engine.run(source, request.get('inputs', ()))
+        end = time.perf_counter()
+        
+        variables = []
+        for variable in result.variables.variables:
+            try:
+                value = engine.formatter.format(variable.value)
+            except ValueError:
+                # More digits than allowed.
+                value = None
+            variables.append([variable.name, variable.displayType, value])
+        return {
+            'status': Status.OK if result.error is None else Status.ERROR,
+            'output': result.output,
+            'error': None if result.error is None else str(result.error),
+            'variables': variables,
+            'cached': cached,
+            'timings': { 'compile': compiled - start, 'run': end - compiled },
+        }
+    
+    def stop(self):
+        self.connection.close()
+        self.process.kill()
+        self.process.join()
+
+# Workers started in advance, each request waiting in the queue for an idle worker.
+# A request is refused right away when as many requests as the workers and the queue can hold are already there.
+# A worker still running a request after its timeout is killed and replaced.
+class WorkerPool:
+    def __init__(self, workers, queueSize, native = False, maxDigits = None, cacheSize = Constants.ENGINE_PROGRAMS):
+        self.options = (native, maxDigits, cacheSize)
+        if Worker.CONTEXT.get_start_method() == 'forkserver':
+            Worker.CONTEXT.set_forkserver_preload(['interpreter'])
+        self.idle = queue.Queue()
+        for _ in range(workers):
+            self.idle.put(Worker(*self.options))
+        self.workers = workers
+        # Requests running or waiting for a worker.
+        self.slots = threading.BoundedSemaphore(workers + queueSize)
+    
+    @staticmethod
+    def getFailure(status, message):
+        return { 'status': status, 'output': '', 'error': message, 'variables': [], 'cached': False, 'timings': {} }
+    
+    # Run a request on the next idle worker, within timeout seconds including the wait.
+    def submit(self, request, timeout):
+        start = time.perf_counter()
+        if not self.slots.acquire(blocking = False):
+            return WorkerPool.getFailure(Status.BUSY, 'too many requests')
+        
+        try:
+            try:
+                worker = self.idle.get(timeout = timeout)
+            except queue.Empty:
+                return WorkerPool.getFailure(Status.TIMEOUT, 'no worker available in time')
+            queued = time.perf_counter() - start
+            
+            try:
+                worker.connection.send(request)
+                if worker.connection.poll(max(0.0, timeout - queued)):
+                    response = worker.connection.recv()
+                else:
+                    response = WorkerPool.getFailure(Status.TIMEOUT, 'the program did not finish in %gs' % timeout)
+                    worker.stop()
+                    worker = Worker(*self.options)
+            except (EOFError, OSError):
+                # The worker died e.g., out of memory.
+                response = WorkerPool.getFailure(Status.FAILED, Error.getMessage('GENERAL_ERROR'))
+                worker.stop()
+                worker = Worker(*self.options)
+            self.idle.put(worker)
+            response['timings']['queue'] = queued
+            return response
+        finally:
+            self.slots.release()
+    
+    def close(self):
+        for _ in range(self.workers):
+            self.idle.get().stop()
+
+# Connection of a client, which may send any number of requests one after the other.
+# Each request is { 'source': text, 'inputs': text or list of lines, 'timeout': seconds } with only the source required,
+# the timeout being at most the one of the server. Each response is
+# { 'status', 'output', 'error', 'variables': [[name, type, value]], 'cached', 'timings': { 'queue', 'compile', 'run', 'total' } }.
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = Protocol.receive(self.request)
+            except (ValueError, ConnectionError) as err:
+                # The rest of the stream cannot be trusted.
+                Protocol.send(self.request, WorkerPool.getFailure(Status.FAILED, str(err)))
+                return
+            if request is None:
+                return
+            
+            start = time.perf_counter()
+            response = self.run(request)
+            response['timings']['total'] = time.perf_counter() - start
+            Protocol.send(self.request, response)
+    
+    def run(self, request):
+        timeout = self.server.requestTimeout
+        if not isinstance(request, dict) or not isinstance(request.get('source'), str) or \
+           not isinstance(request.get('inputs', ()), (str, list)):
+            return WorkerPool.getFailure(Status.FAILED, 'a request needs a source text and its inputs as a text or a list')
+        if isinstance(request.get('timeout'), (int, float)):
+            timeout = min(timeout, max(0.0, request['timeout']))
+        return self.server.pool.submit({ 'source': request['source'], 'inputs': request.get('inputs', []) }, timeout)
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+# Connection to the server, sending one request at a time.
+class Client:
+    def __init__(self, address):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.connection = socket.socket(family, socket.SOCK_STREAM)
+        self.connection.connect(address)
+    
+    def run(self, source, inputs = (), timeout = None):
+        request = { 'source': source, 'inputs': inputs if isinstance(inputs, str) else [str(line) for line in inputs] }
+        if timeout is not None:
+            request['timeout'] = timeout
+        Protocol.send(self.connection, request)
+        return Protocol.receive(self.connection)
+    
+    def close(self):
+        self.connection.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run INTERPOL programs sent over a local socket on a pool of warm workers.')
+    parser.add_argument('--unix', \
+                        help = 'path of the Unix socket to listen on, instead of TCP')
+    parser.add_argument('--host', default = '127.0.0.1', \
+                        help = 'address to listen on, localhost by default')
+    parser.add_argument('--port', type = int, default = 7373, \
+                        help = 'TCP port to listen on')
+    parser.add_argument('-j', '--workers', type = int, default = None, \
+                        help = 'number of worker processes, by default the number of CPUs')
+    parser.add_argument('--queue-size', type = int, default = 64, \
+                        help = 'number of requests waiting for a worker before the next ones are refused as BUSY')
+    parser.add_argument('--timeout', type = float, default = 10.0, \
+                        help = 'longest time of a request in seconds, including the wait for a worker')
+    parser.add_argument('--cache-size', type = int, default = Constants.ENGINE_PROGRAMS, \
+                        help = 'number of compiled programs kept by each worker')
+    parser.add_argument('--native', action = 'store_true', \
+                        help = 'translate the programs to Python code and execute them natively')
+    parser.add_argument('--max-digits', type = int, default = None, \
+                        help = 'largest number of digits of a printed integer, 0 for no limit, by default the limit of Python')
+    options = parser.parse_args()
+    
+    # Start the workers before any thread is started.
+    pool = WorkerPool(options.workers or os.cpu_count() or 1, options.queue_size, \
+                      options.native, options.max_digits, options.cache_size)
+    try:
+        if options.unix is not None:
+            if os.path.exists(options.unix):
+                os.remove(options.unix)
+            server = UnixServer(options.unix, RequestHandler)
+        else:
+            server = TCPServer((options.host, options.port), RequestHandler)
+    except OSError as err:
+        pool.close()
+        print(err)
+        sys.exit(1)
+    server.pool = pool
+    server.requestTimeout = options.timeout
+    
+    # Stop the same way on a termination signal, removing the socket file.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print('Listening on %s with %d workers' % (options.unix or '%s:%d' % server.server_address[:2], pool.workers), \
+          file = sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if options.unix is not None and os.path.exists(options.unix):
+            os.remove(options.unix)
@@ -0,0 +1,81 @@
+# Compute ROOT, DIST and the remainder of a power exactly on integers of any size.
+
+import math
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Arithmetic, MemoryOutput, NativeMachine, Program, Variables, VirtualMachine
+
+class ArithmeticTest(unittest.TestCase):
+    def testRoot(self):
+        generator = random.Random(12)
+        numbers = [0, 1, 2, 3, 63, 64, 65, 10 ** 300, 10 ** 300 - 1, 2 ** 1000 + 1] + \
+                  [generator.getrandbits(generator.randrange(1, 2000)) for _ in range(200)]
+        for number in numbers:
+            for n in (2, 3, 5, 7, 64, 1000, 5000):
+                root = Arithmetic.root(n, number)
+                self.assertLessEqual(root ** n, number)
+                self.assertGreater((root + 1) ** n, number)
+        self.assertEqual(Arithmetic.root(3, 64), 4)
+        self.assertEqual(Arithmetic.root(3, 10 ** 300), 10 ** 100)
+    
+    def testRootSigns(self):
+        self.assertEqual(Arithmetic.root(1, -8), -8)
+        self.assertEqual(Arithmetic.root(-1, -8), 0)
+        self.assertEqual(Arithmetic.root(-1, -1), -1)
+        self.assertEqual(Arithmetic.root(-2, 1), 1)
+        self.assertEqual(Arithmetic.root(-2, 9), 0)
+        for n, number, exception in ((0, 4, ZeroDivisionError), (-2, 0, ZeroDivisionError), (2, -4, ValueError), \
+                                     (3, -8, ValueError)):
+            with self.assertRaises(exception):
+                Arithmetic.root(n, number)
+    
+    def testDistance(self):
+        generator = random.Random(13)
+        for _ in range(200):
+            points = [generator.randrange(-10 ** 30, 10 ** 30) for _ in range(4)]
+            distance = Arithmetic.distance(*points)
+            square = (points[0] - points[2]) ** 2 + (points[1] - points[3]) ** 2
+            self.assertLessEqual(distance ** 2, square)
+            self.assertGreater((distance + 1) ** 2, square)
+        self.assertEqual(Arithmetic.distance(0, 0, 3, 4), 5)
+        self.assertEqual(Arithmetic.distance(1, 1, 2, 2), 1)
+    
+    def testRaiseMod(self):
+        for base in (-7, -1, 0, 1, 2, 10):
+            for exponent in (-2, -1, 0, 1, 5, 30):
+                for modulus in (-7, -1, 1, 3, 1000):
+                    with self.subTest(base = base, exponent = exponent, modulus = modulus):
+                        try:
+                            expected = int(base ** exponent) % modulus
+                        except ZeroDivisionError:
+                            expected = ZeroDivisionError
+                        try:
+                            result = Arithmetic.raiseMod(base, exponent, modulus)
+                        except ZeroDivisionError:
+                            result = ZeroDivisionError
+                        self.assertEqual(result, expected)
+        self.assertEqual(Arithmetic.raiseMod(3, 10 ** 100, 1000), pow(3, 10 ** 100, 1000))
+        with self.assertRaises(ZeroDivisionError):
+            Arithmetic.raiseMod(2, 10, 0)
+    
+    # ROOT was computed with floats, 64 ** (1 / 3) being just below 4.
+    def testPrograms(self):
+        program = Program.compileText('BEGIN\nPRINTLN ROOT 3 64\nVARINT x WITH ROOT 3 RAISE 10 300\nPRINTLN ROOT 5 x\n'
+                                      'VARINT y WITH 3\nPRINTLN MOD RAISE y 1000000000 1000\nPRINTLN DIST 0 0 AND x x\nEND\n')
+        expected = '4\n%d\n%d\n%d\n' % (10 ** 20, pow(3, 10 ** 9, 1000), math.isqrt(2 * 10 ** 200))
+        for machine in (VirtualMachine, NativeMachine):
+            with self.subTest(machine = machine.__name__):
+                output = MemoryOutput()
+                variables = Variables()
+                machine(program, variables, output).run()
+                self.assertEqual(output.getValue(), expected)
+                self.assertEqual(variables.lookup('x').value, 10 ** 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# Run many programs with the batch runner, reading their input files and writing their output and error files.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch import Batch, Job, Status
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    # Write a file below the temporary directory.
+    def write(self, path, text):
+        path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'w') as textFile:
+            textFile.write(text)
+        return path
+    
+    def read(self, path):
+        with open(os.path.join(self.directory, path)) as textFile:
+            return textFile.read()
+    
+    def testRun(self):
+        self.write('scripts/ok.ipol', 'BEGIN\nVARINT x\nINPUT x\nPRINTLN MUL x 2\nEND\n')
+        self.write('scripts/ok.in', '21\n')
+        self.write('scripts/error.ipol', 'BEGIN\nPRINTLN DIV 1 0\nEND\n')
+        self.write('scripts/empty.ipol', '')
+        jobs = Batch.getJobs([os.path.join(self.directory, 'scripts', '*.ipol')])
+        for processes in (1, 2):
+            with self.subTest(processes = processes):
+                results = Batch.runAll(jobs, processes)
+                self.assertEqual([os.path.basename(result.file) for result in results], \
+                                 ['empty.ipol', 'error.ipol', 'ok.ipol'])
+                self.assertEqual([result.status for result in results], [Status.FAILED, Status.ERROR, Status.OK])
+                self.assertEqual(self.read('scripts/ok.out'), '42\n')
+                self.assertEqual(self.read('scripts/ok.err'), '')
+                self.assertIn('Invalid arithmetic operation', self.read('scripts/error.err'))
+    
+    def testManifest(self):
+        program = self.write('a/x.ipol', 'BEGIN\nVARSTR s\nINPUT s\nPRINT s\nEND\n')
+        inputFile = self.write('inputs/first.txt', 'hello\n')
+        manifest = self.write('manifest.txt', '# programs\n\n%s %s\n' % (program, inputFile))
+        outputDir = os.path.join(self.directory, 'out')
+        jobs = Batch.getJobs([], [manifest], outputDir)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(Batch.runAll(jobs, 1)[0].status, Status.OK)
+        self.assertEqual(self.read('out/x.out'), 'hello')
+    
+    # Programs of the same name matched by a recursive glob keep their directories in the output directory.
+    def testOutputDirectories(self):
+        self.write('scripts/a/x.ipol', 'BEGIN\nPRINT "a"\nEND\n')
+        self.write('scripts/b/x.ipol', 'BEGIN\nPRINT "b"\nEND\n')
+        self.write('scripts/x.ipol', 'BEGIN\nPRINT "top"\nEND\n')
+        outputDir = os.path.join(self.directory, 'out')
+        jobs = Batch.getJobs([os.path.join(self.directory, 'scripts', '**', '*.ipol')], outputDir = outputDir)
+        self.assertEqual(len(jobs), 3)
+        results = Batch.runAll(jobs, 2)
+        self.assertTrue(all(result.status == Status.OK for result in results))
+        self.assertEqual(self.read('out/a/x.out'), 'a')
+        self.assertEqual(self.read('out/b/x.out'), 'b')
+        self.assertEqual(self.read('out/x.out'), 'top')
+    
+    # Programs that would still write the same files are refused.
+    def testSameOutputs(self):
+        first = self.write('a/x.ipol', 'BEGIN\nEND\n')
+        second = self.write('b/x.ipol', 'BEGIN\nEND\n')
+        outputDir = os.path.join(self.directory, 'out')
+        with self.assertRaises(ValueError):
+            Batch.getJobs([first, second], outputDir = outputDir)
+        self.assertEqual(len(Batch.getJobs([first, second])), 2)
+    
+    def testRoot(self):
+        self.assertEqual(Batch.getRoot('scripts/**/*.ipol'), 'scripts')
+        self.assertEqual(Batch.getRoot('scripts/a*/x/*.ipol'), 'scripts')
+        self.assertEqual(Batch.getRoot('*.ipol'), '.')
+        self.assertEqual(Job('scripts/a/x.ipol', None, 'out', None, 'scripts').outputFile, \
+                         os.path.join('out', 'a', 'x' + Job.OUTPUT_EXTENSION))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# Generate the synthetic programs of the benchmarks, run them at small sizes and compare timings with a baseline.
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark.__main__ import Benchmark
+from benchmark.generators import WORKLOADS
+from interpreter import Formatter, MemoryOutput, Program, Variables, VirtualMachine
+
+class BenchmarkTest(unittest.TestCase):
+    # The programs only depend on the size and the seed, and run to their end without input.
+    def testGenerators(self):
+        for name, (generator, sizes) in WORKLOADS.items():
+            for size in (4, 10, 50):
+                with self.subTest(workload = name, size = size):
+                    text = generator(size, 1)
+                    self.assertEqual(generator(size, 1), text)
+                    self.assertNotIn('INPUT', text)
+                    output = MemoryOutput()
+                    VirtualMachine(Program.compileText(text), Variables(), output, Formatter(0)).run()
+                    self.assertTrue(output.getValue())
+        self.assertNotEqual(WORKLOADS['straight-line'][0](50, 1), WORKLOADS['straight-line'][0](50, 2))
+        self.assertGreater(len(WORKLOADS['huge-strings'][0](1000)), len(WORKLOADS['huge-strings'][0](100)))
+    
+    def testRun(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            report = Benchmark.run(['straight-line', 'big-raise'], 0.01, 1, 0)
+        self.assertEqual([(result['workload'], result['size']) for result in report['results']], \
+                         [('straight-line', 10), ('straight-line', 100), ('big-raise', 10), ('big-raise', 100)])
+        for result in report['results']:
+            self.assertTrue(all(result[phase] >= 0 for phase in Benchmark.PHASES))
+    
+    # Only the slowdowns above the threshold of timings above the minimum are regressions.
+    def testCompare(self):
+        def getReport(*timings):
+            return { 'results': [dict(workload = 'w', size = size, **dict(zip(Benchmark.PHASES, phases))) \
+                                 for size, phases in timings] }
+        baseline = getReport((1, (1.0, 1.0, 1.0, 1.0, 0.0001)), (2, (1.0, 1.0, 1.0, 1.0, 1.0)))
+        report = getReport((1, (1.05, 1.2, 0.5, 1.0, 0.0005)), (3, (9.0, 9.0, 9.0, 9.0, 9.0)))
+        self.assertEqual(Benchmark.compare(report, baseline, 0.1, 0.001), [('w', 1, 'compile', 1.0, 1.2)])
+        self.assertEqual(len(Benchmark.compare(report, baseline, 0.01, 0.0)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
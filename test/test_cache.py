@@ -0,0 +1,98 @@
+# Store compiled programs in the on-disk cache and read them back, compiling again whenever the source,
+# the interpreter version or the format of the cache changed, or the cache file cannot be used.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Cache, Constants, File, MemoryOutput, NativeMachine, Program, Variables, VirtualMachine
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file = self.write('BEGIN\nVARINT x WITH ADD 1 2\nPRINTLN MUL x 7\nEND\n')
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def write(self, text):
+        file = os.path.join(self.directory, 'program' + Constants.FILE_EXTENSION)
+        with open(file, 'w') as programFile:
+            programFile.write(text)
+        return file
+    
+    @staticmethod
+    # Execute the program in memory, natively or not.
+    def execute(program, native = False):
+        variables = Variables()
+        output = MemoryOutput()
+        (NativeMachine if native else VirtualMachine)(program, variables, output).run()
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables]
+    
+    # Compiled program read from the cache for the current source, or None.
+    def load(self):
+        return Cache.load(self.file, Cache.getKey(File.getFileContent(self.file)))
+    
+    def testLoad(self):
+        self.assertIsNone(self.load())
+        program = Program.fromFile(self.file)
+        self.assertTrue(os.path.isfile(Cache.getPath(self.file)))
+        self.assertEqual(os.listdir(os.path.dirname(Cache.getPath(self.file))), \
+                         ['program' + Constants.CACHE_EXTENSION])
+        cached = self.load()
+        self.assertEqual(cached.code, program.code)
+        self.assertEqual(list(cached.tokens.getRows()), list(program.tokens.getRows()))
+        self.assertEqual(CacheTest.execute(cached), ('21\n', [('x', 3)]))
+    
+    # A change of the source compiles it again.
+    def testEdit(self):
+        Program.fromFile(self.file)
+        self.write('BEGIN\nPRINTLN 5\nEND\n')
+        self.assertIsNone(self.load())
+        self.assertEqual(CacheTest.execute(Program.fromFile(self.file)), ('5\n', []))
+        self.assertIsNotNone(self.load())
+    
+    # A cache file that cannot be read is compiled again, then replaced.
+    def testCorrupted(self):
+        Program.fromFile(self.file)
+        for data in (b'', b'\x00garbage', b'\xfb'):
+            with self.subTest(data = data):
+                with open(Cache.getPath(self.file), 'wb') as cacheFile:
+                    cacheFile.write(data)
+                self.assertIsNone(self.load())
+                self.assertEqual(CacheTest.execute(Program.fromFile(self.file)), ('21\n', [('x', 3)]))
+                self.assertIsNotNone(self.load())
+    
+    def testVersion(self):
+        Program.fromFile(self.file)
+        with mock.patch.object(Constants, 'VERSION', Constants.VERSION + '-other'):
+            self.assertIsNone(self.load())
+    
+    def testDisabled(self):
+        with mock.patch.dict(os.environ, { Constants.NO_CACHE_ENV: '1' }):
+            self.assertEqual(CacheTest.execute(Program.fromFile(self.file)), ('21\n', [('x', 3)]))
+        self.assertFalse(os.path.exists(Cache.getPath(self.file)))
+    
+    # A program cached with another format of the cache e.g., a native translation with other arguments,
+    # is compiled again instead of being read from the cache.
+    def testFormat(self):
+        stale = Program.compileText('BEGIN\nPRINTLN 0\nEND\n')
+        stale.getNative()
+        with mock.patch.object(Constants, 'CACHE_FORMAT', Constants.CACHE_FORMAT - 1):
+            oldKey = Cache.getKey(File.getFileContent(self.file))
+            Cache.save(self.file, oldKey, stale)
+        
+        self.assertNotEqual(Cache.getKey(File.getFileContent(self.file)), oldKey)
+        self.assertIsNone(self.load())
+        for native in (False, True):
+            program = Program.fromFile(self.file, native)
+            self.assertEqual(CacheTest.execute(program, native), ('21\n', [('x', 3)]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# Compile programs to instructions once and execute them on the virtual machine, any number of times,
+# with the output, symbols and errors of the interpreter.
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, MemoryOutput, Opcode, Program, Variables, VirtualMachine
+
+# Programs with their inputs, output and symbols table.
+PROGRAMS = [
+    ('BEGIN\nVARSTR s WITH "I have a pen"\nPRINTLN s\nVARINT x WITH ADD 1 SUB 9 9\nVARINT y\nSTORE 100 IN y\n'
+     'PRINTLN x\nPRINT y\nEND\n', [], 'I have a pen\n1\n100', [('s', 'I have a pen'), ('x', 1), ('y', 100)]),
+    ('BEGIN\nPRINTLN MEAN 1 2 3 4\nPRINTLN DIST 0 0 AND 3 4\nPRINTLN RAISE 2 10\nPRINTLN ROOT 2 17\n'
+     'PRINTLN DIV -7 2\nPRINTLN MOD -7 2\nPRINTLN MUL 3 ADD 1 1\nEND\n', [], '2\n5\n1024\n4\n-4\n1\n6\n', []),
+    ('BEGIN\nVARINT x\nVARSTR s\nINPUT x\nINPUT s\nSTORE MUL x x IN x\nPRINT s\nPRINTLN x\nEND\n', ['12', 'a b'], \
+     'a b144\n', [('x', 144), ('s', 'a b')]),
+    ('# comment\nBEGIN\n\n   PRINT   "x"\n#PRINT "y"\nEND\n', [], 'x', []),
+]
+# Programs with the error they stop on and the output written before.
+ERRORS = [
+    ('BEGIN\nPRINTLN y\nEND\n', Error.UNDECLARED_VARIABLE, ''),
+    ('BEGIN\nPRINTLN ADD "a" 1\nEND\n', Error.INVALID_SYNTAX, ''),
+    ('BEGIN\nVARINT x\nVARINT x\nEND\n', Error.DUPLICATE_VAR, ''),
+    ('BEGIN\nPRINTLN 1\n', Error.INVALID_EOF, '1\n'),
+    ('BEGIN\nPRINTLN 1.5\nEND\n', Error.INVALID_DATA_TYPE, ''),
+    ('BEGIN\nVARSTR s\nSTORE 1 IN s\nEND\n', Error.INVALID_DATA_TYPE, ''),
+    ('BEGIN\nPRINTLN ADD 1\nEND\n', Error.INVALID_EXPRESSION, ''),
+    ('PRINTLN 1\n', Error.INVALID_SYNTAX, ''),
+    ('BEGIN\nPRINTLN 1\nPRINTLN DIV 1 0\nPRINTLN 2\nEND\n', Error.INVALID_OPERATIONS, '1\n'),
+    ('BEGIN\nVARINT x\nPRINT "a"\nINPUT x\nEND\n', Error.INVALID_DATA_TYPE_INPUT, 'a'),
+]
+
+class CompilerTest(unittest.TestCase):
+    @staticmethod
+    # Output and symbols of the program run on the inputs.
+    def execute(program, inputs = (), output = None):
+        lines = iter(inputs)
+        variables = Variables()
+        output = MemoryOutput() if output is None else output
+        machine = VirtualMachine(program, variables, output)
+        machine.input = lambda: next(lines)
+        machine.run()
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables]
+    
+    # The same compiled program runs again with its own variables.
+    def testPrograms(self):
+        for text, inputs, output, symbols in PROGRAMS:
+            with self.subTest(text = text):
+                program = Program.compileText(text)
+                for _ in range(2):
+                    self.assertEqual(CompilerTest.execute(program, inputs), (output, symbols))
+    
+    # Syntax errors are raised by the compiler, the others once executed up to the statement.
+    def testErrors(self):
+        for text, code, written in ERRORS:
+            with self.subTest(text = text):
+                output = MemoryOutput()
+                with self.assertRaises(Error) as context:
+                    CompilerTest.execute(Program.compileText(text), ['abc'], output)
+                self.assertEqual(context.exception.code, code)
+                self.assertEqual(output.getValue(), written)
+    
+    # Variables are accessed by slot, and a statement that may fail records its context first.
+    def testCode(self):
+        program = Program.compileText('BEGIN\nVARINT x WITH 2\nVARINT y\nSTORE x IN y\nPRINTLN DIV y x\nEND\n')
+        self.assertEqual(program.code, [
+            (Opcode.PUSH, 2), (Opcode.DEFINE, ('x', 'NUMBER')), (Opcode.PUSH, 0), (Opcode.DEFINE, ('y', 'NUMBER')),
+            (Opcode.LOAD, 0), (Opcode.STORE, 1),
+            (Opcode.CONTEXT, (6, 19, '')), (Opcode.LOAD, 0), (Opcode.LOAD, 1), (Opcode.DIV, None),
+            (Opcode.CONTEXT, (6, 19, '')), (Opcode.PRINT, True),
+        ])
+        self.assertEqual(program.getErrorArgs(program.code[6][1]), (6, 'PRINTLN DIV y x '))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# Remove the stores whose value is never read and check that the programs have the same output, symbols
+# and errors as without the removal, and that the removed values are reported.
+
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Compiler, DeadStoreEliminator, Error, Keyword, MemoryOutput, Program, Variables, \
+                        VirtualMachine
+
+OPERATORS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'RAISE', 'ROOT')
+NAMES = ('x', 'y', 'z')
+
+class DeadStoresTest(unittest.TestCase):
+    @staticmethod
+    # Random expression over the numbers and the variables.
+    def getExpression(generator, depth):
+        if depth == 0 or generator.random() < 0.4:
+            return generator.choice(NAMES + ('0', '1', '2', '-3', str(generator.randrange(-50, 50))))
+        operator = generator.choice(OPERATORS)
+        operand1 = DeadStoresTest.getExpression(generator, depth - 1)
+        operand2 = generator.choice(('2', '3', 'y')) if operator == 'RAISE' else \
+                   DeadStoresTest.getExpression(generator, depth - 1)
+        return '%s %s %s' % (operator, operand1, operand2)
+    
+    @staticmethod
+    # Output, symbols and error of the program, or the type of the exception reported as a general error.
+    def execute(program):
+        variables = Variables()
+        output = MemoryOutput()
+        try:
+            VirtualMachine(program, variables, output).run()
+            error = None
+        except Error as err:
+            error = str(err)
+        except Exception as exception:
+            error = type(exception).__name__
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    def testRandom(self):
+        generator = random.Random(20)
+        for _ in range(300):
+            lines = ['BEGIN'] + ['VARINT %s WITH %s' % (name, DeadStoresTest.getExpression(generator, 1)) \
+                                 for name in NAMES]
+            for _ in range(6):
+                expression = DeadStoresTest.getExpression(generator, 3)
+                lines.append(generator.choice(('PRINTLN %s', 'STORE %s IN ' + generator.choice(NAMES), '%s')) % expression)
+            text = '\n'.join(lines + ['END', ''])
+            with self.subTest(text = text):
+                expected = DeadStoresTest.execute(Program.compileText(text))
+                output, symbols, error = DeadStoresTest.execute(Program.compileText(text, DeadStoreEliminator()))
+                self.assertEqual((output, error), (expected[0], expected[2]))
+                # Once an error stops the program, the variables may hold other values.
+                if error is None:
+                    self.assertEqual(symbols, expected[1])
+    
+    def testRemoved(self):
+        eliminator = DeadStoreEliminator()
+        program = Program.compileText('BEGIN\nVARINT y WITH 4\nVARINT x WITH ADD y 2\nSTORE MUL y 2 IN x\nADD y 1\n'
+                                      'STORE 5 IN x\nPRINTLN x\nEND\n', eliminator)
+        self.assertEqual(eliminator.removed, [(4, Keyword.VARINT, 'x'), (5, Keyword.STORE, 'x'), \
+                                              (6, Compiler.EXPRESSION, None)])
+        self.assertEqual(eliminator.kept, len(program.code))
+        self.assertLess(eliminator.kept, eliminator.instructions)
+        self.assertEqual(DeadStoresTest.execute(program), ('5\n', [('y', 4), ('x', 5)], None))
+    
+    # The values whose computation may fail are kept.
+    def testUnsafe(self):
+        for expression in ('DIV y 0', 'DIV 1 y', 'ROOT y 4', 'RAISE 2 y', 'MOD RAISE 2 y y'):
+            with self.subTest(expression = expression):
+                eliminator = DeadStoreEliminator()
+                Program.compileText('BEGIN\nVARINT y WITH 0\nVARINT x WITH %s\nSTORE %s IN y\nPRINTLN 1\nEND\n' \
+                                    % (expression, expression), eliminator)
+                self.assertEqual(eliminator.removed, [])
+        self.assertTrue(DeadStoreEliminator.isSafe(Program.compileText('BEGIN\nVARINT y\nPRINTLN DIV y 2\nEND\n').code[2:-2]))
+    
+    # A statement stopping the program keeps the values it reads.
+    def testError(self):
+        eliminator = DeadStoreEliminator()
+        program = Program.compileText('BEGIN\nVARINT x WITH 5\nSTORE 6 IN x\nPRINTLN DIV 1 SUB x 6\nEND\n', eliminator)
+        self.assertEqual(eliminator.removed, [])
+        self.assertIn('Invalid arithmetic operation', DeadStoresTest.execute(program)[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# Embed the interpreter: run programs given as text with inputs from any iterable, the output kept in memory
+# or written to any output, without touching the standard streams.
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import interpreter
+from interpreter import Cache, Engine, Error, MemoryOutput
+
+TEXT = 'BEGIN\nVARINT x\nVARSTR s\nINPUT x\nINPUT s\nPRINT s\nPRINTLN MUL x 2\nEND\n'
+
+class EngineTest(unittest.TestCase):
+    # Nothing is read from or written to the standard streams.
+    def testStreams(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), mock.patch('builtins.input', side_effect = AssertionError):
+            for native in (False, True):
+                result = Engine(native).run(TEXT, ['21', 'n = '])
+                self.assertIsNone(result.error)
+                self.assertEqual(result.output, 'n = 42\n')
+                self.assertEqual(result.getValues(), { 'x': 21, 's': 'n = ' })
+        self.assertEqual(stdout.getvalue(), '')
+    
+    def testInputs(self):
+        engine = Engine()
+        self.assertEqual(engine.run(TEXT, '3\nabc\n').output, 'abc6\n')
+        self.assertEqual(engine.run(TEXT, iter([4, 'a\n'])).output, 'a8\n')
+        result = engine.run(TEXT, ['x', 'a'])
+        self.assertEqual(result.error.code, Error.INVALID_DATA_TYPE_INPUT)
+        # Missing inputs fail the same way as the end of the standard input.
+        self.assertEqual(engine.run(TEXT, ['1']).error.code, Error.GENERAL_ERROR)
+    
+    def testOutput(self):
+        output = MemoryOutput()
+        result = Engine().run('BEGIN\nPRINTLN 1\nPRINTLN DIV 1 0\nEND\n', output = output)
+        self.assertIsNone(result.output)
+        self.assertEqual(output.getValue(), '1\n')
+        self.assertEqual(result.error.code, Error.INVALID_OPERATIONS)
+        self.assertEqual(interpreter.run('').error.code, Error.EMPTY_FILE)
+        self.assertEqual(interpreter.run('BEGIN\nPRINTLN RAISE 7 5000\nEND\n', maxDigits = 100).error.code, Error.DIGIT_LIMIT)
+    
+    # The compiled programs are reused by source, the least recently used being dropped first.
+    def testPrograms(self):
+        engine = Engine(cacheSize = 2)
+        sources = ['BEGIN\nPRINTLN %d\nEND\n' % index for index in range(3)]
+        first = engine.compile(sources[0])
+        self.assertIs(engine.compile(sources[0]), first)
+        engine.compile(sources[1])
+        engine.compile(sources[0])
+        engine.compile(sources[2])
+        self.assertEqual(set(engine.programs), { Cache.getKey(sources[0]), Cache.getKey(sources[2]) })
+        self.assertEqual([engine.run(source).output for source in sources], ['0\n', '1\n', '2\n'])
+        self.assertEqual(Engine(cacheSize = 0).run(sources[1]).output, '1\n')
+        self.assertEqual(Engine(cacheSize = 0).programs, {})
+    
+    # Each run has its own variables.
+    def testRuns(self):
+        engine = Engine()
+        for value in ('1', '2'):
+            result = engine.run('BEGIN\nVARINT x\nINPUT x\nPRINTLN x\nEND\n', [value])
+            self.assertEqual(result.output, value + '\n')
+            self.assertEqual(result.getValues(), { 'x': int(value) })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# Find the tokens of the line of an error from the index of the token/lexeme table, and check that the messages
+# are the same as with the classic lexer, which scans back the text of the line.
+
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Constants, Error, Keyword, MemoryOutput, Program, Tokens, Variables, VirtualMachine
+
+# Programs stopping with an error of the lexer, the compiler or the instructions.
+TEXTS = [
+    '@BEGIN\nEND\n',
+    'BEGIN @\nEND\n',
+    'BEGIN\nPRINTLN 1 @\nEND\n',
+    'BEGIN\nPRINTLN "a\nEND\n',
+    'BEGIN\nPRINTLN 1.5\nEND\n',
+    'BEGIN\nVARINT x WITH 1\n\n\n#c\nPRINTLN DIV x SUB x 1\nEND\n',
+    'BEGIN\nVARSTR s WITH "a b"\nPRINTLN ADD s 1\nEND\n',
+    'BEGIN\nVARINT x\nSTORE y IN x\nEND\n',
+    'BEGIN\nPRINTLN ROOT 0 4 # comment\nEND\n',
+    'BEGIN\nPRINTLN 1\nPRINTLN 2',
+    'BEGIN\nPRINTLN DIV 1 0',
+    'BEGIN\r\nPRINTLN DIV 1 0\r\nEND\r\n',
+    'BEGIN\n' + 'PRINTLN 1\n' * 2000 + 'PRINTLN MOD 1 0\n' + 'PRINTLN 1\n' * 10 + 'END\n',
+]
+
+class ErrorContextTest(unittest.TestCase):
+    @staticmethod
+    # Message of the error stopping the program.
+    def getError(text):
+        try:
+            VirtualMachine(Program.compileText(text), Variables(), MemoryOutput()).run()
+        except Error as err:
+            return str(err)
+    
+    def testMessages(self):
+        for text in TEXTS:
+            with self.subTest(text = text[:40]):
+                with mock.patch.dict(os.environ, { Constants.LEXER_ENV: 'classic' }):
+                    expected = ErrorContextTest.getError(text)
+                self.assertIsNotNone(expected)
+                self.assertEqual(ErrorContextTest.getError(text), expected)
+    
+    def testLine(self):
+        message = ErrorContextTest.getError(TEXTS[-1])
+        self.assertIn('line number [ 2003 ]', message)
+        self.assertTrue(message.endswith('PRINTLN MOD 1 0 '))
+    
+    # Same tokens as by filtering the whole table.
+    def testLookup(self):
+        generator = random.Random(5)
+        tokens = Tokens()
+        rows = []
+        lineNo = 1
+        for index in range(3000):
+            lineNo += generator.choice((0, 0, 0, 1, 2))
+            row = (lineNo, Keyword.EOS, 'EOS', Keyword.EOS) if generator.random() < 0.2 else \
+                  (lineNo, Keyword.NUMBER, 'NUMBER', index)
+            tokens.add(*row)
+            rows.append(row)
+        for lineNo in range(0, lineNo + 2):
+            for end in (None, 0, 1500, 3000):
+                expected = [row for row in rows[:end] if row[0] == lineNo and row[1] != Keyword.EOS]
+                found = tokens.lookup(lineNo, end)
+                self.assertEqual([(token.lineNo, token._type, token.token, token.lexeme) for token in found], expected)
+        self.assertEqual(Tokens.format(Program.compileText('BEGIN\nVARSTR s WITH "a b"\nEND\n').tokens.lookup(3)), \
+                         'VARSTR s WITH "a b" ')
+
+if __name__ == '__main__':
+    unittest.main()
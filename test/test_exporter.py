@@ -0,0 +1,94 @@
+# Export the token/lexeme and symbols tables of a program to paths, file descriptors and binary files.
+
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Exporter, MemoryOutput, Program, Variables, VirtualMachine
+
+TEXT = 'BEGIN\nVARINT x WITH RAISE 2 100\nVARSTR s WITH "a, b"\nPRINTLN s\nEND\n'
+
+class ExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.program = Program.compileText(TEXT)
+        self.variables = Variables()
+        VirtualMachine(self.program, self.variables, MemoryOutput()).run()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    # Bytes of the table exported to a binary file.
+    def export(self, _format, symbols = False):
+        data = io.BytesIO()
+        exporter = Exporter(data, _format, size = 16)
+        if symbols:
+            exporter.writeVariables(self.variables)
+        else:
+            exporter.writeTokens(self.program.tokens)
+        exporter.close()
+        return data.getvalue()
+    
+    def testJSONL(self):
+        rows = [json.loads(line) for line in self.export(Exporter.JSONL).decode().splitlines()]
+        self.assertEqual([tuple(row[column] for column in Exporter.TOKEN_COLUMNS) for row in rows], \
+                         list(self.program.tokens.getRows()))
+        rows = [json.loads(line) for line in self.export(Exporter.JSONL, True).decode().splitlines()]
+        self.assertEqual(rows, [{ 'name': 'x', 'type': 'INTEGER', 'value': 2 ** 100 }, \
+                                { 'name': 's', 'type': 'STRING', 'value': 'a, b' }])
+    
+    def testCSV(self):
+        rows = list(csv.reader(io.StringIO(self.export(Exporter.CSV).decode())))
+        self.assertEqual(rows[0], list(Exporter.TOKEN_COLUMNS))
+        self.assertEqual(rows[1:], [[str(item) for item in row] for row in self.program.tokens.getRows()])
+        rows = list(csv.reader(io.StringIO(self.export(Exporter.CSV, True).decode())))
+        self.assertEqual(rows, [list(Exporter.SYMBOL_COLUMNS), ['x', 'INTEGER', str(2 ** 100)], ['s', 'STRING', 'a, b']])
+    
+    def testBinary(self):
+        data = self.export(Exporter.BINARY)
+        self.assertTrue(data.startswith(Exporter.MAGIC + bytes((Exporter.BINARY_VERSION,)) + b'T'))
+        self.assertEqual(Exporter.getVarint(300), b'\xac\x02')
+    
+    # Only fd:N is a file descriptor, - the standard output, and anything else a path.
+    def testTarget(self):
+        self.assertEqual(Exporter.getTarget('fd:3'), 3)
+        self.assertEqual(Exporter.getTarget('-'), sys.stdout.fileno())
+        for target in ('3', './fd:3', 'symbols.jsonl', '--'):
+            self.assertEqual(Exporter.getTarget(target), target)
+        for target in ('fd:', 'fd:x', 'fd:-1'):
+            with self.assertRaises(ValueError):
+                Exporter.getTarget(target)
+    
+    def testTargets(self):
+        path = os.path.join(self.directory, '3')
+        exporter = Exporter(Exporter.getTarget(path), Exporter.JSONL)
+        exporter.writeVariables(self.variables)
+        exporter.close()
+        with open(path, 'rb') as exportFile:
+            self.assertEqual(exportFile.read(), self.export(Exporter.JSONL, True))
+        
+        read, write = os.pipe()
+        try:
+            exporter = Exporter(Exporter.getTarget('fd:%d' % write), Exporter.CSV)
+            exporter.writeVariables(self.variables)
+            exporter.close()
+            os.close(write)
+            write = None
+            with os.fdopen(read, 'rb') as pipe:
+                read = None
+                self.assertEqual(pipe.read(), self.export(Exporter.CSV, True))
+        finally:
+            for descriptor in (read, write):
+                if descriptor is not None:
+                    os.close(descriptor)
+
+if __name__ == '__main__':
+    unittest.main()
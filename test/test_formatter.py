@@ -0,0 +1,69 @@
+# Print huge integers by parts of their digits, with the same text as str(), and stop on too many digits.
+
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import DigitLimitError, Error, Formatter, MemoryOutput, NativeMachine, Program, Variables, \
+                        VirtualMachine
+
+class FormatterTest(unittest.TestCase):
+    def setUp(self):
+        if hasattr(sys, 'set_int_max_str_digits'):
+            self.addCleanup(sys.set_int_max_str_digits, sys.get_int_max_str_digits())
+            sys.set_int_max_str_digits(0)
+    
+    # Parts of a few digits, so that the integers are split many times.
+    @mock.patch.object(Formatter, 'CHUNK_DIGITS', 100)
+    def testDigits(self):
+        formatter = Formatter(0)
+        generator = random.Random(13)
+        for bits in (Formatter.LARGE_BITS + 1, 20000, 70001):
+            for value in (generator.getrandbits(bits), -generator.getrandbits(bits), 1 << bits, \
+                          10 ** (bits // 4), 10 ** (bits // 4) - 1, 10 ** (bits // 4) + 1):
+                with self.subTest(bits = bits, value = value % 1000):
+                    parts = []
+                    formatter.write(parts.append, value, '\n')
+                    self.assertEqual(''.join(parts), str(value) + '\n')
+                    if abs(value).bit_length() > formatter.largeBits:
+                        self.assertTrue(all(len(part) <= Formatter.CHUNK_DIGITS + 1 for part in parts))
+                    self.assertEqual(formatter.format(value), str(value))
+    
+    # The whole text of a huge integer is never built.
+    def testParts(self):
+        parts = []
+        Formatter(0).write(parts.append, 3 ** 300000, '')
+        self.assertEqual([len(part) for part in parts], [35785, 35784, 35784, 35784, 0])
+    
+    # Nothing is written for an integer with too many digits.
+    def testLimit(self):
+        formatter = Formatter(5000)
+        parts = []
+        formatter.write(parts.append, 10 ** 4999, '')
+        self.assertEqual(len(''.join(parts)), 5000)
+        for value in (10 ** 5000, -10 ** 5000, 7 ** 100000):
+            parts = []
+            with self.assertRaises(DigitLimitError):
+                formatter.write(parts.append, value, '\n')
+            self.assertEqual(parts, [])
+    
+    # The machines stop with the line of the PRINT statement.
+    def testError(self):
+        program = Program.compileText('BEGIN\nPRINTLN 1\nVARINT x WITH RAISE 7 100000\nPRINTLN x\nPRINTLN 2\nEND\n')
+        for machine in (VirtualMachine, NativeMachine):
+            with self.subTest(machine = machine.__name__):
+                output = MemoryOutput()
+                with self.assertRaises(Error) as context:
+                    machine(program, Variables(), output, Formatter(4300)).run()
+                self.assertEqual(context.exception.code, Error.DIGIT_LIMIT)
+                self.assertIn('line number [ 5 ]', str(context.exception))
+                self.assertIn('--max-digits', str(context.exception))
+                self.assertEqual(output.getValue(), '1\n')
+
+if __name__ == '__main__':
+    unittest.main()
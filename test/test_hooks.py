@@ -0,0 +1,87 @@
+# Report the events of a run to the subscribed callbacks, in order, with the same output and errors as without hooks.
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Engine, Error, Hooks, Keyword, Lexer
+
+TEXT = 'BEGIN\nVARINT x\nINPUT x\nPRINT x\nSTORE ADD x 1 IN x\nPRINTLN DIV x 0\nEND\n'
+
+class HooksTest(unittest.TestCase):
+    @staticmethod
+    # Hooks recording the events as (event, line number, details), the variables with their value at the time.
+    def record(events, names = Hooks.EVENTS):
+        hooks = Hooks()
+        def getCallback(event):
+            def callback(lineNo, timestamp, *details):
+                details = tuple((item.name, item.value) if hasattr(item, 'displayType') else item for item in details)
+                events.append((event, lineNo) + details)
+            return callback
+        for event in names:
+            hooks.subscribe(event, getCallback(event))
+        return hooks
+    
+    def testEvents(self):
+        events = []
+        result = Engine().run(TEXT, ['4'], hooks = HooksTest.record(events, [event for event in Hooks.EVENTS \
+                                                                             if event != Hooks.TOKEN]))
+        # The seconds vary, keep their type only.
+        events = [tuple(type(item) if type(item) is float else item for item in event) for event in events]
+        self.assertEqual(events[:-1], [
+            (Hooks.STATEMENT_START, 3, 'VARINT'), (Hooks.VARIABLE_DEFINED, 3, ('x', 0)), (Hooks.STATEMENT_END, 3, 'VARINT', float),
+            (Hooks.STATEMENT_START, 4, 'INPUT'), (Hooks.INPUT, 4, '4', float), (Hooks.VARIABLE_UPDATED, 4, ('x', 4)),
+            (Hooks.STATEMENT_END, 4, 'INPUT', float),
+            (Hooks.STATEMENT_START, 5, 'PRINT'), (Hooks.OUTPUT, 5, '4'), (Hooks.STATEMENT_END, 5, 'PRINT', float),
+            (Hooks.STATEMENT_START, 6, 'STORE'), (Hooks.VARIABLE_UPDATED, 6, ('x', 5)), (Hooks.STATEMENT_END, 6, 'STORE', float),
+            (Hooks.STATEMENT_START, 7, 'PRINTLN'),
+        ])
+        self.assertEqual(events[-1][:2], (Hooks.ERROR, 7))
+        self.assertIs(events[-1][2], result.error)
+        self.assertEqual(result.output, '4')
+    
+    # The run is the same with or without subscribers.
+    def testSameRun(self):
+        for text in (TEXT, 'BEGIN\nVARSTR s WITH "a"\nPRINTLN s\nEND\n', 'BEGIN\nPRINTLN 1.5\nEND\n', 'BEGIN\nPRINTLN 1\n'):
+            with self.subTest(text = text):
+                expected = Engine().run(text, ['4'])
+                result = Engine().run(text, ['4'], hooks = HooksTest.record([]))
+                self.assertEqual(result.output, expected.output)
+                self.assertEqual(result.getValues(), expected.getValues())
+                self.assertEqual(str(result.error), str(expected.error))
+    
+    def testTokens(self):
+        events = []
+        Engine().run(TEXT, ['4'], hooks = HooksTest.record(events, [Hooks.TOKEN]))
+        tokens = []
+        lexer = Lexer(TEXT)
+        while not tokens or tokens[-1]._type != Keyword.EOF:
+            tokens.append(lexer.getNextToken())
+        # The run stops at the error, before the last tokens are read.
+        self.assertEqual([(event[1], event[2].lexeme) for event in events], \
+                         [(token.lineNo, token.lexeme) for token in tokens[:len(events)]])
+        self.assertGreater(len(events), 15)
+    
+    def testSubscribe(self):
+        hooks = Hooks()
+        self.assertFalse(hooks.has())
+        with self.assertRaises(ValueError):
+            hooks.subscribe('UNKNOWN', print)
+        calls = []
+        callback = lambda lineNo, timestamp, text: calls.append(text)
+        hooks.subscribe(Hooks.OUTPUT, callback)
+        self.assertTrue(hooks.has() and hooks.has(Hooks.OUTPUT) and not hooks.has(Hooks.INPUT))
+        Engine().run('BEGIN\nPRINT "a"\nPRINT "b"\nEND\n', hooks = hooks)
+        self.assertEqual(calls, ['a', 'b'])
+        hooks.unsubscribe(Hooks.OUTPUT, callback)
+        hooks.unsubscribe(Hooks.INPUT, callback)
+        self.assertFalse(hooks.has())
+        Engine().run('BEGIN\nPRINT "c"\nEND\n', hooks = hooks)
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertIsInstance(Engine().run('BEGIN\nPRINTLN DIV 1 0\nEND\n', hooks = hooks).error, Error)
+
+if __name__ == '__main__':
+    unittest.main()
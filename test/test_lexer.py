@@ -0,0 +1,85 @@
+# Lex programs with the single-pass lexer and compare the tokens, line numbers and errors with the classic lexer,
+# on the programs of this directory, on corner cases and on random texts.
+
+import glob
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import ClassicLexer, Constants, Error, Keyword, Lexer
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'test', '*' + Constants.FILE_EXTENSION)))
+TEXTS = [
+    'BEGIN\nPRINTLN ADD 1 -2\nEND\n',
+    'BEGIN\n\tVARINT   x WITH +5 # comment\n  PRINTLN x#no space\nEND',
+    'BEGIN\nPRINT "a # b"\nPRINT ""\nEND\n',
+    'BEGIN\nPRINTLN 1.5\nEND\n',
+    'BEGIN\nPRINTLN 12a\nEND\n',
+    'BEGIN\nVARINT a1b2\nPRINTLN a1b2\nEND\n',
+    'BEGIN\nPRINTLN "unterminated\nEND\n',
+    'BEGIN\nPRINTLN "café"\nEND\n',
+    'BEGIN\nVARINT café\nEND\n',
+    'BEGIN\nPRINTLN @\nEND\n',
+    'BEGIN\r\nPRINTLN 1\r\nEND\r\n',
+    '\n\n\nBEGIN\n\n\nEND\n\n',
+    '#only a comment',
+    'x',
+    '\n',
+    'BEGIN',
+]
+# Pieces of the random texts.
+PIECES = ['BEGIN', 'END', 'PRINTLN', 'VARINT', 'x', 'ADD', 'AND', '1', '-23', '+4', '"s t"', '"#"', '#c', ' ', ' ', \
+          '\t', '\n', '\n', '\r', '1.5', '"', '@', 'a9', '9a', 'é', '\x0b']
+
+class LexerTest(unittest.TestCase):
+    @staticmethod
+    # Tokens with the line number of the lexer after each one, then the error if any,
+    # or the type of the exception e.g., IndexError, reported as a general error by the interpreter.
+    def lex(lexer):
+        tokens = []
+        try:
+            while True:
+                token = lexer.getNextToken()
+                tokens.append((token.lineNo, token._type, token.token, token.lexeme, lexer.lineNo))
+                if token._type == Keyword.EOF:
+                    return tokens, None
+        except Error as err:
+            return tokens, str(err)
+        except Exception as exception:
+            return tokens, type(exception).__name__
+    
+    def check(self, text):
+        with self.subTest(text = text):
+            self.assertEqual(LexerTest.lex(Lexer(text)), LexerTest.lex(ClassicLexer(text)))
+    
+    def testTexts(self):
+        for text in TEXTS:
+            self.check(text)
+        for file in PROGRAMS:
+            with open(file) as programFile:
+                self.check(programFile.read())
+    
+    def testRandom(self):
+        generator = random.Random(3)
+        for _ in range(300):
+            self.check(''.join(generator.choice(PIECES) for _ in range(generator.randrange(1, 40))))
+    
+    # The empty text fails the same way.
+    def testEmpty(self):
+        with self.assertRaises(IndexError):
+            ClassicLexer('')
+        with self.assertRaises(IndexError):
+            Lexer('')
+    
+    def testCreate(self):
+        self.assertIs(type(Lexer.create('BEGIN\nEND\n')), Lexer)
+        with mock.patch.dict(os.environ, { Constants.LEXER_ENV: 'classic' }):
+            self.assertIs(type(Lexer.create('BEGIN\nEND\n')), ClassicLexer)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# Run programs with the expression cache and compare the output, errors and variables with the virtual machine,
+# the costly operations within expressions and across runs being computed once.
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, ExpressionCache, MemoizedMachine, MemoryOutput, Program, Variables, VirtualMachine
+
+TEXTS = [
+    'BEGIN\nVARINT x WITH 7\nPRINTLN ROOT 3 RAISE x 30\nPRINTLN ADD 1 RAISE x 30\nSTORE 8 IN x\n'
+    'PRINTLN RAISE x 30\nSTORE 7 IN x\nPRINTLN RAISE x 30\nEND\n',
+    'BEGIN\nVARINT x WITH 5\nPRINTLN x\nPRINTLN ROOT SUB x 5 16\nPRINTLN x\nEND\n',
+    'BEGIN\nVARINT x WITH RAISE 2 100\nPRINTLN MOD RAISE 3 x 1000\nPRINTLN ADD 1 MOD RAISE 3 x 1000\n'
+    'PRINTLN MOD RAISE 3 x 0\nEND\n',
+    'BEGIN\nVARINT x\nINPUT x\nPRINTLN ROOT 2 x\nPRINTLN ROOT 2 x\nEND\n',
+]
+
+class MemoTest(unittest.TestCase):
+    @staticmethod
+    # Output, symbols and error of the program run by the machine.
+    def execute(program, machine, inputs = ('49',)):
+        variables = Variables()
+        output = MemoryOutput()
+        lines = iter(inputs)
+        machine = machine(program, variables, output)
+        machine.input = lambda: next(lines)
+        error = None
+        try:
+            machine.run()
+        except Error as err:
+            error = str(err)
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    def testRun(self):
+        for text in TEXTS:
+            with self.subTest(text = text):
+                program = Program.compileText(text)
+                self.assertEqual(MemoTest.execute(program, MemoizedMachine), MemoTest.execute(program, VirtualMachine))
+    
+    # RAISE x 30 is reused within ROOT 3 RAISE x 30 and after x is assigned its value again.
+    def testSubexpressions(self):
+        cache = ExpressionCache()
+        program = Program.compileText(TEXTS[0])
+        MemoizedMachine(program, Variables(), MemoryOutput(), cache = cache).run()
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+    
+    # The values of a run are reused by the next one.
+    def testRuns(self):
+        cache = ExpressionCache()
+        program = Program.compileText('BEGIN\nVARINT x WITH 7\nPRINTLN RAISE x 30\nPRINTLN RAISE x 31\nEND\n')
+        for hits in (0, 2, 4):
+            output = MemoryOutput()
+            MemoizedMachine(program, Variables(), output, cache = cache).run()
+            self.assertEqual(output.getValue(), '%d\n%d\n' % (7 ** 30, 7 ** 31))
+            self.assertEqual(cache.hits, hits)
+        self.assertEqual(cache.misses, 2)
+    
+    # A failing operation is not kept, and the values never take more than the bytes given.
+    def testBound(self):
+        cache = ExpressionCache(1000)
+        program = Program.compileText('BEGIN\nVARINT x WITH 0\nPRINTLN RAISE 2 x\nSTORE ADD x 1 IN x\n'
+                                      'PRINTLN RAISE 2 x\nSTORE ADD x 1 IN x\nPRINTLN RAISE 2 x\nEND\n')
+        for _ in range(3):
+            MemoizedMachine(program, Variables(), MemoryOutput(), cache = cache).run()
+            self.assertLessEqual(cache.size, 1000)
+        self.assertGreater(cache.hits, 0)
+        
+        cache = ExpressionCache(200)
+        MemoizedMachine(Program.compileText('BEGIN\nVARINT x WITH 1000\nPRINTLN RAISE 2 x\nEND\n'), Variables(), MemoryOutput(), \
+                        cache = cache).run()
+        self.assertEqual((cache.misses, cache.values), (1, {}))
+        failing = Program.compileText('BEGIN\nVARINT x WITH 0\nPRINTLN ROOT x 4\nEND\n')
+        for _ in range(2):
+            self.assertIsNotNone(MemoTest.execute(failing, lambda *args: MemoizedMachine(*args, cache = cache))[2])
+        self.assertEqual((cache.hits, cache.misses, cache.values), (0, 3, {}))
+
+if __name__ == '__main__':
+    unittest.main()
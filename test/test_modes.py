@@ -0,0 +1,106 @@
+# Run the programs of this directory through each execution mode of the interpreter and compare the output,
+# the token/lexeme table and the symbols table with the classic lexer and virtual machine.
+# Run with python -m pytest or python -m unittest discover -s test from the root of the repository.
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Constants, Message
+
+INTERPRETER = os.path.join(ROOT, 'interpreter.py')
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'test', '*' + Constants.FILE_EXTENSION)))
+# Lines read by the INPUT statements, a valid number for all of them.
+INPUTS = '1990\n'
+
+# Options of each mode, run twice so that the second run reads the program from the cache.
+MODES = (
+    (),
+    ('--native',),
+    ('--stream',),
+    ('--stream', '--buffer-size', '0'),
+    ('--no-token-table',),
+    ('--no-token-table', '--native'),
+    ('--remove-dead-stores',),
+    ('--memoize',),
+    ('--parallel-eval', '2'),
+    ('--parallel-lex', '2'),
+    ('--profile',),
+)
+
+class ModesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    # Copy of the program in the temporary directory, so that its cache is written there.
+    def copy(self, file):
+        return shutil.copy(file, self.directory)
+    
+    # Write a program in the temporary directory.
+    def write(self, name, text):
+        file = os.path.join(self.directory, name + Constants.FILE_EXTENSION)
+        with open(file, 'w') as programFile:
+            programFile.write(text)
+        return file
+    
+    @staticmethod
+    # Output of the interpreter from the start of the output of the program up to the end of the symbols table,
+    # or of the error.
+    def interpret(file, options = (), env = None):
+        process = subprocess.run([sys.executable, INTERPRETER] + list(options), input = file + '\n' + INPUTS, \
+                                 capture_output = True, text = True, env = dict(os.environ, **(env or {})), timeout = 60)
+        stdout = process.stdout
+        start = stdout.index(Message.get('OUTPUT_START'))
+        # The reports of the modes follow, even after an error.
+        for name in ('TERMINATED', 'PROFILE_TITLE', 'DEAD_STORES_TITLE', 'MEMO_TITLE'):
+            end = stdout.find(Message.get(name), start)
+            if end >= 0:
+                stdout = stdout[:end]
+        return stdout[start:]
+    
+    @staticmethod
+    # Same output without the token/lexeme table.
+    def removeTokens(text):
+        start = text.find(Message.get('TOKEN_TITLE'))
+        if start < 0:
+            return text
+        end = text.find(Message.get('SYMBOL_TITLE'), start)
+        return text[:start] + ('\n' if end < 0 else text[end:])
+    
+    @staticmethod
+    # Output of the classic lexer with the virtual machine, without the cache.
+    def runClassic(file):
+        return ModesTest.interpret(file, env = { Constants.LEXER_ENV: 'classic', Constants.NO_CACHE_ENV: '1' })
+    
+    def checkModes(self, file):
+        expected = ModesTest.runClassic(file)
+        for options in MODES:
+            for attempt in ('compiled', 'cached'):
+                with self.subTest(program = os.path.basename(file), options = ' '.join(options), attempt = attempt):
+                    output = ModesTest.interpret(file, options)
+                    if '--no-token-table' in options:
+                        self.assertEqual(output, ModesTest.removeTokens(expected))
+                    else:
+                        self.assertEqual(output, expected)
+    
+    def testPrograms(self):
+        self.assertTrue(PROGRAMS)
+        for file in PROGRAMS:
+            self.checkModes(self.copy(file))
+    
+    def testErrors(self):
+        self.checkModes(self.write('errors', 'BEGIN\nVARINT x WITH 5\nPRINTLN x\nSTORE DIV x SUB x 5 IN x\nEND\n'))
+        self.checkModes(self.write('digits', 'BEGIN\nPRINTLN 1\nPRINTLN RAISE 7 100000\nEND\n'))
+
+if __name__ == '__main__':
+    unittest.main()
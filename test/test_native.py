@@ -0,0 +1,88 @@
+# Translate programs to Python functions and compare the output, symbols and errors of the native machine
+# with the virtual machine.
+
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, MemoryOutput, NativeMachine, Program, Variables, VirtualMachine
+
+OPERATORS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'RAISE', 'ROOT')
+TEXTS = [
+    'BEGIN\nVARSTR s WITH "a b"\nVARINT x\nINPUT x\nINPUT s\nPRINT s\nPRINTLN x\nSTORE MUL x x IN x\nPRINTLN x\nEND\n',
+    'BEGIN\nVARINT x\nINPUT x\nINPUT x\nEND\n',
+    'BEGIN\nVARINT x WITH 1\nPRINTLN x\nVARINT y WITH DIV x SUB x 1\nPRINTLN y\nEND\n',
+    'BEGIN\nVARINT x WITH 2\n' + 'STORE ADD x 1 IN x\n' * 500 + 'PRINTLN x\nEND\n',
+    'BEGIN\nPRINTLN ' + 'ADD 1 ' * 200 + '1\nEND\n',
+    'BEGIN\nVARINT x WITH 3\nPRINTLN ' + 'MUL x ' * 100 + 'SUB x x\nEND\n',
+    'BEGIN\nPRINTLN MOD RAISE 3 100000 7\nPRINTLN DIST 0 0 AND 3 4\nPRINTLN MEAN 1 2 3\nEND\n',
+    'BEGIN\nVARINT x\nPRINTLN "x"\nINPUT x\nEND\n',
+]
+
+class NativeTest(unittest.TestCase):
+    @staticmethod
+    # Random expression over the numbers and the variables x and y.
+    def getExpression(generator, depth):
+        choice = generator.random()
+        if depth == 0 or choice < 0.3:
+            return generator.choice(('x', 'y', '0', '1', '2', '-3', '7'))
+        if choice < 0.4:
+            count = generator.randrange(1, 4)
+            return 'MEAN ' + ' '.join(NativeTest.getExpression(generator, depth - 1) for _ in range(count))
+        operator = generator.choice(OPERATORS)
+        operand2 = generator.choice(('2', 'y')) if operator == 'RAISE' else NativeTest.getExpression(generator, depth - 1)
+        return '%s %s %s' % (operator, NativeTest.getExpression(generator, depth - 1), operand2)
+    
+    @staticmethod
+    # Output, symbols and error of the program run on the inputs.
+    def execute(program, machine, inputs = ('12', 'abc')):
+        lines = iter(inputs)
+        variables = Variables()
+        output = MemoryOutput()
+        machine = machine(program, variables, output)
+        machine.input = lambda: next(lines)
+        try:
+            machine.run()
+            error = None
+        except Error as err:
+            error = str(err)
+        except Exception as exception:
+            error = type(exception).__name__
+        return output.getValue(), [(variable.name, variable._type, variable.value) for variable in variables.variables], \
+               error
+    
+    def check(self, text):
+        with self.subTest(text = text[:200]):
+            program = Program.compileText(text)
+            self.assertEqual(NativeTest.execute(program, NativeMachine), NativeTest.execute(program, VirtualMachine))
+    
+    def testTexts(self):
+        for text in TEXTS:
+            self.check(text)
+    
+    def testRandom(self):
+        generator = random.Random(11)
+        for _ in range(300):
+            lines = ['BEGIN', 'VARINT x WITH %d' % generator.randrange(-5, 6), 'VARINT y']
+            for index in range(4):
+                expression = NativeTest.getExpression(generator, 4)
+                statement = generator.choice(('PRINTLN %s', 'PRINT %s', 'STORE %s IN x', 'STORE %s IN y', \
+                                              'VARINT z%d WITH %%s' % index, 'INPUT y'))
+                lines.append(statement % expression if '%s' in statement else statement)
+            self.check('\n'.join(lines + ['END', '']))
+    
+    # The translation is kept with the compiled program, e.g. in the cache.
+    def testSerialize(self):
+        program = Program.compileText(TEXTS[0])
+        native = program.getNative()
+        self.assertIs(program.getNative(), native)
+        copy = Program.deserialize(program.serialize())
+        self.assertEqual(copy.native, native)
+        self.assertEqual(NativeTest.execute(copy, NativeMachine), NativeTest.execute(program, VirtualMachine))
+
+if __name__ == '__main__':
+    unittest.main()
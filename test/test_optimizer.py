@@ -0,0 +1,96 @@
+# Fold the operations on numbers and share the repeated subexpressions of each expression, and check that the
+# optimized programs have the same output, symbols and errors as without the optimizer.
+
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, MemoryOutput, Opcode, Optimizer, Program, Variables, VirtualMachine
+
+OPERATORS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'RAISE', 'ROOT')
+
+class OptimizerTest(unittest.TestCase):
+    @staticmethod
+    # Random expression over the numbers and the variables x and y.
+    def getExpression(generator, depth):
+        choice = generator.random()
+        if depth == 0 or choice < 0.3:
+            return generator.choice(('x', 'y', '0', '1', '2', '-3', '7', str(generator.randrange(-50, 50))))
+        if choice < 0.4:
+            count = generator.randrange(1, 4)
+            return 'MEAN ' + ' '.join(OptimizerTest.getExpression(generator, depth - 1) for _ in range(count))
+        if choice < 0.45:
+            points = [OptimizerTest.getExpression(generator, depth - 1) for _ in range(4)]
+            return 'DIST %s %s AND %s %s' % tuple(points)
+        operator = generator.choice(OPERATORS)
+        operand1 = OptimizerTest.getExpression(generator, depth - 1)
+        # The same operand twice is shared.
+        operand2 = operand1 if generator.random() < 0.3 else OptimizerTest.getExpression(generator, depth - 1)
+        if operator == 'RAISE':
+            operand2 = generator.choice(('2', '3', 'y', '-1'))
+        return '%s %s %s' % (operator, operand1, operand2)
+    
+    @staticmethod
+    # Output, symbols and error of the program, or the type of the exception reported as a general error.
+    def execute(program):
+        variables = Variables()
+        output = MemoryOutput()
+        try:
+            VirtualMachine(program, variables, output).run()
+            error = None
+        except Error as err:
+            error = str(err)
+        except Exception as exception:
+            error = type(exception).__name__
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    @staticmethod
+    # Same program compiled without the optimizer.
+    def compilePlain(text):
+        with mock.patch.object(Optimizer, 'optimize', lambda self, code: code):
+            return Program.compileText(text)
+    
+    def testRandom(self):
+        generator = random.Random(10)
+        for _ in range(300):
+            lines = ['BEGIN', 'VARINT x WITH %d' % generator.randrange(-5, 6), 'VARINT y WITH %d' % generator.randrange(4)]
+            for _ in range(3):
+                expression = OptimizerTest.getExpression(generator, 4)
+                lines.append(generator.choice(('PRINTLN %s', 'STORE %s IN x', 'VARINT z%d WITH %%s' % len(lines))) % expression)
+            text = '\n'.join(lines + ['END', ''])
+            with self.subTest(text = text):
+                self.assertEqual(OptimizerTest.execute(Program.compileText(text)), \
+                                 OptimizerTest.execute(OptimizerTest.compilePlain(text)))
+    
+    @staticmethod
+    # Instructions of the single statement of the program.
+    def getCode(expression):
+        return Program.compileText('BEGIN\nVARINT x WITH 3\nPRINTLN %s\nEND\n' % expression).code[2:]
+    
+    def testFold(self):
+        self.assertEqual(OptimizerTest.getCode('ADD 1 MUL 2 3'), \
+                         [(Opcode.PUSH, 7), (Opcode.CONTEXT, (4, 13, '')), (Opcode.PRINT, True)])
+        self.assertEqual(OptimizerTest.getCode('MEAN 1 2 DIST 0 0 AND 3 4')[0], (Opcode.PUSH, 2))
+        # Operations that fail or give huge numbers are left to the execution.
+        for expression, opcode in (('DIV 1 0', Opcode.DIV), ('ROOT 0 4', Opcode.ROOT), ('RAISE 7 100000', Opcode.RAISE)):
+            code = OptimizerTest.getCode(expression)
+            self.assertEqual(code[0][0], Opcode.CONTEXT)
+            self.assertIn((opcode, None), code)
+    
+    # A repeated subexpression is computed once and kept in a temporary.
+    def testShare(self):
+        opcodes = [opcode for opcode, arg in OptimizerTest.getCode('ADD RAISE x 20 RAISE x 20')]
+        self.assertEqual(opcodes.count(Opcode.RAISE), 1)
+        self.assertEqual(opcodes.count(Opcode.SAVE), 1)
+        self.assertEqual(opcodes.count(Opcode.RESTORE), 1)
+        opcodes = [opcode for opcode, arg in OptimizerTest.getCode('MOD RAISE x 100000 7')]
+        self.assertIn(Opcode.RAISE_MOD, opcodes)
+        self.assertNotIn(Opcode.RAISE, opcodes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# Write the output of programs through a buffer, flushed when full, before reading an input, on error
+# and at the end of the program.
+
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import BufferedOutput, DescriptorOutput, Error, MemoryOutput, NativeMachine, Program, RecordedOutput, \
+                        Variables, VirtualMachine
+
+# Text stream recording each write.
+class Stream(io.StringIO):
+    def __init__(self):
+        io.StringIO.__init__(self)
+        self.writes = []
+    
+    def write(self, text):
+        self.writes.append(text)
+        return io.StringIO.write(self, text)
+
+class OutputTest(unittest.TestCase):
+    def testBuffer(self):
+        stream = Stream()
+        output = BufferedOutput(stream, 10)
+        output.write('abcd')
+        output.write('efgh')
+        self.assertEqual(stream.writes, [])
+        output.write('ij')
+        self.assertEqual(stream.writes, ['abcdefghij'])
+        output.write('k')
+        output.flush()
+        output.flush()
+        self.assertEqual(stream.writes, ['abcdefghij', 'k'])
+        
+        stream = Stream()
+        output = BufferedOutput(stream, 0)
+        output.write('a')
+        output.write('b')
+        self.assertEqual(stream.writes, ['a', 'b'])
+    
+    # The output written before an input or an error is visible, whatever the size of the buffer.
+    def testFlush(self):
+        program = Program.compileText('BEGIN\nVARINT x\nPRINT "prompt"\nINPUT x\nPRINTLN x\nPRINTLN DIV x 0\nEND\n')
+        for machine in (VirtualMachine, NativeMachine):
+            with self.subTest(machine = machine.__name__):
+                stream = Stream()
+                machine = machine(program, Variables(), BufferedOutput(stream))
+                prompts = []
+                machine.input = lambda: prompts.append(stream.getvalue()) or '5'
+                with self.assertRaises(Error):
+                    machine.run()
+                self.assertEqual(prompts, ['prompt'])
+                self.assertEqual(stream.getvalue(), 'prompt5\n')
+                self.assertEqual(stream.writes, ['prompt', '5\n'])
+    
+    def testDescriptor(self):
+        read, write = os.pipe()
+        try:
+            output = DescriptorOutput(write, 4)
+            output.write('é1')
+            output.write('23')
+            output.write('4')
+            output.flush()
+            os.close(write)
+            write = None
+            with os.fdopen(read, 'rb') as pipe:
+                read = None
+                self.assertEqual(pipe.read().decode('utf-8'), 'é1234')
+        finally:
+            for descriptor in (read, write):
+                if descriptor is not None:
+                    os.close(descriptor)
+    
+    def testRecorded(self):
+        stream = Stream()
+        output = RecordedOutput(BufferedOutput(stream, 100))
+        VirtualMachine(Program.compileText('BEGIN\nPRINT 1\nPRINTLN "a"\nEND\n'), Variables(), output).run()
+        self.assertEqual(output.getValue(), '1a\n')
+        self.assertEqual(stream.writes, ['1a\n'])
+        memory = MemoryOutput()
+        memory.write('x')
+        memory.flush()
+        self.assertEqual(memory.getValue(), 'x')
+
+if __name__ == '__main__':
+    unittest.main()
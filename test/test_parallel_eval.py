@@ -0,0 +1,102 @@
+# Evaluate the costly statements of programs on a pool of processes and compare the output, symbols and errors
+# with the virtual machine, the statements still taking effect in order.
+
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, MemoryOutput, Opcode, ParallelMachine, Program, Variables, VirtualMachine
+
+NAMES = ('x', 'y', 'z')
+
+class ParallelEvalTest(unittest.TestCase):
+    @staticmethod
+    # Random expression over the numbers and the variables, costly or not.
+    def getExpression(generator, depth):
+        if depth == 0 or generator.random() < 0.3:
+            return generator.choice(NAMES + ('0', '1', '2', '-3', str(generator.randrange(-50, 50))))
+        operand = ParallelEvalTest.getExpression(generator, depth - 1)
+        choice = generator.random()
+        if choice < 0.3:
+            return 'RAISE %s %s' % (operand, generator.choice(('2', '3', '-1', 'y')))
+        if choice < 0.45:
+            return 'ROOT %s %s' % (generator.choice(('2', '3', '0', 'z')), operand)
+        if choice < 0.6:
+            return 'MOD RAISE %s %s %s' % (operand, generator.choice(('5', 'y', '-2')), generator.choice(('7', 'x', '0')))
+        operator = generator.choice(('ADD', 'SUB', 'MUL', 'DIV', 'MOD'))
+        return '%s %s %s' % (operator, operand, ParallelEvalTest.getExpression(generator, depth - 1))
+    
+    @staticmethod
+    # Output, symbols and error of the program run by the machine, or the type of the exception
+    # reported as a general error.
+    def execute(machine, program, inputs = ()):
+        variables = Variables()
+        output = MemoryOutput()
+        machine = machine(program, variables, output) if machine is VirtualMachine else \
+                  machine(program, variables, output, processes = 2)
+        machine.input = iter(inputs).__next__
+        try:
+            machine.run()
+            error = None
+        except Error as err:
+            error = str(err)
+        except Exception as exception:
+            error = type(exception).__name__
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    def testRandom(self):
+        generator = random.Random(24)
+        for _ in range(40):
+            lines = ['BEGIN'] + ['VARINT %s WITH %d' % (name, generator.randrange(-3, 6)) for name in NAMES]
+            for _ in range(6):
+                expression = ParallelEvalTest.getExpression(generator, 3)
+                lines.append(generator.choice(('PRINTLN %s', 'STORE %s IN ' + generator.choice(NAMES), '%s')) % expression)
+                if generator.random() < 0.1:
+                    lines.append('INPUT ' + generator.choice(NAMES))
+            text = '\n'.join(lines + ['END', ''])
+            with self.subTest(text = text):
+                program = Program.compileText(text)
+                self.assertEqual(ParallelEvalTest.execute(ParallelMachine, program, ['4'] * 6), \
+                                 ParallelEvalTest.execute(VirtualMachine, program, ['4'] * 6))
+    
+    # Each costly statement is evaluated by a process, reading the values stored before it.
+    def testEvaluated(self):
+        program = Program.compileText('BEGIN\nVARINT x WITH 3\nVARINT y\nINPUT y\nVARINT z WITH RAISE x y\n'
+                                      'STORE ROOT 2 z IN x\nPRINTLN x\nPRINTLN MOD RAISE z y 1000\nEND\n')
+        machine = ParallelMachine(program, Variables(), MemoryOutput(), processes = 2)
+        machine.input = iter(['40']).__next__
+        machine.run()
+        self.assertEqual(machine.evaluated, 3)
+        self.assertEqual(machine.output.getValue(), '%d\n%d\n' % (int(3 ** 20), pow(3 ** 40, 40, 1000)))
+        self.assertEqual([variable.value for variable in machine.variables.variables], [3 ** 20, 40, 3 ** 40])
+        
+        # Without costly statements, the program is run by the virtual machine alone.
+        machine = ParallelMachine(Program.compileText('BEGIN\nVARINT x WITH 2\nPRINTLN MUL x x\nEND\n'), Variables(), \
+                                  MemoryOutput(), processes = 2)
+        machine.run()
+        self.assertEqual((machine.evaluated, machine.output.getValue()), (0, '4\n'))
+    
+    # A failing costly statement stops the program after the output of the statements before it.
+    def testError(self):
+        program = Program.compileText('BEGIN\nVARINT x WITH 0\nPRINTLN 1\nVARINT y WITH RAISE 7 x\n'
+                                      'PRINTLN ROOT x y\nPRINTLN 2\nEND\n')
+        output, symbols, error = ParallelEvalTest.execute(ParallelMachine, program)
+        self.assertEqual((output, symbols), ('1\n', [('x', 0), ('y', 1)]))
+        self.assertIn('line number [ 6 ]\n ----> PRINTLN ROOT x y', error)
+        self.assertEqual((output, symbols, error), ParallelEvalTest.execute(VirtualMachine, program))
+    
+    def testUnits(self):
+        code = Program.compileText('BEGIN\nVARINT x WITH 3\nVARINT y WITH RAISE x 5\nPRINTLN y\n'
+                                   'STORE RAISE y x IN x\nEND\n').code
+        self.assertEqual(sum(len(statement) for statement in ParallelMachine.getStatements(code)), len(code))
+        units = ParallelMachine.getUnits(code, 0)
+        self.assertEqual([reads for unitCode, reads, last in units], [None, [(0, 0)], None, [(0, 0), (1, 1)]])
+        self.assertEqual(units[1][2][-1][0], Opcode.DEFINE)
+        self.assertEqual(units[3][2][-1], (Opcode.STORE, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# Lex programs in chunks of a few bytes on a pool of processes and compare the tokens, line numbers and errors
+# with the serial lexer, the chunks ending within strings, comments and CRLF line breaks.
+
+import glob
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Compiler, Constants, Error, Keyword, Lexer, ParallelLexer, Tokens, VirtualMachine, Variables, \
+                        MemoryOutput
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'test', '*' + Constants.FILE_EXTENSION)))
+TEXTS = [
+    'BEGIN\r\nPRINT "a # b"\r\n#c "d\r\nVARINT x WITH 5\nPRINTLN x\nEND\n',
+    'BEGIN\nVARSTR s WITH "a long string spanning several chunks"\n#a long comment spanning several chunks\n'
+    'PRINTLN s\n\n\n  PRINT ADD 1 2#done\nEND',
+    'BEGIN\r\n\r\nVARINT x WITH 1\r\nSTORE ADD x x IN x\r\nPRINTLN x\r\nEND\r\n\r\n',
+    'BEGIN\nVARINT x WITH 1\nPRINTLN x\nPRINTLN @ x\nPRINTLN x\nEND\n',
+    'BEGIN\nVARINT x WITH 1\nPRINTLN "unterminated\nPRINTLN x\nEND\n',
+    'BEGIN\nVARINT x WITH 1\nPRINTLN x\nPRINTLN x\nPRINTLN 12a\nEND\n',
+    '#only a comment\n#and another one\n',
+    'BEGIN\nPRINTLN 1\nEND\n\n\n\n',
+    'BEGIN\nPRINTLN 1\nEND',
+]
+CHUNK_SIZES = (1, 4, 8, 16)
+
+class ParallelLexerTest(unittest.TestCase):
+    @staticmethod
+    # Tokens with the line number of the lexer after each one, then the error if any.
+    def lex(lexer):
+        tokens = []
+        try:
+            while True:
+                token = lexer.getNextToken()
+                tokens.append((token.lineNo, token._type, token.token, token.lexeme, lexer.lineNo))
+                if token._type == Keyword.EOF:
+                    return tokens, None
+        except Error as err:
+            return tokens, str(err)
+        finally:
+            if isinstance(lexer, ParallelLexer):
+                lexer.close()
+    
+    @staticmethod
+    # Output and symbols of the compiled program, or the error.
+    def execute(lexer):
+        try:
+            try:
+                program = Compiler(lexer, Tokens()).compile()
+            finally:
+                if isinstance(lexer, ParallelLexer):
+                    lexer.close()
+            variables = Variables()
+            output = MemoryOutput()
+            VirtualMachine(program, variables, output).run()
+            return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], \
+                   list(program.tokens.getRows())
+        except Error as err:
+            return str(err)
+    
+    def getTexts(self):
+        texts = list(TEXTS)
+        for file in PROGRAMS:
+            with open(file, newline = '') as programFile:
+                texts.append(programFile.read())
+        return texts
+    
+    def testTokens(self):
+        for text in self.getTexts():
+            expected = ParallelLexerTest.lex(Lexer.create(text))
+            for chunkSize in CHUNK_SIZES:
+                with self.subTest(text = text, chunkSize = chunkSize):
+                    lexer = ParallelLexer.create(text, 2, chunkSize)
+                    self.assertIsInstance(lexer, ParallelLexer)
+                    self.assertEqual(ParallelLexerTest.lex(lexer), expected)
+    
+    def testCompile(self):
+        for text in TEXTS:
+            if 'INPUT' in text:
+                continue
+            expected = ParallelLexerTest.execute(Lexer.create(text))
+            for chunkSize in CHUNK_SIZES:
+                with self.subTest(text = text, chunkSize = chunkSize):
+                    self.assertEqual(ParallelLexerTest.execute(ParallelLexer.create(text, 2, chunkSize)), expected)
+    
+    # A text of a single chunk is lexed without any process.
+    def testSingleChunk(self):
+        self.assertIsInstance(ParallelLexer.create(TEXTS[0], 2), Lexer)
+        self.assertIsInstance(ParallelLexer.create('BEGIN\nEND\n', 2, 7), Lexer)
+
+if __name__ == '__main__':
+    unittest.main()
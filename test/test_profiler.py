@@ -0,0 +1,90 @@
+# Profile programs statement by statement: the count, the time of each phase and the largest integer of each line
+# and kind of statement, reported even when the program stops on an error.
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, Lexer, MemoryOutput, Profiler, Tokens, Variables
+
+TEXT = 'BEGIN\nVARINT x WITH RAISE 2 100\nVARINT y\nINPUT y\nPRINTLN x\nPRINTLN ADD x y\nEND\n'
+
+class ProfilerTest(unittest.TestCase):
+    @staticmethod
+    # Profiler of the program, its output and the error stopping it if any. Each input takes 50ms.
+    def profile(text):
+        def read():
+            time.sleep(0.05)
+            return '3'
+        profiler = Profiler('program.ipol')
+        output = MemoryOutput()
+        error = None
+        with mock.patch('builtins.input', read):
+            try:
+                profiler.run(Lexer(text), Tokens(), Variables(), output)
+            except Error as err:
+                error = err
+        return profiler, output.getValue(), error
+    
+    def testLines(self):
+        profiler, output, error = ProfilerTest.profile(TEXT)
+        self.assertIsNone(error)
+        self.assertEqual(output, '%d\n%d\n' % (2 ** 100, 2 ** 100 + 3))
+        lines = { line['line']: line for line in profiler.getLines() }
+        # The line numbers are the ones of the error messages.
+        self.assertEqual([(lines[lineNo]['kind'], lines[lineNo]['count'], lines[lineNo]['bits']) for lineNo in range(3, 8)], \
+                         [('VARINT', 1, 101), ('VARINT', 1, 0), ('INPUT', 1, 0), ('PRINTLN', 1, 101), ('PRINTLN', 1, 101)])
+        self.assertIs(profiler.getLines()[0], lines[5])
+        self.assertGreaterEqual(lines[5]['input'], 0.04)
+        self.assertLess(lines[5]['eval'], 0.04)
+        self.assertEqual(profiler.phases['input'], lines[5]['input'])
+        # The totals also count the time outside of the statements.
+        for phase in Profiler.PHASES:
+            self.assertLessEqual(sum(line[phase] for line in lines.values()), profiler.phases[phase] + 1e-9)
+    
+    def testKinds(self):
+        profiler = ProfilerTest.profile(TEXT)[0]
+        kinds = profiler.getKinds()
+        self.assertEqual(kinds[0]['kind'], 'INPUT')
+        self.assertEqual(sorted((kind['kind'], kind['count'], kind['bits']) for kind in kinds), \
+                         [('INPUT', 1, 0), ('PRINTLN', 2, 101), ('VARINT', 2, 101)])
+    
+    # The statements up to the error are profiled and their output kept.
+    def testError(self):
+        profiler, output, error = ProfilerTest.profile('BEGIN\nPRINTLN 1\nPRINTLN DIV 1 0\nPRINTLN 2\nEND\n')
+        self.assertEqual(error.code, Error.INVALID_OPERATIONS)
+        self.assertEqual(output, '1\n')
+        self.assertEqual(sorted((line['line'], line['count']) for line in profiler.getLines() if line['kind']), [(3, 1), (4, 1)])
+    
+    def testReport(self):
+        profiler = ProfilerTest.profile(TEXT)[0]
+        directory = tempfile.mkdtemp()
+        try:
+            file = os.path.join(directory, 'profile.json')
+            profiler.save(file)
+            with open(file) as profileFile:
+                report = json.load(profileFile)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(report['file'], 'program.ipol')
+        self.assertEqual([line['line'] for line in report['lines']], [line['line'] for line in profiler.getLines()])
+        self.assertTrue(all(line['total'] == Profiler.getTotal(line) for line in report['lines']))
+        
+        text = io.StringIO()
+        with contextlib.redirect_stdout(text):
+            profiler.display(2)
+        for kind in ('INPUT', 'PRINTLN', 'VARINT'):
+            self.assertIn(kind, text.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
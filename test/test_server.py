@@ -0,0 +1,77 @@
+# Run programs on the warm worker pool of the execution server, directly and over a socket.
+
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server import Client, RequestHandler, Status, TCPServer, WorkerPool
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WorkerPool(1, 1)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+    
+    def submit(self, source, inputs = (), timeout = 10.0):
+        return self.pool.submit({ 'source': source, 'inputs': list(inputs) }, timeout)
+    
+    # Process of the idle worker.
+    def getWorker(self):
+        return self.pool.idle.queue[0].process.pid
+    
+    def testRun(self):
+        response = self.submit('BEGIN\nVARINT x\nINPUT x\nPRINTLN ADD x 1\nEND\n', ['41'])
+        self.assertEqual(response['status'], Status.OK)
+        self.assertEqual(response['output'], '42\n')
+        self.assertEqual(response['variables'], [['x', 'INTEGER', '41']])
+        self.assertTrue(self.submit('BEGIN\nVARINT x\nINPUT x\nPRINTLN ADD x 1\nEND\n', ['1'])['cached'])
+    
+    def testError(self):
+        response = self.submit('BEGIN\nPRINTLN DIV 1 0\nEND\n')
+        self.assertEqual(response['status'], Status.ERROR)
+        self.assertIn('Invalid arithmetic operation', response['error'])
+    
+    # A program failing to compile is an INTERPOL error, and the worker is kept.
+    def testSyntaxError(self):
+        worker = self.getWorker()
+        response = self.submit('@BEGIN\nEND\n')
+        self.assertEqual(response['status'], Status.ERROR)
+        self.assertIn('Invalid syntax at line number [ 1 ]', response['error'])
+        self.assertEqual(self.getWorker(), worker)
+        self.assertEqual(self.submit('BEGIN\nPRINTLN 1\nEND\n')['output'], '1\n')
+    
+    # A worker still running after the timeout is replaced.
+    def testTimeout(self):
+        worker = self.getWorker()
+        response = self.submit('BEGIN\nVARINT x WITH RAISE 7 RAISE 7 9\nEND\n', timeout = 0.2)
+        self.assertEqual(response['status'], Status.TIMEOUT)
+        self.assertNotEqual(self.getWorker(), worker)
+        self.assertEqual(self.submit('BEGIN\nPRINTLN 2\nEND\n')['output'], '2\n')
+    
+    def testSocket(self):
+        server = TCPServer(('127.0.0.1', 0), RequestHandler)
+        server.pool = self.pool
+        server.requestTimeout = 10.0
+        thread = threading.Thread(target = server.serve_forever, daemon = True)
+        thread.start()
+        try:
+            client = Client(server.server_address[:2])
+            try:
+                self.assertEqual(client.run('BEGIN\nPRINTLN MUL 6 7\nEND\n')['output'], '42\n')
+                self.assertEqual(client.run({})['status'], Status.FAILED)
+                self.assertEqual(client.run('BEGIN\nPRINT "x"\nEND\n')['output'], 'x')
+            finally:
+                client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# Lex programs from their file by chunks with the streaming lexer, memory-mapped or not, and compare the tokens,
+# line numbers and errors with the lexer of the whole text, then run them one statement at a time.
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Compiler, Constants, Error, File, Keyword, Lexer, MemoryOutput, Program, RecentTokens, \
+                        StreamLexer, Tokens, Variables, VirtualMachine
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'test', '*' + Constants.FILE_EXTENSION)))
+TEXTS = [
+    b'BEGIN\r\nVARSTR s WITH "a string over chunks"\r\n#a comment over chunks\r\nPRINTLN s\r\nEND\r\n',
+    b'BEGIN\nVARINT x WITH 12345678\nPRINTLN MUL x x\n\n\nEND',
+    b'BEGIN\rPRINTLN 1\rEND\r',
+    b'@BEGIN\nEND\n',
+    b'BEGIN\nPRINTLN 1\nPRINTLN 2\nPRINTLN DIV 1 0\nPRINTLN 3\nEND\n',
+    b'BEGIN\nPRINTLN 1\nPRINTLN "unterminated\nEND\n',
+    b'BEGIN\nPRINTLN 1\n',
+    b'x',
+    b'\n',
+]
+CHUNK_SIZES = (1, 4, 16, 1 << 20)
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    # Files of the texts and programs, in the temporary directory.
+    def getFiles(self):
+        files = list(PROGRAMS)
+        for index, text in enumerate(TEXTS):
+            file = os.path.join(self.directory, 'text%d%s' % (index, Constants.FILE_EXTENSION))
+            with open(file, 'wb') as programFile:
+                programFile.write(text)
+            files.append(file)
+        return files
+    
+    @staticmethod
+    # Tokens with the line number of the lexer after each one, then the error if any.
+    def lex(lexer):
+        tokens = []
+        try:
+            while True:
+                token = lexer.getNextToken()
+                tokens.append((token.lineNo, token._type, token.token, token.lexeme, lexer.lineNo))
+                if token._type == Keyword.EOF:
+                    return tokens, None
+        except Error as err:
+            return tokens, str(err)
+        except Exception as exception:
+            return tokens, type(exception).__name__
+    
+    @staticmethod
+    # Output and symbols of the program run one statement at a time as with --stream, then the error if any.
+    def execute(lexer, tokens):
+        variables = Variables()
+        output = MemoryOutput()
+        machine = VirtualMachine(Program([], tokens), variables, output)
+        machine.input = lambda: '1990'
+        try:
+            for code in Compiler(lexer, tokens).compileStatements():
+                machine.run(code)
+            error = None
+        except Error as err:
+            error = str(err)
+        except Exception as exception:
+            error = type(exception).__name__
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    def testTokens(self):
+        for file in self.getFiles():
+            expected = StreamTest.lex(Lexer(File.getFileContent(file)))
+            for chunkSize in CHUNK_SIZES:
+                with self.subTest(file = os.path.basename(file), chunkSize = chunkSize):
+                    lexer = StreamLexer(file, chunkSize)
+                    try:
+                        self.assertEqual(StreamTest.lex(lexer), expected)
+                    finally:
+                        lexer.close()
+    
+    # Files that cannot be memory-mapped are read through a buffer.
+    def testChunks(self):
+        for file in self.getFiles():
+            text = File.getFileContent(file)
+            for chunkSize in CHUNK_SIZES:
+                with self.subTest(file = os.path.basename(file), chunkSize = chunkSize):
+                    chunks = list(File.readChunks(file, chunkSize))
+                    self.assertEqual(''.join(chunks), text)
+                    self.assertTrue(all(chunk.endswith('\n') for chunk in chunks[:-1]))
+                    with mock.patch('mmap.mmap', side_effect = OSError):
+                        self.assertEqual(''.join(File.readChunks(file, chunkSize)), text)
+                    self.assertEqual(File.endsWithLineBreak(file), len(text) > 1 and text.endswith('\n'))
+    
+    def testRun(self):
+        for file in self.getFiles():
+            expected = StreamTest.execute(Lexer(File.getFileContent(file)), Tokens())
+            for chunkSize in (4, 1 << 20):
+                with self.subTest(file = os.path.basename(file), chunkSize = chunkSize):
+                    lexer = StreamLexer(file, chunkSize)
+                    try:
+                        self.assertEqual(StreamTest.execute(lexer, RecentTokens()), expected)
+                    finally:
+                        lexer.close()
+
+if __name__ == '__main__':
+    unittest.main()
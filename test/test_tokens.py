@@ -0,0 +1,141 @@
+# Run the programs without the token/lexeme table, keeping the tokens of the latest lines only or lexing the source
+# again on error, and check that the rows, the tokens of each line and the errors are the same as with the table.
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Cache, Compiler, Constants, Error, Lexer, MemoryOutput, Program, RecentTokens, \
+                        SourceTokens, Tokens, Variables, VirtualMachine
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'test', '*' + Constants.FILE_EXTENSION)))
+# Programs stopping with an error of the lexer, the compiler or the instructions.
+TEXTS = [
+    '@BEGIN\nEND\n',
+    'BEGIN\nPRINTLN 1 @\nEND\n',
+    'BEGIN\nPRINTLN "a\nEND\n',
+    'BEGIN\nVARINT x WITH 1\n\n\n#c\nPRINTLN DIV x SUB x 1\nEND\n',
+    'BEGIN\nVARSTR s WITH "a b"\nPRINTLN ADD s 1\nEND\n',
+    'BEGIN\nVARINT x\nSTORE y IN x\nEND\n',
+    'BEGIN\nPRINTLN 1\nPRINTLN 2',
+    'BEGIN\r\nPRINTLN DIV 1 0\r\nEND\r\n',
+    'BEGIN\n' + 'PRINTLN 1\n' * 500 + 'VARINT x WITH 2\nPRINTLN ROOT 0 x\n' + 'PRINTLN 1\n' * 10 + 'END\n',
+]
+
+class TokensTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    @staticmethod
+    # Output, symbols and error of the program compiled then executed with the given tokens.
+    def execute(text, tokens):
+        variables = Variables()
+        output = MemoryOutput()
+        try:
+            VirtualMachine(Compiler(Lexer.create(text), tokens).compile(), variables, output).run()
+            error = None
+        except Error as err:
+            error = str(err)
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    @staticmethod
+    # Same, compiling and executing each statement in turn as in stream mode.
+    def interpret(text, tokens):
+        variables = Variables()
+        output = MemoryOutput()
+        try:
+            compiler = Compiler(Lexer.create(text), tokens)
+            machine = VirtualMachine(Program([], tokens), variables, output)
+            for code in compiler.compileStatements():
+                machine.run(code)
+            error = None
+        except Error as err:
+            error = str(err)
+        return output.getValue(), [(variable.name, variable.value) for variable in variables.variables], error
+    
+    @staticmethod
+    # Fill the tokens by compiling the program, up to the first token for an error on it.
+    def compile(text, tokens):
+        try:
+            Compiler(Lexer.create(text), tokens).compile()
+        except Error:
+            pass
+    
+    def getTexts(self):
+        texts = list(TEXTS)
+        for file in PROGRAMS:
+            with open(file, newline = '') as programFile:
+                text = programFile.read()
+            # The programs reading inputs are left to test_modes.
+            if 'INPUT' not in text:
+                texts.append(text)
+        return texts
+    
+    def testErrors(self):
+        for text in self.getTexts():
+            with self.subTest(text = text[:40]):
+                expected = TokensTest.execute(text, Tokens())
+                self.assertEqual(TokensTest.execute(text, SourceTokens(text)), expected)
+                self.assertEqual(TokensTest.interpret(text, RecentTokens()), TokensTest.interpret(text, Tokens()))
+                self.assertEqual(TokensTest.interpret(text, Tokens()), expected)
+    
+    # The rows are read back by lexing the source again.
+    def testRows(self):
+        for text in self.getTexts():
+            with self.subTest(text = text[:40]):
+                tokens = Tokens()
+                sourceTokens = SourceTokens(text)
+                TokensTest.compile(text, tokens)
+                TokensTest.compile(text, sourceTokens)
+                self.assertEqual(sourceTokens.count(), tokens.count())
+                self.assertEqual(list(sourceTokens.getRows()), list(tokens.getRows()))
+                end = min(7, tokens.count())
+                self.assertEqual(list(sourceTokens.getRows(1, end)), list(tokens.getRows(1, end)))
+                for lineNo in range(tokens.lineNos[-1] + 2 if tokens.count() else 2):
+                    for end in (None, tokens.count() // 2):
+                        self.assertEqual(repr(sourceTokens.lookup(lineNo, end)), repr(tokens.lookup(lineNo, end)))
+    
+    # Only the tokens of the latest line are kept, and the end is counted from the start of the whole table.
+    def testRecent(self):
+        tokens = Tokens()
+        recent = RecentTokens()
+        for lineNo in range(1, 200):
+            for index in range(lineNo % 4 + 1):
+                tokens.add(lineNo, 'NUMBER', 'NUMBER', index)
+                recent.add(lineNo, 'NUMBER', 'NUMBER', index)
+                self.assertEqual(recent.count(), tokens.count())
+                self.assertEqual(repr(recent.lookup(lineNo, recent.count())), repr(tokens.lookup(lineNo, tokens.count())))
+                self.assertEqual(repr(recent.lookup(lineNo)), repr(tokens.lookup(lineNo)))
+            self.assertLessEqual(len(recent.lineNos), 8)
+    
+    # The program cached with the table is read back without it and the other way around.
+    def testCache(self):
+        for table in (False, True):
+            with self.subTest(table = table):
+                text = 'BEGIN\nVARINT x WITH 5\nPRINTLN DIV 1 SUB x 5\nEND\n'
+                file = os.path.join(self.directory, 'program%d%s' % (table, Constants.FILE_EXTENSION))
+                with open(file, 'w') as programFile:
+                    programFile.write(text)
+                compiled = Program.fromFile(file, table = table)
+                self.assertIs(type(compiled.tokens), Tokens if table else SourceTokens)
+                self.assertIsNotNone(Cache.load(file, Cache.getKey(text)))
+                for cachedTable in (False, True):
+                    cached = Program.fromFile(file, table = cachedTable)
+                    self.assertEqual(cached.code, compiled.code)
+                    self.assertIs(type(cached.tokens), Tokens if cachedTable else SourceTokens)
+                    self.assertEqual(list(cached.tokens.getRows()), list(Program.compileText(text).tokens.getRows()))
+                    with self.assertRaises(Error) as context:
+                        VirtualMachine(cached, Variables(), MemoryOutput()).run()
+                    self.assertIn('line number [ 4 ]\n ----> PRINTLN DIV 1 SUB x 5', str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# Keep the symbols table by slot and by name, in order of declaration, with integers stored as int.
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, Keyword, MemoryOutput, Program, Variable, Variables, VirtualMachine
+
+class VariablesTest(unittest.TestCase):
+    def testSlots(self):
+        variables = Variables()
+        self.assertEqual(variables.define(Variable('b', Keyword.NUMBER, 1)), 0)
+        self.assertEqual(variables.define(Variable('a', Keyword.STRING, 'x')), 1)
+        variables.update('b', 5)
+        variables.update('missing', 6)
+        self.assertEqual(variables.lookup('b').value, 5)
+        self.assertIsNone(variables.lookup('missing'))
+        self.assertIs(variables.variables[variables.slots['a']], variables.lookup('a'))
+        self.assertEqual([variable.name for variable in variables.variables], ['b', 'a'])
+    
+    # The table is displayed in order of declaration, integers as INTEGER.
+    def testDisplay(self):
+        variables = Variables()
+        variables.define(Variable('zeta', Keyword.NUMBER, 10 ** 30))
+        variables.define(Variable('alpha', Keyword.STRING, 'a b'))
+        text = io.StringIO()
+        with contextlib.redirect_stdout(text):
+            variables.display()
+        lines = text.getvalue().splitlines()
+        self.assertEqual(lines[-2].split(), ['zeta', 'INTEGER', str(10 ** 30)])
+        self.assertEqual(lines[-1], 'alpha'.ljust(20) + ' ' + 'STRING'.ljust(15) + ' a b')
+    
+    # Numeric inputs are converted once when read, strings are kept as typed.
+    def testInputs(self):
+        program = Program.compileText('BEGIN\nVARINT x\nVARSTR s\nINPUT x\nINPUT s\nSTORE ADD x 1 IN x\nPRINTLN x\nEND\n')
+        lines = iter([' +7', '  a '])
+        variables = Variables()
+        output = MemoryOutput()
+        machine = VirtualMachine(program, variables, output)
+        machine.input = lambda: next(lines)
+        machine.run()
+        self.assertEqual(output.getValue(), '8\n')
+        self.assertEqual([(variable.name, variable._type, variable.value) for variable in variables.variables], \
+                         [('x', Keyword.NUMBER, 8), ('s', Keyword.STRING, '  a ')])
+        self.assertEqual(variables.slots, { 'x': 0, 's': 1 })
+    
+    # Many variables are still resolved to their own slot.
+    def testMany(self):
+        names = ['v%d' % index for index in range(500)]
+        text = 'BEGIN\n' + ''.join('VARINT %s WITH %d\n' % (name, index) for index, name in enumerate(names)) + \
+               'PRINTLN ADD v0 v499\nSTORE v250 IN v1\nEND\n'
+        variables = Variables()
+        output = MemoryOutput()
+        VirtualMachine(Program.compileText(text), variables, output).run()
+        self.assertEqual(output.getValue(), '499\n')
+        self.assertEqual(variables.lookup('v1').value, 250)
+        self.assertEqual([variable.name for variable in variables.variables], names)
+        with self.assertRaises(Error) as context:
+            VirtualMachine(Program.compileText('BEGIN\nVARINT x\nVARSTR x\nEND\n'), Variables(), MemoryOutput()).run()
+        self.assertEqual(context.exception.code, Error.DUPLICATE_VAR)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# Run programs over tables of inputs with the vector machine and compare the output and error of each row
+# with the virtual machine run on its inputs, the int64 columns staying exact near their bounds.
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Error, MemoryOutput, Opcode, Program, Variables, VectorMachine, VirtualMachine, numpy
+
+TEXTS = [
+    'BEGIN\nVARINT x\nVARINT y\nINPUT x\nINPUT y\nPRINTLN ADD x y\nPRINTLN SUB x y\nPRINTLN MUL x y\n'
+    'PRINTLN DIV x y\nPRINTLN MOD x y\nEND\n',
+    'BEGIN\nVARINT x\nVARINT y\nINPUT x\nINPUT y\nPRINTLN MEAN 3 x y 1\nPRINTLN DIST x y 1 2\n'
+    'PRINTLN RAISE x 3\nPRINTLN RAISE ADD y 1 y\nEND\n',
+    'BEGIN\nVARINT x\nVARSTR s\nINPUT x\nINPUT s\nPRINT s\nPRINTLN ROOT 2 MUL x x\nEND\n',
+]
+BOUND = 1 << 63
+ROWS = [
+    [0, 1], [7, -2], [-7, 3], [5, 0], [1 << 31, 1 << 31], [(1 << 62) - 1, 1], [1 << 62, 1 << 62],
+    [BOUND - 1, -1], [-BOUND, 1], [-BOUND, -1], [3037000499, 3037000499], [-(1 << 32), 12],
+]
+
+class VectorTest(unittest.TestCase):
+    @staticmethod
+    # Output and error of the program run on the inputs of the row.
+    def execute(program, row):
+        lines = iter(row)
+        output = MemoryOutput()
+        machine = VirtualMachine(program, Variables(), output)
+        machine.input = lambda: next(lines)
+        try:
+            machine.run()
+        except Error as err:
+            return output.getValue(), str(err)
+        except Exception:
+            return output.getValue(), Error.getMessage('GENERAL_ERROR')
+        return output.getValue(), None
+    
+    def check(self, table, rows):
+        for text in TEXTS:
+            with self.subTest(text = text, table = type(table).__name__):
+                program = Program.compileText(text)
+                expected = [VectorTest.execute(program, [str(cell) for cell in row]) for row in rows]
+                self.assertEqual(VectorMachine(program, table).run(), expected)
+    
+    def testRows(self):
+        self.check([[str(cell) for cell in row] for row in ROWS], ROWS)
+        self.check([['1', 'x'], ['2'], [], ['3', '4']], [['1', 'x'], ['2'], [], ['3', '4']])
+    
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def testArrays(self):
+        self.check(numpy.array(ROWS, dtype = numpy.int64), ROWS)
+        for dtype in (numpy.int8, numpy.int32):
+            rows = [row for row in ROWS if all(numpy.iinfo(dtype).min <= cell <= numpy.iinfo(dtype).max for cell in row)]
+            self.check(numpy.array(rows, dtype = dtype), rows)
+        rows = [[cell, 3] for cell in (0, BOUND - 1, BOUND, 2 * BOUND - 1)]
+        self.check(numpy.array(rows, dtype = numpy.uint64), rows)
+    
+    # The columns are int64 whatever the default integer of numpy, and within their limit.
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def testBounds(self):
+        self.assertEqual(VectorMachine.INT64_BOUND, BOUND)
+        self.assertEqual(VectorMachine.LIMIT, BOUND >> 1)
+        machine = VectorMachine(Program.compileText('BEGIN\nEND\n'), [[]] * 3)
+        self.assertEqual(machine.active.dtype, numpy.int64)
+        column = numpy.array([-BOUND, 0, 1], dtype = numpy.int64)
+        self.assertEqual(machine.getBound(column), BOUND)
+        self.assertEqual(machine.normalize(column).dtype, object)
+        self.assertEqual(machine.toColumn([1, 2, 3]).dtype, numpy.int64)
+        self.assertEqual(machine.toColumn([1, BOUND >> 1, 3]).dtype, numpy.int64)
+        self.assertEqual(machine.toColumn([1, (BOUND >> 1) + 1, 3]).dtype, object)
+        result = machine.binaryOperation(Opcode.ADD, numpy.array([1, 2, 3], dtype = numpy.int64), 1 << 40)
+        self.assertEqual(result.dtype, numpy.int64)
+        self.assertEqual(result.tolist(), [(1 << 40) + 1, (1 << 40) + 2, (1 << 40) + 3])
+
+if __name__ == '__main__':
+    unittest.main()
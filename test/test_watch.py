@@ -0,0 +1,134 @@
+# Run successive versions of a program in watch mode, only lexing the lines that changed and reusing
+# the statements of the last run, with the same output, symbols and errors as a full run.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interpreter import Constants, Engine, Error, IncrementalLexer, Keyword, Lexer, MemoryOutput, Watcher
+
+# Successive versions of the same program.
+VERSIONS = [
+    'BEGIN\nVARINT x WITH 5\nPRINTLN x\nVARSTR s WITH "a # b"\nPRINT s\nEND\n',
+    'BEGIN\nVARINT x WITH 5\nPRINTLN x\nVARSTR s WITH "a # b"\nPRINT s\nPRINTLN MUL x 2\nEND\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nVARSTR s WITH "a # b"\nPRINT s\nPRINTLN MUL x 2\nEND\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nVARSTR s WITH "a # b"\nPRINT s\nPRINTLN MUL x 2\nEND',
+    'BEGIN\r\nVARINT x WITH 6\r\nPRINTLN x\r\n#comment\r\nEND\r\n\r\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nPRINTLN @ x\nEND\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nPRINTLN "unterminated\nEND\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nPRINTLN DIV x SUB x 6\nPRINTLN 1\nEND\n',
+    'BEGIN\nVARINT x WITH 6\nPRINTLN x\nSTORE 7 IN x\nPRINTLN x\nEND\n',
+    '',
+    '\n',
+]
+
+class WatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file = os.path.join(self.directory, 'watched' + Constants.FILE_EXTENSION)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def write(self, text):
+        with open(self.file, 'w', newline = '') as programFile:
+            programFile.write(text)
+    
+    @staticmethod
+    # Tokens with the line number of the lexer after each one, then the error if any.
+    def lex(text, lexer):
+        tokens = []
+        try:
+            lexer = lexer(text)
+            while True:
+                token = lexer.getNextToken()
+                tokens.append((token.lineNo, token._type, token.token, token.lexeme, lexer.lineNo))
+                if token._type == Keyword.EOF:
+                    return tokens, None
+        except Error as err:
+            return tokens, str(err)
+        except Exception as exception:
+            return tokens, type(exception).__name__
+    
+    def testLexer(self):
+        lexer = IncrementalLexer()
+        for text in VERSIONS + VERSIONS:
+            with self.subTest(text = text):
+                self.assertEqual(WatchTest.lex(text, lexer.getLexer), WatchTest.lex(text, Lexer))
+    
+    # Only the lines that changed are lexed again.
+    def testLexed(self):
+        lexer = IncrementalLexer()
+        lexer.getLexer(VERSIONS[0])
+        self.assertEqual((lexer.count, lexer.lexed), (6, 6))
+        lexer.getLexer(VERSIONS[1])
+        self.assertEqual((lexer.count, lexer.lexed), (7, 1))
+        lexer.getLexer(VERSIONS[2])
+        self.assertEqual((lexer.count, lexer.lexed), (7, 1))
+        lexer.getLexer(VERSIONS[2])
+        self.assertEqual((lexer.count, lexer.lexed), (7, 0))
+    
+    # Same output, variables and error as a full run of each version.
+    def testRun(self):
+        output = MemoryOutput()
+        watcher = Watcher(self.file, output)
+        engine = Engine()
+        for text in VERSIONS:
+            with self.subTest(text = text):
+                self.write(text)
+                del output.parts[:]
+                variables, error = watcher.run()
+                result = engine.run(text)
+                self.assertEqual(output.getValue(), result.output)
+                self.assertEqual([(variable.name, variable.value) for variable in variables.variables], \
+                                 [(variable.name, variable.value) for variable in result.variables.variables])
+                self.assertEqual(None if error is None else str(error), \
+                                 None if result.error is None else str(result.error))
+    
+    # The statements before the first one that changed are reused, not run again.
+    def testReused(self):
+        watcher = Watcher(self.file, MemoryOutput())
+        self.write(VERSIONS[0])
+        watcher.run()
+        self.assertEqual((watcher.count, watcher.reused), (4, 0))
+        self.write(VERSIONS[1])
+        watcher.run()
+        self.assertEqual((watcher.count, watcher.reused), (5, 4))
+        self.write(VERSIONS[2])
+        watcher.run()
+        self.assertEqual((watcher.count, watcher.reused), (5, 0))
+        watcher.run()
+        self.assertEqual((watcher.count, watcher.reused), (5, 5))
+    
+    # The statements reading the input are always run again, with the statements after them.
+    @mock.patch('builtins.input', side_effect = ['3', '4'])
+    def testInput(self, read):
+        output = MemoryOutput()
+        watcher = Watcher(self.file, output)
+        self.write('BEGIN\nVARINT x\nPRINTLN 1\nINPUT x\nPRINTLN x\nEND\n')
+        watcher.run()
+        del output.parts[:]
+        watcher.run()
+        self.assertEqual((watcher.count, watcher.reused), (4, 2))
+        self.assertEqual(output.getValue(), '1\n4\n')
+        self.assertEqual(read.call_count, 2)
+    
+    # The file is read again once its version changes.
+    def testVersion(self):
+        watcher = Watcher(self.file, MemoryOutput())
+        self.assertIsNone(watcher.getVersion())
+        self.write(VERSIONS[0])
+        watcher.run()
+        self.assertEqual(watcher.version, watcher.getVersion())
+        self.write(VERSIONS[1])
+        self.assertNotEqual(watcher.version, watcher.getVersion())
+        watcher.wait()
+
+if __name__ == '__main__':
+    unittest.main()